@@ -1,12 +1,29 @@
 import streamlit as st
-import pandas as pd
-import plotly.express as px
-import plotly.graph_objects as go
 from datetime import datetime, timedelta
 import json
 from typing import Dict, List, Any
+import os
+import tempfile
+import copy
 import uuid
 
+from cip import export, importer, profiling, reminders, search
+from cip.projects import (PHASE_WEIGHTS, TASK_PRIORITIES, TASK_STATUSES, calculate_progress, check_metrics,
+                          create_sample_project, improvement_percent, new_project)
+from cip.startup import is_loaded, lazy_import
+from cip.store import open_store
+from cip.tracking import HEADER, ChangeTracker, apply_changes
+
+# Charting and analytics stacks (plotly, numpy, pandas) load on first use, not on every cold start
+pd = lazy_import('pandas')
+analytics = lazy_import('cip.analytics')
+charts = lazy_import('cip.charts')
+portfolio = lazy_import('cip.portfolio')
+reports = lazy_import('cip.reports')
+spc = lazy_import('cip.spc')
+task_table = lazy_import('cip.task_table')
+timeseries = lazy_import('cip.timeseries')
+
 # Page configuration
 st.set_page_config(
     page_title="Digital CIP Tool",
@@ -15,51 +32,70 @@ st.set_page_config(
     initial_sidebar_state="expanded"
 )
 
+# Static assets (CSS, onboarding text), read once per server process
+ASSET_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'assets')
+
+@st.cache_resource
+def load_asset(name):
+    with open(os.path.join(ASSET_DIR, name), encoding='utf-8') as fh:
+        return fh.read()
+
 # CSS for better design
-st.markdown("""
-<style>
-    .pdca-header {
-        background: linear-gradient(90deg, #FF6B6B, #4ECDC4, #45B7D1, #96CEB4);
-        padding: 20px;
-        border-radius: 10px;
-        text-align: center;
-        color: white;
-        font-size: 24px;
-        font-weight: bold;
-        margin-bottom: 20px;
-    }
-    
-    .phase-card {
-        padding: 15px;
-        border-radius: 10px;
-        margin: 10px 0;
-        border-left: 5px solid;
-    }
-    
-    .plan-card { border-left-color: #FF6B6B; background-color: #FFE5E5; }
-    .do-card { border-left-color: #4ECDC4; background-color: #E5F9F6; }
-    .check-card { border-left-color: #45B7D1; background-color: #E5F3FF; }
-    .act-card { border-left-color: #96CEB4; background-color: #E5F5E5; }
-    
-    .task-completed { text-decoration: line-through; opacity: 0.6; }
-    .priority-high { border-left: 3px solid #FF4444; }
-    .priority-medium { border-left: 3px solid #FFA500; }
-    .priority-low { border-left: 3px solid #4CAF50; }
-    
-    .metric-card {
-        background: white;
-        padding: 20px;
-        border-radius: 10px;
-        box-shadow: 0 2px 4px rgba(0,0,0,0.1);
-        text-align: center;
-    }
-</style>
-""", unsafe_allow_html=True)
+st.markdown(f"<style>\n{load_asset('style.css')}</style>", unsafe_allow_html=True)
+
+# Seconds between checks whether a report being generated is ready
+REPORT_POLL_SECONDS = 2
+
+# Seconds between checks for changes other sessions made to the open project
+CHANGE_POLL_SECONDS = float(os.environ.get('CIP_CHANGE_POLL', '5'))
+
+# Largest bulk export offered as a download (Streamlit keeps download data in memory)
+EXPORT_DOWNLOAD_LIMIT = float(os.environ.get('CIP_EXPORT_DOWNLOAD_MB', '50')) * 2**20
+
+# Seconds staged edits may wait before they are written (0: at the end of every interaction)
+FLUSH_INTERVAL = float(os.environ.get('CIP_FLUSH_INTERVAL', '0'))
+
+PROJECT_STATUS_LABELS = {'draft': '📝 Draft', 'in_progress': '🔄 In Progress',
+                         'completed': '✅ Completed', 'on_hold': '⏸️ On Hold'}
+
+# Shared project store (one per server process, not per session)
+@st.cache_resource
+def get_store():
+    return open_store()
+
+# Rerun metrics of all sessions, optionally served on CIP_METRICS_PORT for Prometheus
+@st.cache_resource
+def get_metrics():
+    registry = profiling.MetricsRegistry()
+    port = os.environ.get('CIP_METRICS_PORT')
+    if port:
+        profiling.serve(registry, int(port), os.environ.get('CIP_METRICS_HOST', '127.0.0.1'))
+    profiling.instrument_widgets(st)
+    return registry
+
+# Overdue reminders, sent from one background thread per server process when a sink is configured
+@st.cache_resource
+def get_reminders():
+    sink = reminders.sink_from_env()
+    if sink is None:
+        return None
+    interval = float(os.environ.get('CIP_REMINDER_INTERVAL', str(reminders.DEFAULT_INTERVAL)))
+    return reminders.ReminderScheduler(open_store, sink, interval).start()
+
+# Report worker processes shared by all sessions
+@st.cache_resource
+def get_report_queue():
+    return reports.ReportQueue(get_store(), os.environ.get('CIP_STORE_URL'),
+                               os.environ.get('CIP_REPORT_DIR', reports.DEFAULT_REPORT_DIR),
+                               int(os.environ.get('CIP_REPORT_WORKERS', '2')))
+
+# Figure cache shared by all sessions
+@st.cache_resource
+def get_figure_cache():
+    return charts.FigureCache(maxsize=int(os.environ.get('CIP_FIGURE_CACHE_SIZE', '256')))
 
 # Initialize session state
 def init_session_state():
-    if 'projects' not in st.session_state:
-        st.session_state.projects = {}
     if 'current_project' not in st.session_state:
         st.session_state.current_project = None
     if 'user_role' not in st.session_state:
@@ -68,55 +104,10 @@ def init_session_state():
         st.session_state.tasks = {}
     if 'comments' not in st.session_state:
         st.session_state.comments = {}
-
-# Create sample project
-def create_sample_project():
-    sample_id = str(uuid.uuid4())
-    return {
-        'id': sample_id,
-        'name': 'Example: Reducing Wait Times',
-        'description': 'Reduce production wait times by 30%',
-        'created_date': datetime.now().strftime('%Y-%m-%d'),
-        'status': 'in_progress',
-        'plan': {
-            'problem': 'Long wait times between production steps',
-            'goal': 'Reduce wait times by 30%',
-            'root_cause': 'Unbalanced machine capacities',
-            'measures': ['Machine analysis', 'Process optimization', 'Training']
-        },
-        'do': {
-            'implementation_steps': [
-                {'task': 'Analyze machine utilization', 'responsible': 'John Smith', 'due_date': '2024-07-15', 'status': 'completed'},
-                {'task': 'Identify bottlenecks', 'responsible': 'Anna Johnson', 'due_date': '2024-07-20', 'status': 'in_progress'},
-                {'task': 'Implement optimization measures', 'responsible': 'Tom Wilson', 'due_date': '2024-07-30', 'status': 'open'}
-            ]
-        },
-        'check': {
-            'metrics': {'wait_time_before': 45, 'wait_time_after': 32, 'improvement_percent': 28.9},
-            'results': 'Wait times were reduced by 28.9%'
-        },
-        'act': {
-            'standardization': 'New work instructions created',
-            'lessons_learned': 'Regular capacity analysis is essential',
-            'next_steps': 'Extension to other production lines'
-        }
-    }
-
-# Progress calculation
-def calculate_progress(project_data):
-    phases = ['plan', 'do', 'check', 'act']
-    completed_phases = 0
-    
-    if project_data.get('plan', {}).get('problem'):
-        completed_phases += 0.25
-    if project_data.get('do', {}).get('implementation_steps'):
-        completed_phases += 0.25
-    if project_data.get('check', {}).get('results'):
-        completed_phases += 0.25
-    if project_data.get('act', {}).get('standardization'):
-        completed_phases += 0.25
-    
-    return min(completed_phases * 100, 100)
+    if 'session_id' not in st.session_state:
+        st.session_state.session_id = str(uuid.uuid4())
+    if 'tracker' not in st.session_state:
+        st.session_state.tracker = ChangeTracker(get_store(), flush_interval=FLUSH_INTERVAL)
 
 # PDCA progress display
 def show_pdca_progress(current_phase):
@@ -141,41 +132,807 @@ def show_pdca_progress(current_phase):
                 </div>
                 """, unsafe_allow_html=True)
 
+# Portfolio rows are cached per store revision, so reruns without changes skip the query
+@st.cache_data(max_entries=32)
+def load_portfolio_cached(_store, revision, statuses, created_from, created_to, today, progress, by_progress):
+    return portfolio.load_portfolio(_store, statuses, created_from, created_to, today, progress, by_progress)
+
+# Sidebar project names, rebuilt only when a project changes
+@st.cache_data(max_entries=4)
+def load_project_names(_store, revision):
+    return {proj['id']: proj['name'] for proj in _store.list_projects()}
+
+# Full-text search over all projects; a result switches the active project
+def show_search(store, tracker):
+    if not getattr(store, 'has_search', False):
+        return
+    query = st.text_input("🔍 Search", placeholder='e.g. cause:changeover, chang*, "wait time"',
+                          key='search_query')
+    if not query.strip():
+        return
+    results = search.search_projects(store, query, limit=10)
+    if not results:
+        st.caption("No matching projects.")
+    for result in results:
+        if st.button(result['name'], key=f"search_hit_{result['id']}", use_container_width=True):
+            if result['id'] != st.session_state.current_project:
+                tracker.flush(force=True)
+                st.session_state.current_project = result['id']
+            st.rerun()
+        st.caption(result['snippet'])
+
+# Portfolio overview across all projects
+def show_portfolio(store):
+    st.header("🗂️ Portfolio Overview")
+    col1, col2, col3 = st.columns([2, 1, 1])
+    with col1:
+        statuses = st.multiselect("Status:", list(PROJECT_STATUS_LABELS), default=list(PROJECT_STATUS_LABELS),
+                                  format_func=lambda x: PROJECT_STATUS_LABELS[x])
+    with col2:
+        created_from = st.date_input("Created from:", value=None)
+    with col3:
+        created_to = st.date_input("Created until:", value=None)
+    col1, col2 = st.columns([3, 1])
+    with col1:
+        progress = st.slider("Progress:", 0, 100, (0, 100), format="%d%%")
+    with col2:
+        by_progress = st.toggle("Most advanced first")
+    
+    df = load_portfolio_cached(store, store.revision(), tuple(statuses), created_from, created_to,
+                               datetime.now().date(), progress if progress != (0, 100) else None, by_progress)
+    kpis = portfolio.portfolio_kpis(df)
+    
+    col1, col2, col3, col4, col5 = st.columns(5)
+    with col1:
+        st.metric("Projects", kpis['projects'])
+    with col2:
+        st.metric("Avg. Progress", f"{kpis['avg_progress']:.0f}%")
+    with col3:
+        st.metric("Tasks Completed", kpis['task_completed'], f"{kpis['completion_rate']:.0f}%")
+    with col4:
+        st.metric("Overdue", kpis['overdue'])
+    with col5:
+        improvement = kpis['avg_improvement']
+        st.metric("Avg. Improvement", f"{improvement:.1f}%" if improvement is not None else "–")
+    
+    if df.empty:
+        st.info("No projects match the selected filters.")
+        return
+    
+    col1, col2 = st.columns(2)
+    with col1:
+        st.subheader("Projects by Status")
+        st.bar_chart(df['status'].value_counts())
+    with col2:
+        st.subheader("Progress Distribution")
+        st.bar_chart(pd.cut(df['progress'], bins=[-1, 25, 50, 75, 100],
+                            labels=['0-25%', '26-50%', '51-75%', '76-100%']).value_counts(sort=False))
+    
+    st.dataframe(
+        df.drop(columns=['id', 'updated_at']),
+        hide_index=True,
+        use_container_width=True,
+        column_config={
+            'name': 'Project',
+            'status': 'Status',
+            'created_date': st.column_config.DateColumn('Created'),
+            'progress': st.column_config.ProgressColumn('Progress', min_value=0, max_value=100, format='%.0f%%'),
+            'task_total': 'Tasks',
+            'task_open': 'Open',
+            'task_in_progress': 'In Progress',
+            'task_completed': 'Completed',
+            'next_due_date': 'Next Due',
+            'improvement_percent': st.column_config.NumberColumn('Improvement', format='%.1f%%'),
+            'overdue': 'Overdue',
+            **{f'{phase}_progress': st.column_config.ProgressColumn(
+                phase.capitalize(), min_value=0, max_value=100, format='%.0f%%') for phase in PHASE_WEIGHTS},
+        }
+    )
+
+TASK_SORT_OPTIONS = {'position': 'Order added', 'due_date': 'Due date', 'status': 'Status',
+                     'responsible': 'Responsible', 'priority': 'Priority', 'task': 'Task'}
+
+# Paged, filterable task table of the Do tab
+def show_task_table(store, project_id):
+    can_edit = st.session_state.user_role in ['Admin', 'Editor']
+    
+    col1, col2, col3, col4, col5 = st.columns([2, 2, 2, 2, 1])
+    with col1:
+        statuses = st.multiselect("Status:", TASK_STATUSES, key=f"task_status_filter_{project_id}")
+    with col2:
+        people = store.task_responsibles(project_id)
+        responsible = st.selectbox("Responsible:", [None] + people, key=f"task_resp_filter_{project_id}",
+                                   format_func=lambda x: "All" if x is None else (x or "(none)"))
+    with col3:
+        due_range = st.date_input("Due between:", value=(), key=f"task_due_filter_{project_id}")
+    with col4:
+        sort_by = st.selectbox("Sort by:", list(TASK_SORT_OPTIONS), key=f"task_sort_{project_id}",
+                               format_func=lambda x: TASK_SORT_OPTIONS[x])
+    with col5:
+        descending = st.toggle("Desc.", key=f"task_desc_{project_id}")
+    
+    page_size = st.session_state.get(f"task_page_size_{project_id}", 25)
+    page = st.session_state.get(f"task_page_{project_id}", 1)
+    due_from = due_range[0] if len(due_range) > 0 else None
+    due_to = due_range[1] if len(due_range) > 1 else None
+    page_df, total = task_table.load_task_page(
+        store, project_id, statuses=statuses, responsible=responsible, due_from=due_from,
+        due_to=due_to, sort_by=sort_by, descending=descending, page=page, page_size=page_size)
+    pages = task_table.page_count(total, page_size)
+    if page > pages:
+        # Filters shrank the result; jump back to the last page
+        st.session_state[f"task_page_{project_id}"] = pages
+        st.rerun()
+    
+    if total == 0:
+        st.info("No tasks defined yet." if not statuses and responsible is None and not due_range
+                else "No tasks match the filters.")
+        return
+    
+    conflicts = st.session_state.pop(f"task_conflicts_{project_id}", None)
+    if conflicts:
+        st.warning(f"⚠️ {len(conflicts)} task(s) were changed by another user in the meantime; "
+                   "your edits to them were not saved. The current values are shown.")
+    
+    column_config = {
+        'version': None,
+        'task': st.column_config.TextColumn("Task", required=True),
+        'responsible': st.column_config.TextColumn("👤 Responsible"),
+        'due_date': st.column_config.DateColumn("📅 Due Date", format="YYYY-MM-DD"),
+        'status': st.column_config.SelectboxColumn("Status", options=TASK_STATUSES, required=True),
+        'priority': st.column_config.SelectboxColumn("Priority", options=TASK_PRIORITIES, required=True),
+    }
+    if can_edit:
+        editor_df = page_df.copy()
+        if st.session_state.user_role == 'Admin':
+            editor_df.insert(0, 'delete', False)
+            column_config['delete'] = st.column_config.CheckboxColumn("🗑️", width="small")
+        # A new key per page/filter (and after applying) starts the editor without stale edits
+        generation = st.session_state.get('task_editor_generation', 0)
+        view_key = hash((tuple(statuses), responsible, due_from, due_to, sort_by, descending, page, page_size))
+        editor_key = f"task_editor_{project_id}_{view_key}_{generation}"
+        edited = st.data_editor(
+            editor_df, column_config=column_config, hide_index=True, use_container_width=True,
+            key=editor_key, num_rows="fixed")
+        deleted = list(edited.index[edited['delete']]) if 'delete' in edited else []
+        updates = task_table.diff_task_page(page_df, edited)
+        # Versions the pending edits were made on; the page itself may have been reloaded since
+        if not (updates or deleted):
+            st.session_state[f"{editor_key}_versions"] = page_df['version'].to_dict()
+        versions = {**page_df['version'].to_dict(), **st.session_state.get(f"{editor_key}_versions", {})}
+        if st.button("💾 Apply Changes", disabled=not (updates or deleted)):
+            _, _, conflicts = task_table.apply_task_edits(store, project_id, page_df, edited, deleted, versions)
+            if conflicts:
+                st.session_state[f"task_conflicts_{project_id}"] = conflicts
+            st.session_state.pop(f"{editor_key}_versions", None)
+            st.session_state.task_editor_generation = generation + 1
+            st.rerun()
+    else:
+        st.dataframe(page_df, column_config=column_config, hide_index=True, use_container_width=True)
+    
+    col1, col2, col3 = st.columns([1, 1, 3])
+    with col1:
+        st.number_input("Page:", min_value=1, max_value=pages, key=f"task_page_{project_id}")
+    with col2:
+        st.selectbox("Rows per page:", [10, 25, 50, 100], index=1, key=f"task_page_size_{project_id}")
+    with col3:
+        st.caption(f"{total} tasks · page {page} of {pages}")
+
+# Current project, kept in the session and brought up to date from the change feed
+def load_current_project(store, project_id):
+    seq = store.change_seq()
+    loaded = st.session_state.get('loaded_project')
+    project = None
+    if loaded is not None and loaded['id'] == project_id and loaded['project'] is not None:
+        changes = store.changes_since(loaded['seq'], project_id) if loaded['seq'] != seq else []
+        if changes is not None:
+            project = apply_changes(store, loaded['project'], changes)
+    if project is None:
+        project = store.get_project(project_id)
+    st.session_state.loaded_project = {'id': project_id, 'seq': seq, 'project': project}
+    # The page edits its copy in place; the session keeps the loaded state
+    return copy.deepcopy(project)
+
+# Reruns the page as soon as another session (or the API) changed the open project
+@st.fragment(run_every=CHANGE_POLL_SECONDS)
+def watch_changes(store, project_id, seq):
+    changes = store.changes_since(seq, project_id)
+    if changes is None or any(actor != st.session_state.session_id for *_, actor in changes):
+        st.rerun(scope='app')
+
+PHASE_LABELS = {HEADER: 'Project', 'plan': 'Plan', 'do': 'Do', 'check': 'Check', 'act': 'Act'}
+
+# Edits that lost against a concurrent change
+def show_conflicts(tracker):
+    conflicts = tracker.pop_conflicts()
+    if conflicts:
+        fields = ', '.join(f"{PHASE_LABELS[phase]}: {field.replace('_', ' ')}" for _, phase, field in conflicts)
+        st.warning(f"⚠️ Not saved because another user changed them in the meantime: {fields}. "
+                   "Their values are shown now.")
+
+# Keyed input of a tracked field, showing ``value`` (the stored value with pending edits). A value the
+# user changed since the last render is kept and reported as edited, even if another session saved the
+# field in the meantime; otherwise the input follows the store instead of writing back what it showed
+def edit_widget(widget, label, key, value, **kwargs):
+    shown = f"{key}_shown"
+    edited = key in st.session_state and st.session_state[key] != st.session_state.get(shown)
+    if not edited:
+        st.session_state[key] = value
+    st.session_state[shown] = widget(label, key=key, **kwargs)
+    return st.session_state[shown], edited
+
+# Whole-portfolio export (streamed to a temporary file, then offered for download)
+def show_bulk_export(store):
+    with st.sidebar.expander("📦 Bulk Export"):
+        fmt = st.selectbox("Format:", export.FORMATS, format_func=str.upper)
+        kind = st.selectbox("Records:", export.KINDS, format_func=str.capitalize)
+        since = st.date_input("Changed since:", value=None)
+        if st.button("Prepare Export"):
+            # The export streams to a file on disk; only a download within the limit is read back
+            tmp = (tempfile.TemporaryFile() if fmt == 'parquet'
+                   else tempfile.TemporaryFile('w+', encoding='utf-8', newline=''))
+            with tmp, profiling.section('export'):
+                try:
+                    count = export.write_export(store, tmp, fmt, kind, since)
+                except RuntimeError as exc:
+                    st.error(str(exc))
+                    return
+                tmp.flush()
+                size = os.fstat(tmp.fileno()).st_size
+                if size > EXPORT_DOWNLOAD_LIMIT:
+                    command = f"python -m cip.export --format {fmt} --kind {kind}"
+                    if since:
+                        command += f" --since {since.isoformat()}"
+                    st.warning(f"The export of {count} {kind} records is {size / 2**20:.0f} MB, more than the "
+                               f"{EXPORT_DOWNLOAD_LIMIT / 2**20:.0f} MB the app serves. Export it from the "
+                               f"command line instead:")
+                    st.code(f"{command} -o cip_{kind}.{fmt}", language='bash')
+                    return
+                tmp.seek(0)
+                data = tmp.read()
+            st.caption(f"{count} {kind} records")
+            st.download_button(
+                label="💾 Download",
+                data=data,
+                file_name=f"cip_{kind}_{datetime.now().strftime('%Y%m%d')}.{fmt}",
+                mime=export.MIME_TYPES[fmt]
+            )
+
+# Polls a pending report job; once it is done the page reruns to show the download instead
+@st.fragment(run_every=REPORT_POLL_SECONDS)
+def poll_report_job(key, label):
+    if st.session_state[key]['future'].done():
+        st.rerun(scope='app')
+    st.caption(f"⏳ {label} in progress…")
+
+# A3 reports are rendered by the worker pool; the finished file is read once and kept with the job
+def show_report_job(key, label):
+    job = st.session_state.get(key)
+    if job is None:
+        return
+    future = job['future']
+    if not future.done():
+        poll_report_job(key, label)
+        return
+    try:
+        result = future.result()
+    except RuntimeError as exc:
+        st.error(str(exc))
+        return
+    if not result:
+        st.caption(f"{label.capitalize()}: nothing to report.")
+        return
+    if 'data' not in job:
+        # A single report's future holds its path, a batch's the number of reports in its archive
+        try:
+            with open(job.get('path') or result, 'rb') as fh:
+                job['data'] = fh.read()
+        except FileNotFoundError:
+            if 'project_id' not in job:
+                raise
+            # The project changed and a newer report replaced this one; fetch the current version
+            job['future'] = get_report_queue().submit(job['project_id'], job['format'])
+            poll_report_job(key, label)
+            return
+    st.download_button(f"💾 Download {label}", job['data'], file_name=job['file_name'], mime=job['mime'],
+                       key=f"{key}_download")
+
+def show_project_report(tracker, project_id, project_name):
+    with st.sidebar.expander("📄 A3 Report"):
+        fmt = st.selectbox("Format:", reports.FORMATS, format_func=str.upper, key='report_format')
+        if st.button("Generate Report"):
+            tracker.flush(force=True)
+            st.session_state.report_job = {
+                'future': get_report_queue().submit(project_id, fmt),
+                'project_id': project_id, 'format': fmt,
+                'file_name': f"cip_a3_{project_name.replace(' ', '_')}.{fmt}",
+                'mime': reports.MIME_TYPES[fmt]}
+        show_report_job('report_job', "report")
+
+def show_batch_reports(store):
+    with st.sidebar.expander("📄 A3 Reports"):
+        month = st.date_input("Completed in month of:", value=datetime.now().date(), key='report_month')
+        fmt = st.selectbox("Format:", reports.FORMATS, format_func=str.upper, key='batch_report_format')
+        if st.button("Generate Reports"):
+            project_ids = reports.completed_in_month(store, month)
+            if not project_ids:
+                st.caption("No projects were completed in that month.")
+            else:
+                queue = get_report_queue()
+                target = os.path.join(queue.directory, f"batch_{st.session_state.session_id}.zip")
+                os.makedirs(queue.directory, exist_ok=True)
+                st.session_state.batch_report_job = {
+                    'future': queue.submit_batch(project_ids, target, fmt), 'path': target,
+                    'file_name': f"cip_a3_{month:%Y-%m}.zip", 'mime': reports.MIME_TYPES['zip']}
+        show_report_job('batch_report_job', "reports")
+
+# Bulk import of exported or migrated projects
+def show_bulk_import(store):
+    if st.session_state.user_role not in ['Admin', 'Editor']:
+        return
+    with st.sidebar.expander("📤 Import Projects"):
+        uploaded = st.file_uploader("JSON, JSON Lines or CSV:", type=['json', 'jsonl', 'ndjson', 'csv'])
+        replace = st.checkbox("Overwrite existing projects with the same id")
+        if uploaded is not None and st.button("Import"):
+            data = uploaded.getvalue()
+            # Line count as an estimate of the record count for the progress bar
+            estimate = max(data.count(b'\n'), 1)
+            bar = st.progress(0.0, text="Importing...")
+            
+            def show_progress(counters):
+                bar.progress(min(counters['read'] / estimate, 1.0),
+                             text=f"{counters['imported']} projects, {counters['tasks']} tasks imported")
+            
+            try:
+                report = importer.import_file(store, data, uploaded.name, replace=replace, progress=show_progress)
+            except (ValueError, UnicodeDecodeError) as exc:
+                st.error(f"Import failed: {exc}")
+                return
+            bar.progress(1.0, text="Done")
+            st.success(f"Imported {report['imported']} projects ({report['tasks']} tasks), "
+                       f"skipped {report['skipped']} duplicates.")
+            if report['errors']:
+                st.warning(f"{report['invalid']} invalid records:")
+                for label, errors in report['errors'][:20]:
+                    st.caption(f"**{label}**: {'; '.join(errors)}")
+
+# Bulk upload of KPI measurements into the project's time series
+def show_metric_ingest(store, project_id):
+    with st.expander("⬆️ Upload KPI Time Series"):
+        st.caption("CSV with columns `timestamp`, `metric`, `value` (one row per measurement).")
+        uploaded = st.file_uploader("Measurements:", type=['csv'], key=f"series_upload_{project_id}")
+        if uploaded is not None and st.button("Ingest", key=f"series_ingest_{project_id}"):
+            try:
+                written = timeseries.ingest_frame(store, project_id, pd.read_csv(uploaded))
+            except (ValueError, pd.errors.ParserError) as exc:
+                st.error(f"Upload failed: {exc}")
+                return
+            st.success(f"Stored {written:,} points.")
+
+# Control limits per series, synced with the chunks written since the last rerun instead of recomputed
+@st.cache_resource(max_entries=64)
+def get_running_limits(project_id, metric, subgroup_size):
+    return spc.RunningLimits(subgroup_size)
+
+# Before/after comparison and SPC verification of one series version; the series is only loaded on a miss
+@st.cache_data(max_entries=64)
+def analyze_series(_store, project_id, metric, version, change_date, lower_is_better, subgroup_size):
+    ts, values = timeseries.load_series(_store, project_id, metric)
+    result = timeseries.improvement(ts, values, change_date, lower_is_better=lower_is_better)
+    try:
+        return result, spc.compare_phases(ts, values, change_date, subgroup_size), None
+    except ValueError as exc:
+        return result, None, str(exc)
+
+# KPI time series with rolling baseline, before/after improvement and SPC verification
+def show_metric_series(store, project_id):
+    series = timeseries.list_series(store, project_id)
+    if series.empty:
+        return
+    st.subheader("📈 KPI Time Series")
+    col1, col2, col3 = st.columns(3)
+    with col1:
+        metric = st.selectbox("Metric:", series['metric'], key=f"series_metric_{project_id}")
+    info = series.set_index('metric').loc[metric]
+    with col2:
+        change_date = st.date_input("Change date:", value=(info['first'] + (info['last'] - info['first']) / 2).date(),
+                                    min_value=info['first'].date(), max_value=info['last'].date(),
+                                    key=f"series_change_{project_id}_{metric}")
+    with col3:
+        window = st.selectbox("Baseline window:", ['1D', '7D', '30D'], index=1, key=f"series_window_{project_id}")
+    lower_is_better = st.checkbox("Lower is better", value=True, key=f"series_lower_{project_id}_{metric}")
+    
+    # The version changes with every write of the series, including rewrites of existing points
+    version = (int(info['points']), info['updated_at'])
+    col1, col2 = st.columns(2)
+    with col1:
+        chart_type = st.selectbox("Control chart:", ['Individuals (I-MR)', 'X-bar / R'], key=f"spc_chart_{project_id}")
+    with col2:
+        subgroup_size = 1
+        if chart_type == 'X-bar / R':
+            subgroup_size = int(st.number_input("Subgroup size:", min_value=2, max_value=max(spc.CHART_CONSTANTS),
+                                                value=5, key=f"spc_subgroup_{project_id}"))
+    result, verification, error = analyze_series(store, project_id, metric, version, change_date,
+                                                 lower_is_better, subgroup_size)
+    col1, col2, col3 = st.columns(3)
+    with col1:
+        st.metric("Mean before", f"{result['before_mean']:.2f}" if result['before_mean'] is not None else "–")
+    with col2:
+        st.metric("Mean after", f"{result['after_mean']:.2f}" if result['after_mean'] is not None else "–")
+    with col3:
+        percent = result['improvement_percent']
+        st.metric("Improvement", f"{percent:.1f}%" if percent is not None else "–")
+    
+    # SPC: limits from the points before the change date, rule checks and significance after it
+    if error:
+        st.caption(f"No control limits: {error}.")
+    if verification:
+        limits, test = verification['limits'], verification['test']
+        col1, col2, col3 = st.columns(3)
+        with col1:
+            st.metric("Control limits (before)", f"{limits.lcl:.2f} – {limits.ucl:.2f}")
+        with col2:
+            st.metric("p-value (Welch)", f"{test['p_value']:.3g}" if test['p_value'] is not None else "–")
+        with col3:
+            st.metric("Rule violations after", sum(verification['violations'].values()))
+        if test['significant']:
+            st.success("The shift in the mean is statistically significant (p < 0.05).")
+        elif test['p_value'] is not None:
+            st.info("The shift in the mean is not statistically significant (yet).")
+        broken = [f"{spc.WESTERN_ELECTRIC_RULES[rule]}: {count}"
+                  for rule, count in verification['violations'].items() if count]
+        if broken:
+            st.caption("Western Electric rules broken after the change: " + "; ".join(broken))
+    running = get_running_limits(project_id, metric, subgroup_size).sync(store, project_id, metric,
+                                                                         info['updated_at'], int(info['points']))
+    if running.points > 2 * subgroup_size:
+        current = running.limits()
+        st.caption(f"Running limits over all {running.points:,} points: "
+                   f"{current.lcl:.2f} – {current.ucl:.2f} (center {current.center:.2f})")
+    
+    # The figure is rebuilt only when the series, window, change date or chart type changes
+    def build():
+        ts, values = timeseries.load_series(store, project_id, metric)
+        frame = timeseries.downsample(ts, values)
+        baseline = timeseries.downsample(ts, timeseries.rolling_baseline(ts, values, window))['mean']
+        return charts.build_series_chart(frame, metric, baseline, pd.Timestamp(change_date),
+                                         verification['limits'] if verification else None)
+    inputs = [project_id, metric, int(info['points']), info['updated_at'], window, str(change_date), subgroup_size]
+    st.plotly_chart(get_figure_cache().get('series', inputs, build), use_container_width=True)
+    st.caption(f"{int(info['points']):,} points, downsampled to at most {timeseries.DEFAULT_MAX_POINTS:,} buckets")
+
+# Markdown table of plain rows (st.dataframe would load pandas on every Admin rerun)
+def markdown_table(header, rows):
+    lines = ['| ' + ' | '.join(header) + ' |', '|' + ' --- |' * len(header)]
+    lines += ['| ' + ' | '.join(str(cell) for cell in row) + ' |' for row in rows]
+    return '\n'.join(lines)
+
+# Admin-only timings of this rerun and of all reruns since the server started
+def show_profiling_panel(profile, registry):
+    with st.sidebar.expander("⏱️ Rerun Profile"):
+        st.caption(f"This rerun: {1000 * profile['seconds']:.0f} ms, {profile['widgets']} widgets, "
+                   f"session state ≈ {profile['session_bytes'] / 1024:,.0f} KiB")
+        sections = sorted(profile['sections'].items(), key=lambda item: -item[1])
+        st.markdown(markdown_table(['Section', 'ms'], [(name, f"{1000 * seconds:.1f}") for name, seconds in sections]))
+        st.caption("All reruns (p95 is a histogram bucket bound):")
+        st.markdown(markdown_table(['Section', 'Count', 'Mean ms', 'p95 ms'],
+                                   [(row['section'], row['count'], f"{row['mean_ms']:.1f}", f"{row['p95_ms']:.1f}")
+                                    for row in registry.summary_rows()]))
+        st.download_button("📄 Metrics (Prometheus)", registry.render(), file_name="cip_metrics.txt",
+                           mime="text/plain")
+
+# Plan phase: problem, goal, root cause and actions
+def show_plan(store, tracker, project_id):
+    st.markdown('<div class="phase-card plan-card"><h3>📋 Plan - Planning</h3></div>', unsafe_allow_html=True)
+    show_pdca_progress('plan')
+    plan_data = tracker.current(project_id, 'plan')
+    
+    if st.session_state.user_role in ['Admin', 'Editor']:
+        # Problem definition
+        st.subheader("🎯 Problem Definition")
+        problem, problem_edited = edit_widget(
+            st.text_area, "What is the problem?", f"plan_problem_{project_id}", plan_data.get('problem', ''),
+            help="Describe the problem concretely and measurably")
+        
+        # Goal setting
+        st.subheader("🎯 Goal Setting")
+        goal, goal_edited = edit_widget(
+            st.text_area, "What is the goal?", f"plan_goal_{project_id}", plan_data.get('goal', ''),
+            help="SMART goals: Specific, Measurable, Achievable, Relevant, Time-bound")
+        
+        # Root cause analysis
+        st.subheader("🔍 Root Cause Analysis")
+        root_cause, root_cause_edited = edit_widget(
+            st.text_area, "What are the main causes?", f"plan_root_cause_{project_id}",
+            plan_data.get('root_cause', ''), help="Use 5-Why, Ishikawa diagram or other analysis methods")
+        
+        # Action planning
+        st.subheader("📝 Action Planning")
+        measures_text, measures_edited = edit_widget(
+            st.text_area, "Planned actions (one per line):", f"plan_measures_{project_id}",
+            '\n'.join(plan_data.get('measures', [])))
+        measures = [m.strip() for m in measures_text.split('\n') if m.strip()]
+        
+        # Auto-save
+        edited = {'problem': problem_edited, 'goal': goal_edited, 'root_cause': root_cause_edited,
+                  'measures': measures_edited}
+        tracker.stage(project_id, 'plan', {
+            'problem': problem,
+            'goal': goal,
+            'root_cause': root_cause,
+            'measures': measures
+        }, [field for field, changed in edited.items() if changed])
+    else:
+        # Display only for readers
+        if plan_data.get('problem'):
+            st.write("**Problem:**", plan_data['problem'])
+        if plan_data.get('goal'):
+            st.write("**Goal:**", plan_data['goal'])
+        if plan_data.get('root_cause'):
+            st.write("**Root Causes:**", plan_data['root_cause'])
+        if plan_data.get('measures'):
+            st.write("**Actions:**")
+            for measure in plan_data['measures']:
+                st.write(f"• {measure}")
+
+# Do phase: new tasks and the task table
+def show_do(store, tracker, project_id):
+    st.markdown('<div class="phase-card do-card"><h3>🔨 Do - Implementation</h3></div>', unsafe_allow_html=True)
+    show_pdca_progress('do')
+    
+    # Task management
+    st.subheader("📋 Task Tracking")
+    
+    if st.session_state.user_role in ['Admin', 'Editor']:
+        # Add new task
+        with st.expander("➕ Add New Task"):
+            col1, col2, col3 = st.columns(3)
+            with col1:
+                new_task = st.text_input("Task:")
+            with col2:
+                new_responsible = st.text_input("Responsible:")
+            with col3:
+                new_date = st.date_input("Due Date:")
+            
+            if st.button("Add Task") and new_task:
+                store.add_task(project_id, {
+                    'task': new_task,
+                    'responsible': new_responsible,
+                    'due_date': new_date.strftime('%Y-%m-%d'),
+                    'status': 'open',
+                    'priority': 'medium'
+                })
+                st.rerun()
+    
+    # Display task list (one page at a time)
+    show_task_table(store, project_id)
+
+# Check phase: before/after metrics, results and KPI uploads
+def show_check(store, tracker, project_id):
+    st.markdown('<div class="phase-card check-card"><h3>📊 Check - Verification</h3></div>', unsafe_allow_html=True)
+    show_pdca_progress('check')
+    check_data = tracker.current(project_id, 'check')
+    
+    if st.session_state.user_role in ['Admin', 'Editor']:
+        st.subheader("📈 Metrics & Results")
+        
+        # Enter metrics
+        col1, col2, col3 = st.columns(3)
+        with col1:
+            metric1, before_edited = edit_widget(
+                st.number_input, "Before Value:", f"check_before_{project_id}",
+                float(check_data.get('metrics', {}).get('wait_time_before', 0.0)))
+        with col2:
+            metric2, after_edited = edit_widget(
+                st.number_input, "After Value:", f"check_after_{project_id}",
+                float(check_data.get('metrics', {}).get('wait_time_after', 0.0)))
+        with col3:
+            improvement = improvement_percent(metric1, metric2)
+            if improvement is not None:
+                st.metric("Improvement", f"{improvement:.1f}%")
+        
+        # Results assessment
+        results, results_edited = edit_widget(
+            st.text_area, "Results Assessment:", f"check_results_{project_id}", check_data.get('results', ''))
+        
+        # Save
+        edited = {'metrics': before_edited or after_edited, 'results': results_edited}
+        tracker.stage(project_id, 'check', {
+            'metrics': check_metrics(metric1, metric2),
+            'results': results
+        }, [field for field, changed in edited.items() if changed])
+        show_metric_ingest(store, project_id)
+    else:
+        # Display only
+        if check_data.get('metrics'):
+            metrics = check_data['metrics']
+            col1, col2, col3 = st.columns(3)
+            with col1:
+                st.metric("Before", metrics.get('wait_time_before', 0))
+            with col2:
+                st.metric("After", metrics.get('wait_time_after', 0))
+            with col3:
+                st.metric("Improvement", f"{metrics.get('improvement_percent', 0):.1f}%")
+        
+        if check_data.get('results'):
+            st.write("**Results:**", check_data['results'])
+
+# Act phase: standardization, lessons learned and next steps
+def show_act(store, tracker, project_id):
+    st.markdown('<div class="phase-card act-card"><h3>🎯 Act - Action</h3></div>', unsafe_allow_html=True)
+    show_pdca_progress('act')
+    act_data = tracker.current(project_id, 'act')
+    
+    if st.session_state.user_role in ['Admin', 'Editor']:
+        st.subheader("📋 Standardization & Next Steps")
+        
+        # Standardization
+        standardization, standardization_edited = edit_widget(
+            st.text_area, "Standardization:", f"act_standardization_{project_id}",
+            act_data.get('standardization', ''), help="How will improvements be permanently anchored?")
+        
+        # Lessons learned
+        lessons, lessons_edited = edit_widget(
+            st.text_area, "Lessons Learned:", f"act_lessons_learned_{project_id}",
+            act_data.get('lessons_learned', ''), help="What did you learn? What would you do differently?")
+        
+        # Next steps
+        next_steps, next_steps_edited = edit_widget(
+            st.text_area, "Next Steps:", f"act_next_steps_{project_id}", act_data.get('next_steps', ''),
+            help="What follow-up actions are planned?")
+        
+        # Save
+        edited = {'standardization': standardization_edited, 'lessons_learned': lessons_edited,
+                  'next_steps': next_steps_edited}
+        tracker.stage(project_id, 'act', {
+            'standardization': standardization,
+            'lessons_learned': lessons,
+            'next_steps': next_steps
+        }, [field for field, changed in edited.items() if changed])
+    else:
+        # Display only
+        if act_data.get('standardization'):
+            st.write("**Standardization:**", act_data['standardization'])
+        if act_data.get('lessons_learned'):
+            st.write("**Lessons Learned:**", act_data['lessons_learned'])
+        if act_data.get('next_steps'):
+            st.write("**Next Steps:**", act_data['next_steps'])
+
+# Dashboard: task KPIs and charts, read from the store when the section is opened
+def show_dashboard(store, tracker, project_id):
+    st.header("📈 Project Dashboard")
+    
+    # KPIs
+    col1, col2, col3, col4 = st.columns(4)
+    
+    with profiling.section('dashboard_kpis'):
+        task_df = analytics.load_tasks_frame(store, project_id)
+        kpis = analytics.task_kpis(task_df)
+    total_tasks = kpis['total']
+    completed_tasks = kpis['completed']
+    in_progress_tasks = kpis['in_progress']
+    overdue_tasks = kpis['overdue']
+    
+    with col1:
+        st.metric("Total Tasks", total_tasks)
+    with col2:
+        st.metric("Completed", completed_tasks, f"{completed_tasks}/{total_tasks}")
+    with col3:
+        st.metric("In Progress", in_progress_tasks)
+    with col4:
+        st.metric("Overdue", overdue_tasks, delta=f"-{overdue_tasks}" if overdue_tasks > 0 else None)
+    
+    # Task status chart
+    if total_tasks:
+        fig = charts.status_pie(get_figure_cache(), kpis['status_counts'])
+        st.plotly_chart(fig, use_container_width=True)
+        
+        col1, col2 = st.columns(2)
+        with col1:
+            st.subheader("⏰ Overdue by Responsible")
+            overdue_people = analytics.overdue_by_responsible(task_df)
+            if overdue_people.empty:
+                st.caption("No overdue tasks.")
+            else:
+                st.bar_chart(overdue_people)
+        with col2:
+            st.subheader("📉 Burndown")
+            st.line_chart(analytics.burndown(task_df)['remaining'])
+        
+        st.subheader("📅 Tasks by Due Week")
+        st.bar_chart(analytics.due_date_histogram(task_df))
+    
+    # Timeline (if metrics available)
+    check_data = tracker.current(project_id, 'check').get('metrics', {})
+    if check_data:
+        fig = charts.improvement_bar(get_figure_cache(), check_data)
+        st.plotly_chart(fig, use_container_width=True)
+    
+    show_metric_series(store, project_id)
+
+PDCA_SECTIONS = {'plan': ("📋 Plan", show_plan), 'do': ("🔨 Do", show_do), 'check': ("📊 Check", show_check),
+                 'act': ("🎯 Act", show_act), 'dashboard': ("📈 Dashboard", show_dashboard)}
+
+# One PDCA section; its widgets rerun only this fragment, not the header, sidebar or other sections
+@st.fragment
+def pdca_section(name, store, tracker, project_id):
+    # The actor is per thread and a fragment rerun may run on a thread main() never ran on
+    store.set_actor(st.session_state.session_id)
+    profiled(name, PDCA_SECTIONS[name][1], store, tracker, project_id)
+    # Commit boundary of a fragment rerun (the app's own flush follows on a full rerun)
+    tracker.flush()
+    if tracker.conflicts:
+        st.rerun(scope='app')
+
+# Writes debounced edits once the interval has passed, also when the user stopped interacting
+@st.fragment(run_every=FLUSH_INTERVAL or None)
+def flush_pending(store, tracker):
+    store.set_actor(st.session_state.session_id)
+    tracker.flush()
+    if tracker.conflicts:
+        st.rerun(scope='app')
+
+# Profiles one rerun (of main() or of a fragment alone) and records it into the process-wide metrics
+def run_profiled(scope, body, *args):
+    registry = get_metrics()
+    profiler = profiling.RerunProfiler(registry, scope)
+    try:
+        with profiler.rerun():
+            body(*args)
+    finally:
+        # Also reached when the rerun ends early through st.rerun()
+        state = {key: st.session_state[key] for key in st.session_state}
+        shared = [get_store()] + ([get_figure_cache()] if is_loaded('cip.charts') else [])
+        profile = profiler.finish(state, shared=shared)
+        textfile = os.environ.get('CIP_METRICS_FILE')
+        if textfile:
+            registry.write_textfile(textfile, min_interval=float(os.environ.get('CIP_METRICS_INTERVAL', '15')))
+    return profile
+
+# A section of the app rerun, or a profiled rerun of its own when its fragment reruns alone
+def profiled(name, body, *args):
+    if profiling.active() is None:
+        run_profiled(name, profiled, name, body, *args)
+        return
+    profiling.lap(name)
+    body(*args)
+
+def run():
+    profile = run_profiled('app', main)
+    if st.session_state.user_role == 'Admin':
+        show_profiling_panel(profile, get_metrics())
+
 # Main application
 def main():
+    profiling.lap('setup')
     init_session_state()
+    store = get_store()
+    scheduler = get_reminders()
+    store.set_actor(st.session_state.session_id)
+    tracker = st.session_state.tracker
     
     # Header
     st.markdown('<div class="pdca-header">🔄 Digital CIP Tool</div>', unsafe_allow_html=True)
     
     # Sidebar for project selection
+    profiling.lap('sidebar')
     with st.sidebar:
         st.header("Project Selection")
         
         # Create new project
         if st.button("➕ New Project"):
-            new_project = {
-                'id': str(uuid.uuid4()),
-                'name': 'New CIP Project',
-                'description': '',
-                'created_date': datetime.now().strftime('%Y-%m-%d'),
-                'status': 'draft',
-                'plan': {}, 'do': {}, 'check': {}, 'act': {}
-            }
-            st.session_state.projects[new_project['id']] = new_project
-            st.session_state.current_project = new_project['id']
+            st.session_state.current_project = store.save_project(new_project())
             st.rerun()
         
         # Add sample project
         if st.button("📝 Load Sample Project"):
             sample = create_sample_project()
-            st.session_state.projects[sample['id']] = sample
-            st.session_state.current_project = sample['id']
+            st.session_state.current_project = store.save_project(sample)
             st.rerun()
         
         # Project list
-        if st.session_state.projects:
-            project_names = {pid: proj['name'] for pid, proj in st.session_state.projects.items()}
+        project_names = load_project_names(store, store.revision())
+        if project_names:
             selected_project = st.selectbox(
                 "Active Project:",
                 options=list(project_names.keys()),
@@ -184,7 +941,12 @@ def main():
                       list(project_names.keys()).index(st.session_state.current_project) 
                       if st.session_state.current_project in project_names else 0
             )
+            if selected_project != st.session_state.current_project:
+                tracker.flush(force=True)
             st.session_state.current_project = selected_project
+            show_search(store, tracker)
+        
+        view = st.radio("View:", ["📁 Project", "🗂️ Portfolio"], horizontal=True)
         
         # User role
         st.selectbox("User Role:", ['Admin', 'Editor', 'Reader'], 
@@ -192,336 +954,110 @@ def main():
                     key='user_role')
     
     # Main content
-    if not st.session_state.projects:
-        st.info("👋 Welcome! Create a new project or load the sample project.")
+    if not project_names:
+        st.info("👋 Welcome! Create a new project, load the sample project or import existing projects.")
         
         # Onboarding info
         with st.expander("🎯 Tool Tour: How the CIP Tool Works"):
-            st.markdown("""
-            **1. PDCA Cycle:** Work systematically through the four phases
-            - **Plan:** Define problem and plan actions
-            - **Do:** Implement and track actions
-            - **Check:** Review and evaluate results
-            - **Act:** Standardize and define next steps
-            
-            **2. Task Tracking:** Manage to-dos with responsibilities and deadlines
-            **3. Visualization:** Dashboards and progress tracking
-            **4. Teamwork:** Comments and collaboration
-            """)
+            st.markdown(load_asset('tour.md'))
+        show_bulk_import(store)
+        return
+    
+    if view == "🗂️ Portfolio":
+        profiling.lap('portfolio')
+        tracker.flush(force=True)
+        show_portfolio(store)
+        show_batch_reports(store)
+        show_bulk_export(store)
+        show_bulk_import(store)
         return
     
-    # Display current project
-    current_proj = st.session_state.projects[st.session_state.current_project]
+    # Display current project (only this one is loaded from the store)
+    profiling.lap('project')
+    project_id = st.session_state.current_project
+    current_proj = load_current_project(store, project_id)
+    if current_proj is None:
+        st.warning("This project was deleted by another user.")
+        st.session_state.current_project = None
+        return
+    current_proj = tracker.load_project(current_proj)
+    show_conflicts(tracker)
+    watch_changes(store, project_id, st.session_state.loaded_project['seq'])
     
     # Project header with progress
     col1, col2, col3 = st.columns([2, 1, 1])
     with col1:
         st.header(current_proj['name'])
         if st.session_state.user_role in ['Admin', 'Editor']:
-            new_name = st.text_input("Project Name:", current_proj['name'], key="proj_name")
-            if new_name != current_proj['name']:
-                current_proj['name'] = new_name
+            new_name, edited = edit_widget(st.text_input, "Project Name:", f"proj_name_{project_id}",
+                                           current_proj['name'])
+            tracker.stage(project_id, HEADER, {'name': new_name}, ['name'] if edited else [])
+            current_proj['name'] = new_name
     
     with col2:
         progress = calculate_progress(current_proj)
         st.metric("Progress", f"{progress:.0f}%")
     
     with col3:
-        status_options = ['draft', 'in_progress', 'completed', 'on_hold']
-        status_labels = {'draft': '📝 Draft', 'in_progress': '🔄 In Progress', 
-                        'completed': '✅ Completed', 'on_hold': '⏸️ On Hold'}
+        status_options = list(PROJECT_STATUS_LABELS)
         if st.session_state.user_role in ['Admin', 'Editor']:
-            new_status = st.selectbox("Status:", status_options, 
-                                    index=status_options.index(current_proj.get('status', 'draft')),
-                                    format_func=lambda x: status_labels[x])
+            new_status, edited = edit_widget(st.selectbox, "Status:", f"proj_status_{project_id}",
+                                             current_proj.get('status', 'draft'), options=status_options,
+                                             format_func=lambda x: PROJECT_STATUS_LABELS[x])
+            tracker.stage(project_id, HEADER, {'status': new_status}, ['status'] if edited else [])
             current_proj['status'] = new_status
     
-    # Tabs for PDCA phases
-    tab1, tab2, tab3, tab4, tab5 = st.tabs(["📋 Plan", "🔨 Do", "📊 Check", "🎯 Act", "📈 Dashboard"])
-    
-    with tab1:  # PLAN
-        st.markdown('<div class="phase-card plan-card"><h3>📋 Plan - Planning</h3></div>', unsafe_allow_html=True)
-        show_pdca_progress('plan')
-        
-        if st.session_state.user_role in ['Admin', 'Editor']:
-            # Problem definition
-            st.subheader("🎯 Problem Definition")
-            problem = st.text_area("What is the problem?", 
-                                 current_proj.get('plan', {}).get('problem', ''),
-                                 help="Describe the problem concretely and measurably")
-            
-            # Goal setting
-            st.subheader("🎯 Goal Setting")
-            goal = st.text_area("What is the goal?", 
-                              current_proj.get('plan', {}).get('goal', ''),
-                              help="SMART goals: Specific, Measurable, Achievable, Relevant, Time-bound")
-            
-            # Root cause analysis
-            st.subheader("🔍 Root Cause Analysis")
-            root_cause = st.text_area("What are the main causes?", 
-                                    current_proj.get('plan', {}).get('root_cause', ''),
-                                    help="Use 5-Why, Ishikawa diagram or other analysis methods")
-            
-            # Action planning
-            st.subheader("📝 Action Planning")
-            measures_text = st.text_area("Planned actions (one per line):", 
-                                       '\n'.join(current_proj.get('plan', {}).get('measures', [])))
-            measures = [m.strip() for m in measures_text.split('\n') if m.strip()]
-            
-            # Auto-save
-            if 'plan' not in current_proj:
-                current_proj['plan'] = {}
-            current_proj['plan'].update({
-                'problem': problem,
-                'goal': goal,
-                'root_cause': root_cause,
-                'measures': measures
-            })
-        else:
-            # Display only for readers
-            plan_data = current_proj.get('plan', {})
-            if plan_data.get('problem'):
-                st.write("**Problem:**", plan_data['problem'])
-            if plan_data.get('goal'):
-                st.write("**Goal:**", plan_data['goal'])
-            if plan_data.get('root_cause'):
-                st.write("**Root Causes:**", plan_data['root_cause'])
-            if plan_data.get('measures'):
-                st.write("**Actions:**")
-                for measure in plan_data['measures']:
-                    st.write(f"• {measure}")
-    
-    with tab2:  # DO
-        st.markdown('<div class="phase-card do-card"><h3>🔨 Do - Implementation</h3></div>', unsafe_allow_html=True)
-        show_pdca_progress('do')
-        
-        # Task management
-        st.subheader("📋 Task Tracking")
-        
-        if st.session_state.user_role in ['Admin', 'Editor']:
-            # Add new task
-            with st.expander("➕ Add New Task"):
-                col1, col2, col3 = st.columns(3)
-                with col1:
-                    new_task = st.text_input("Task:")
-                with col2:
-                    new_responsible = st.text_input("Responsible:")
-                with col3:
-                    new_date = st.date_input("Due Date:")
-                
-                if st.button("Add Task") and new_task:
-                    if 'do' not in current_proj:
-                        current_proj['do'] = {'implementation_steps': []}
-                    if 'implementation_steps' not in current_proj['do']:
-                        current_proj['do']['implementation_steps'] = []
-                    
-                    current_proj['do']['implementation_steps'].append({
-                        'task': new_task,
-                        'responsible': new_responsible,
-                        'due_date': new_date.strftime('%Y-%m-%d'),
-                        'status': 'open',
-                        'priority': 'medium'
-                    })
-                    st.rerun()
-        
-        # Display task list
-        tasks = current_proj.get('do', {}).get('implementation_steps', [])
-        if tasks:
-            for i, task in enumerate(tasks):
-                with st.container():
-                    col1, col2, col3, col4, col5 = st.columns([3, 2, 2, 1, 1])
-                    
-                    with col1:
-                        task_class = "task-completed" if task['status'] == 'completed' else ""
-                        st.markdown(f'<div class="{task_class}">{task["task"]}</div>', unsafe_allow_html=True)
-                    
-                    with col2:
-                        st.write(f"👤 {task['responsible']}")
-                    
-                    with col3:
-                        st.write(f"📅 {task['due_date']}")
-                    
-                    with col4:
-                        if st.session_state.user_role in ['Admin', 'Editor']:
-                            new_status = st.selectbox("", ['open', 'in_progress', 'completed'], 
-                                                    index=['open', 'in_progress', 'completed'].index(task['status']),
-                                                    key=f"status_{i}")
-                            task['status'] = new_status
-                    
-                    with col5:
-                        if st.session_state.user_role == 'Admin':
-                            if st.button("🗑️", key=f"delete_{i}"):
-                                tasks.pop(i)
-                                st.rerun()
-                    
-                    st.divider()
-        else:
-            st.info("No tasks defined yet.")
-    
-    with tab3:  # CHECK
-        st.markdown('<div class="phase-card check-card"><h3>📊 Check - Verification</h3></div>', unsafe_allow_html=True)
-        show_pdca_progress('check')
-        
-        if st.session_state.user_role in ['Admin', 'Editor']:
-            st.subheader("📈 Metrics & Results")
-            
-            # Enter metrics
-            col1, col2, col3 = st.columns(3)
-            with col1:
-                metric1 = st.number_input("Before Value:", 
-                                        value=current_proj.get('check', {}).get('metrics', {}).get('wait_time_before', 0.0))
-            with col2:
-                metric2 = st.number_input("After Value:", 
-                                        value=current_proj.get('check', {}).get('metrics', {}).get('wait_time_after', 0.0))
-            with col3:
-                if metric1 > 0:
-                    improvement = ((metric1 - metric2) / metric1) * 100
-                    st.metric("Improvement", f"{improvement:.1f}%")
-            
-            # Results assessment
-            results = st.text_area("Results Assessment:", 
-                                 current_proj.get('check', {}).get('results', ''))
-            
-            # Save
-            if 'check' not in current_proj:
-                current_proj['check'] = {}
-            current_proj['check'].update({
-                'metrics': {
-                    'wait_time_before': metric1,
-                    'wait_time_after': metric2,
-                    'improvement_percent': improvement if metric1 > 0 else 0
-                },
-                'results': results
-            })
-        else:
-            # Display only
-            check_data = current_proj.get('check', {})
-            if check_data.get('metrics'):
-                metrics = check_data['metrics']
-                col1, col2, col3 = st.columns(3)
-                with col1:
-                    st.metric("Before", metrics.get('wait_time_before', 0))
-                with col2:
-                    st.metric("After", metrics.get('wait_time_after', 0))
-                with col3:
-                    st.metric("Improvement", f"{metrics.get('improvement_percent', 0):.1f}%")
-            
-            if check_data.get('results'):
-                st.write("**Results:**", check_data['results'])
-    
-    with tab4:  # ACT
-        st.markdown('<div class="phase-card act-card"><h3>🎯 Act - Action</h3></div>', unsafe_allow_html=True)
-        show_pdca_progress('act')
-        
-        if st.session_state.user_role in ['Admin', 'Editor']:
-            st.subheader("📋 Standardization & Next Steps")
-            
-            # Standardization
-            standardization = st.text_area("Standardization:", 
-                                         current_proj.get('act', {}).get('standardization', ''),
-                                         help="How will improvements be permanently anchored?")
-            
-            # Lessons learned
-            lessons = st.text_area("Lessons Learned:", 
-                                 current_proj.get('act', {}).get('lessons_learned', ''),
-                                 help="What did you learn? What would you do differently?")
-            
-            # Next steps
-            next_steps = st.text_area("Next Steps:", 
-                                    current_proj.get('act', {}).get('next_steps', ''),
-                                    help="What follow-up actions are planned?")
-            
-            # Save
-            if 'act' not in current_proj:
-                current_proj['act'] = {}
-            current_proj['act'].update({
-                'standardization': standardization,
-                'lessons_learned': lessons,
-                'next_steps': next_steps
-            })
-        else:
-            # Display only
-            act_data = current_proj.get('act', {})
-            if act_data.get('standardization'):
-                st.write("**Standardization:**", act_data['standardization'])
-            if act_data.get('lessons_learned'):
-                st.write("**Lessons Learned:**", act_data['lessons_learned'])
-            if act_data.get('next_steps'):
-                st.write("**Next Steps:**", act_data['next_steps'])
-    
-    with tab5:  # DASHBOARD
-        st.header("📈 Project Dashboard")
-        
-        # KPIs
-        col1, col2, col3, col4 = st.columns(4)
-        
-        tasks = current_proj.get('do', {}).get('implementation_steps', [])
-        total_tasks = len(tasks)
-        completed_tasks = len([t for t in tasks if t['status'] == 'completed'])
-        in_progress_tasks = len([t for t in tasks if t['status'] == 'in_progress'])
-        overdue_tasks = len([t for t in tasks if t['status'] != 'completed' and 
-                           datetime.strptime(t['due_date'], '%Y-%m-%d') < datetime.now()])
-        
-        with col1:
-            st.metric("Total Tasks", total_tasks)
-        with col2:
-            st.metric("Completed", completed_tasks, f"{completed_tasks}/{total_tasks}")
-        with col3:
-            st.metric("In Progress", in_progress_tasks)
-        with col4:
-            st.metric("Overdue", overdue_tasks, delta=f"-{overdue_tasks}" if overdue_tasks > 0 else None)
-        
-        # Task status chart
-        if tasks:
-            status_counts = {}
-            for task in tasks:
-                status = task['status']
-                status_counts[status] = status_counts.get(status, 0) + 1
-            
-            fig = px.pie(
-                values=list(status_counts.values()),
-                names=list(status_counts.keys()),
-                title="Task Status Distribution",
-                color_discrete_map={
-                    'completed': '#4CAF50',
-                    'in_progress': '#FFA500',
-                    'open': '#FF4444'
-                }
-            )
-            st.plotly_chart(fig, use_container_width=True)
-        
-        # Timeline (if metrics available)
-        check_data = current_proj.get('check', {}).get('metrics', {})
-        if check_data:
-            fig = go.Figure()
-            fig.add_trace(go.Bar(
-                x=['Before', 'After'],
-                y=[check_data.get('wait_time_before', 0), check_data.get('wait_time_after', 0)],
-                marker_color=['#FF6B6B', '#4CAF50']
-            ))
-            fig.update_layout(title="Improvement Comparison", yaxis_title="Value")
-            st.plotly_chart(fig, use_container_width=True)
+    # PDCA phases and dashboard: only the selected section is built
+    section = st.radio("Section:", list(PDCA_SECTIONS), format_func=lambda x: PDCA_SECTIONS[x][0],
+                       horizontal=True, label_visibility='collapsed', key='pdca_section')
+    pdca_section(section, store, tracker, project_id)
     
     # Export functions
+    profiling.lap('actions')
     st.sidebar.markdown("---")
     st.sidebar.subheader("🔄 Actions")
     
     if st.sidebar.button("📥 Export Project"):
-        project_json = json.dumps(current_proj, indent=2, ensure_ascii=False, default=str)
+        tracker.flush(force=True)
+        with profiling.section('export'):
+            # Phase edits live in the tracker, so the saved project is the complete one
+            project_json = json.dumps(store.get_project(project_id), indent=2, ensure_ascii=False, default=str)
         st.sidebar.download_button(
             label="💾 Download JSON",
             data=project_json,
             file_name=f"cip_project_{current_proj['name'].replace(' ', '_')}.json",
             mime="application/json"
         )
+    show_project_report(tracker, project_id, current_proj['name'])
+    show_bulk_export(store)
+    show_bulk_import(store)
     
     if st.sidebar.button("🗑️ Delete Project") and st.session_state.user_role == 'Admin':
-        if len(st.session_state.projects) > 1:
-            del st.session_state.projects[st.session_state.current_project]
-            st.session_state.current_project = list(st.session_state.projects.keys())[0]
+        if len(project_names) > 1:
+            tracker.discard(project_id)
+            store.delete_project(project_id)
+            st.session_state.current_project = next(pid for pid in project_names if pid != project_id)
             st.rerun()
         else:
             st.sidebar.error("Cannot delete the last project.")
+    
+    # Commit boundary: write only the fields that changed during this rerun
+    profiling.lap('flush')
+    tracker.flush()
+    if tracker.conflicts:
+        # Show the warning together with the values that won
+        st.rerun()
+    if FLUSH_INTERVAL and tracker.pending:
+        flush_pending(store, tracker)
+    if st.session_state.user_role == 'Admin':
+        st.sidebar.caption(f"💾 {tracker.writes_saved} writes saved this session")
+        if is_loaded('cip.charts'):
+            figure_stats = get_figure_cache().stats()
+            st.sidebar.caption(f"📊 Chart cache: {figure_stats['hits']} hits / {figure_stats['misses']} misses")
+        if scheduler is not None and scheduler.last_report is not None:
+            report = scheduler.last_report
+            st.sidebar.caption(f"🔔 Reminders {scheduler.last_run:%H:%M}: {report.get('digests', 0)} digests"
+                               + (f", {len(report['errors'])} failed" if report['errors'] else ""))
 
 if __name__ == "__main__":
-    main()
+    run()
@@ -0,0 +1 @@
+"""Core building blocks of the Digital CIP Tool that do not depend on the UI."""
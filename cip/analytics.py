@@ -0,0 +1,102 @@
+"""Task analytics on typed DataFrames.
+
+Tasks are converted once into a frame with parsed dates and categorical
+statuses; every KPI and aggregate is then computed with vectorized pandas /
+NumPy operations instead of Python loops over task dicts.
+"""
+from datetime import date, datetime
+from typing import Any, Dict, Iterable, Optional, Union
+
+import numpy as np
+import pandas as pd
+
+from cip.projects import TASK_PRIORITIES, TASK_STATUSES
+from cip.store import TASK_COLUMNS, TASK_TIMESTAMPS, ProjectStore
+
+STATUSES = list(TASK_STATUSES)
+PRIORITIES = list(TASK_PRIORITIES)
+COMPLETED = STATUSES.index('completed')
+
+FRAME_COLUMNS = ['project_id', 'id', *TASK_COLUMNS, *TASK_TIMESTAMPS]
+
+
+def _reference(today: Union[date, datetime, None]) -> pd.Timestamp:
+    # Without an explicit day, "overdue" means the due date has started before now
+    return pd.Timestamp(today) if today is not None else pd.Timestamp.now()
+
+
+def tasks_frame(tasks: Iterable[Any], columns=FRAME_COLUMNS) -> pd.DataFrame:
+    """Build a typed frame from task dicts or from ``ProjectStore.task_rows()`` tuples."""
+    tasks = list(tasks)
+    if tasks and isinstance(tasks[0], dict):
+        df = pd.DataFrame.from_records(tasks).reindex(columns=columns)
+    else:
+        df = pd.DataFrame.from_records(tasks, columns=columns)
+    df['due_date'] = pd.to_datetime(df['due_date'], format='%Y-%m-%d', errors='coerce')
+    df['status'] = pd.Categorical(df['status'], categories=STATUSES)
+    df['priority'] = pd.Categorical(df['priority'].fillna('medium'), categories=PRIORITIES)
+    df['responsible'] = df['responsible'].fillna('')
+    for column in TASK_TIMESTAMPS:
+        # Stored as UTC text; kept as naive UTC timestamps for easy comparison
+        df[column] = pd.to_datetime(df[column], utc=True, format='ISO8601').dt.tz_localize(None)
+    return df
+
+
+def load_tasks_frame(store: ProjectStore, project_id: Optional[str] = None) -> pd.DataFrame:
+    """Tasks of one project, or of the whole portfolio when ``project_id`` is None."""
+    return tasks_frame(store.task_rows(project_id))
+
+
+def overdue_mask(df: pd.DataFrame, today=None) -> np.ndarray:
+    codes = df['status'].cat.codes.to_numpy()
+    # NaT due dates compare False, so tasks without a date are never overdue
+    return (codes != COMPLETED) & (df['due_date'] < _reference(today)).to_numpy()
+
+
+def task_kpis(df: pd.DataFrame, today=None) -> Dict[str, Any]:
+    """Total / completed / in-progress / overdue counts and the status mix in one pass."""
+    codes = df['status'].cat.codes.to_numpy()
+    counts = np.bincount(codes[codes >= 0], minlength=len(STATUSES))
+    return {
+        'total': len(df),
+        'open': int(counts[0]),
+        'in_progress': int(counts[1]),
+        'completed': int(counts[2]),
+        'overdue': int(overdue_mask(df, today).sum()),
+        'status_counts': {status: int(count) for status, count in zip(STATUSES, counts) if count},
+    }
+
+
+def overdue_by_responsible(df: pd.DataFrame, today=None) -> pd.Series:
+    """Number of overdue tasks per responsible person, largest first."""
+    overdue = df.loc[overdue_mask(df, today), 'responsible']
+    return overdue.value_counts().rename('overdue')
+
+
+def burndown(df: pd.DataFrame, freq: str = 'D', today=None) -> pd.DataFrame:
+    """Tasks created, completed and still remaining per period up to ``today``."""
+    end = _reference(today).normalize()
+    if df.empty:
+        return pd.DataFrame(columns=['created', 'completed', 'remaining'])
+    # Tasks from before created_at was tracked count as existing from the start
+    start = df['created_at'].min()
+    if pd.isna(start):
+        start = df['completed_at'].min() if df['completed_at'].notna().any() else end
+    created = df['created_at'].fillna(start).dt.floor('D')
+    periods = pd.date_range(start.floor('D'), max(end, created.max()), freq='D')
+    created_counts = created.value_counts().reindex(periods, fill_value=0)
+    completed_counts = df['completed_at'].dropna().dt.floor('D').value_counts().reindex(periods, fill_value=0)
+    result = pd.DataFrame({'created': created_counts, 'completed': completed_counts})
+    if freq != 'D':
+        result = result.resample(freq).sum()
+    result['remaining'] = result['created'].cumsum() - result['completed'].cumsum()
+    return result
+
+
+def due_date_histogram(df: pd.DataFrame, freq: str = 'W') -> pd.DataFrame:
+    """Task counts per due-date bucket (``freq``), one column per status."""
+    dated = df.dropna(subset=['due_date'])
+    histogram = (dated.groupby([pd.Grouper(key='due_date', freq=freq), 'status'], observed=False)
+                 .size().unstack('status', fill_value=0))
+    histogram.columns = histogram.columns.astype(str)
+    return histogram
@@ -0,0 +1,313 @@
+"""Headless HTTP API over the CIP store, for MES/ERP integrations.
+
+An ASGI app (FastAPI) on the same store and project logic as the Streamlit
+UI: progress comes from ``calculate_progress``, Check metrics from
+``check_metrics``, task status changes go through the store so
+``completed_at`` is kept the same way, and every write refreshes the
+project summary and search index as usual.
+
+Handlers are plain functions that FastAPI runs on its worker threads. The
+SQLite store keeps one connection per thread, so the worker pool is the
+connection pool; its size is set with ``pool_size`` / ``CIP_API_POOL_SIZE``.
+GETs carry an ``ETag`` derived from the project's ``updated_at`` (or the store
+revision for lists) and answer ``304 Not Modified`` to a matching
+``If-None-Match`` without loading the project.
+
+Tasks carry a ``version``; a PATCH or DELETE with ``If-Match: <version>`` only
+applies if the task is still at that version and answers ``412 Precondition
+Failed`` otherwise, so integrations do not overwrite edits made in the UI.
+
+Usage::
+
+    python -m cip.api --port 8000
+    uvicorn --factory cip.api:create_app
+
+In-process, e.g. in tests::
+
+    from fastapi.testclient import TestClient
+    client = TestClient(create_app(open_store(':memory:')))
+    project_id = client.post('/projects', json={'name': 'Scrap reduction'}).json()['id']
+"""
+import argparse
+import hashlib
+import os
+import sqlite3
+import sys
+from contextlib import asynccontextmanager
+from typing import Any, Callable, Dict, List, Optional
+
+import anyio.to_thread
+from fastapi import Body, FastAPI, HTTPException, Query, Request, Response
+from fastapi.responses import JSONResponse
+
+from cip import spc, timeseries
+from cip.importer import validate_project, validate_task
+from cip.projects import calculate_progress, check_metrics, new_project, summarize_project
+from cip.store import PHASES, SUMMARY_COLUMNS, TASK_COLUMNS, TASK_SORT_COLUMNS, ProjectStore, open_store
+
+DEFAULT_POOL_SIZE = 16
+MAX_BATCH_SIZE = 1000
+HEADER_FIELDS = ('name', 'description', 'created_date', 'status')
+
+
+def make_etag(*parts: Any) -> str:
+    return '"' + hashlib.blake2b(repr(parts).encode('utf-8'), digest_size=12).hexdigest() + '"'
+
+
+def conditional(request: Request, etag: str, build: Callable[[], Any]) -> Response:
+    """304 when the client already has ``etag``, otherwise the JSON built by ``build``."""
+    tags = {tag.strip().removeprefix('W/') for tag in request.headers.get('if-none-match', '').split(',')}
+    if etag in tags or '*' in tags:
+        return Response(status_code=304, headers={'ETag': etag})
+    return JSONResponse(build(), headers={'ETag': etag})
+
+
+def if_match_version(request: Request) -> Optional[int]:
+    """Record version from an ``If-Match`` header (None without one)."""
+    value = request.headers.get('if-match', '').strip().removeprefix('W/').strip('"')
+    if not value:
+        return None
+    if not value.isdigit():
+        raise HTTPException(400, "If-Match must be a record version")
+    return int(value)
+
+
+def create_app(store: Optional[ProjectStore] = None, pool_size: Optional[int] = None) -> FastAPI:
+    """API app on ``store`` (default: ``open_store()``, i.e. ``CIP_STORE_URL``)."""
+    store = store or open_store()
+    pool_size = pool_size or int(os.environ.get('CIP_API_POOL_SIZE', DEFAULT_POOL_SIZE))
+
+    @asynccontextmanager
+    async def lifespan(app):
+        # Caps the worker threads and with them the number of open store connections
+        anyio.to_thread.current_default_thread_limiter().total_tokens = pool_size
+        yield
+
+    app = FastAPI(title="Digital CIP Tool API", lifespan=lifespan)
+    app.state.store = store
+
+    def header_or_404(project_id: str) -> Dict[str, Any]:
+        header = store.get_project(project_id, ())
+        if header is None:
+            raise HTTPException(404, f"Project {project_id} not found")
+        return header
+
+    def check_valid(errors: List[str]) -> None:
+        if errors:
+            raise HTTPException(422, errors)
+
+    @app.exception_handler(sqlite3.IntegrityError)
+    async def integrity_error(request, exc):
+        # e.g. a task id that already belongs to another project
+        return JSONResponse({'detail': str(exc)}, status_code=409)
+
+    @app.get('/health')
+    def health():
+        return {'status': 'ok', 'projects': store.count_projects()}
+
+    # Projects
+    @app.get('/projects')
+    def list_projects(request: Request, status: Optional[List[str]] = Query(None),
+                      created_from: Optional[str] = None, created_to: Optional[str] = None):
+        etag = make_etag(store.revision(), status, created_from, created_to)
+        return conditional(request, etag, lambda: [
+            dict(zip(SUMMARY_COLUMNS, row))
+            for row in store.project_summaries(status, created_from, created_to)])
+
+    @app.post('/projects', status_code=201)
+    def create_project(project: Dict[str, Any] = Body(...)):
+        project = {**new_project(project.get('name', '')), **project}
+        check_valid(validate_project(project))
+        if store.existing_project_ids([project['id']]):
+            raise HTTPException(409, f"Project {project['id']} already exists")
+        project_id = store.save_project(project)
+        return {'id': project_id, 'progress': calculate_progress(project)}
+
+    @app.get('/projects/{project_id}')
+    def get_project(request: Request, project_id: str):
+        header = header_or_404(project_id)
+        return conditional(request, make_etag(project_id, header['updated_at']),
+                           lambda: store.get_project(project_id))
+
+    @app.patch('/projects/{project_id}')
+    def update_project(project_id: str, fields: Dict[str, Any] = Body(...)):
+        header = header_or_404(project_id)
+        unknown = set(fields) - set(HEADER_FIELDS)
+        if unknown:
+            raise HTTPException(422, [f"{name}: not a project field" for name in sorted(unknown)])
+        check_valid(validate_project({**header, **fields}))
+        store.update_project(project_id, **fields)
+        return header_or_404(project_id)
+
+    @app.delete('/projects/{project_id}', status_code=204)
+    def delete_project(project_id: str):
+        header_or_404(project_id)
+        store.delete_project(project_id)
+        return Response(status_code=204)
+
+    @app.put('/projects/{project_id}/phases/{phase}')
+    def update_phase(project_id: str, phase: str, fields: Dict[str, Any] = Body(...)):
+        header = header_or_404(project_id)
+        if phase not in PHASES:
+            raise HTTPException(404, f"Unknown phase: {phase}")
+        check_valid(validate_project({**header, phase: fields}))
+        store.update_phase(project_id, phase, fields)
+        return store.get_phase(project_id, phase)
+
+    @app.get('/projects/{project_id}/progress')
+    def get_progress(request: Request, project_id: str):
+        header = header_or_404(project_id)
+        return conditional(request, make_etag(project_id, header['updated_at'], 'progress'),
+                           lambda: summarize_project(store.get_project(project_id)))
+
+    @app.post('/projects/{project_id}/metrics')
+    def push_metrics(project_id: str, before: Optional[float] = Body(None), after: Optional[float] = Body(None),
+                     metrics: Optional[Dict[str, float]] = Body(None), results: Optional[str] = Body(None)):
+        """Merge named metrics; a before/after pair also updates the improvement."""
+        header = header_or_404(project_id)
+        merged = dict(store.get_phase(project_id, 'check').get('metrics') or {})
+        merged.update(metrics or {})
+        if before is not None and after is not None:
+            merged.update(check_metrics(before, after))
+        elif before is not None or after is not None:
+            raise HTTPException(422, ["before and after must be given together"])
+        fields = {'metrics': merged}
+        if results is not None:
+            fields['results'] = results
+        check_valid(validate_project({**header, 'check': fields}))
+        store.update_phase(project_id, 'check', fields)
+        return {'metrics': merged, 'progress': summarize_project(store.get_project(project_id))['progress']}
+
+    # Check-phase time series
+    @app.get('/projects/{project_id}/series')
+    def list_series(project_id: str):
+        header_or_404(project_id)
+        return [dict(zip(('metric', 'points', 'first_ts', 'last_ts', 'updated_at'), row))
+                for row in store.metric_series(project_id)]
+
+    @app.post('/projects/{project_id}/series')
+    def ingest_series(project_id: str, series: Dict[str, Dict[str, List[Any]]] = Body(..., embed=True)):
+        """Bulk ingest ``{metric: {"timestamps": [...], "values": [...]}}`` in one transaction."""
+        header_or_404(project_id)
+        try:
+            written = timeseries.ingest(store, project_id, {
+                metric: (points.get('timestamps', []), points.get('values', []))
+                for metric, points in series.items()})
+        except (TypeError, ValueError) as exc:
+            raise HTTPException(422, [str(exc)])
+        return {'points': written}
+
+    @app.get('/projects/{project_id}/series/{metric}')
+    def get_series(request: Request, project_id: str, metric: str, start: Optional[str] = None,
+                   end: Optional[str] = None, change_at: Optional[str] = None, lower_is_better: bool = True,
+                   max_points: int = Query(timeseries.DEFAULT_MAX_POINTS, ge=10, le=20_000)):
+        """Downsampled buckets, and the before/after improvement when ``change_at`` is given."""
+        header_or_404(project_id)
+        updated_at = max((row[4] for row in store.metric_series(project_id) if row[0] == metric), default=None)
+        if updated_at is None:
+            raise HTTPException(404, f"No series {metric}")
+
+        def build():
+            ts, values = timeseries.load_series(store, project_id, metric, start, end)
+            frame = timeseries.downsample(ts, values, max_points)
+            frame['time'] = frame['time'].dt.strftime('%Y-%m-%dT%H:%M:%S.%fZ')
+            result = {'metric': metric, 'points': len(ts), 'buckets': frame.to_dict(orient='list')}
+            if change_at:
+                result['improvement'] = timeseries.improvement(ts, values, change_at,
+                                                               lower_is_better=lower_is_better)
+            return result
+        etag = make_etag(project_id, metric, updated_at, start, end, change_at, lower_is_better, max_points)
+        return conditional(request, etag, build)
+
+    @app.get('/projects/{project_id}/series/{metric}/spc')
+    def get_series_spc(project_id: str, metric: str, change_at: str, subgroup_size: int = Query(1, ge=1, le=10)):
+        """Control limits before ``change_at``, rule violations after it and Welch's t-test."""
+        header_or_404(project_id)
+        ts, values = timeseries.load_series(store, project_id, metric)
+        try:
+            result = spc.compare_phases(ts, values, change_at, subgroup_size)
+        except ValueError as exc:
+            raise HTTPException(422, [str(exc)])
+        return {**result, 'limits': result['limits'].to_dict()}
+
+    # Tasks
+    @app.get('/projects/{project_id}/tasks')
+    def list_tasks(request: Request, project_id: str, status: Optional[List[str]] = Query(None),
+                   responsible: Optional[str] = None, due_from: Optional[str] = None,
+                   due_to: Optional[str] = None, sort_by: str = 'position', descending: bool = False,
+                   limit: int = Query(50, ge=1, le=500), offset: int = Query(0, ge=0)):
+        header = header_or_404(project_id)
+        if sort_by not in TASK_SORT_COLUMNS:
+            raise HTTPException(422, [f"sort_by: must be one of {', '.join(TASK_SORT_COLUMNS)}"])
+        params = (status, responsible, due_from, due_to, sort_by, descending, limit, offset)
+        etag = make_etag(project_id, header['updated_at'], *params)
+
+        def build():
+            tasks, total = store.query_tasks(project_id, *params)
+            return {'tasks': tasks, 'total': total}
+        return conditional(request, etag, build)
+
+    @app.post('/projects/{project_id}/tasks', status_code=201)
+    def add_task(project_id: str, task: Dict[str, Any] = Body(...)):
+        header_or_404(project_id)
+        check_valid(validate_task(task, 'task'))
+        return store.get_task(project_id, store.add_task(project_id, task))
+
+    @app.post('/projects/{project_id}/tasks/batch')
+    def upsert_tasks(project_id: str, tasks: List[Dict[str, Any]] = Body(..., embed=True)):
+        """Update the tasks whose id exists in the project and add the others, in one transaction."""
+        header_or_404(project_id)
+        if len(tasks) > MAX_BATCH_SIZE:
+            raise HTTPException(413, f"At most {MAX_BATCH_SIZE} tasks per batch")
+        existing = {row[1] for row in store.task_rows(project_id)}
+        errors = []
+        for index, task in enumerate(tasks):
+            errors += validate_task(task, f"tasks[{index}]", partial=task.get('id') in existing)
+        check_valid(errors)
+        ids = store.upsert_tasks(project_id, tasks)
+        return {'ids': ids, 'created': sum(task_id not in existing for task_id in ids),
+                'updated': sum(task_id in existing for task_id in ids)}
+
+    @app.patch('/projects/{project_id}/tasks/{task_id}')
+    def update_task(request: Request, project_id: str, task_id: str, fields: Dict[str, Any] = Body(...)):
+        """Change task fields; a status change also sets or clears ``completed_at``."""
+        header_or_404(project_id)
+        if store.get_task(project_id, task_id) is None:
+            raise HTTPException(404, f"Task {task_id} not found")
+        unknown = set(fields) - set(TASK_COLUMNS)
+        errors = [f"{name}: not a task field" for name in sorted(unknown)]
+        check_valid(errors + validate_task(fields, 'task', partial=True))
+        version = if_match_version(request)
+        if store.update_tasks(project_id, {task_id: fields}, None if version is None else {task_id: version}):
+            raise HTTPException(412, f"Task {task_id} was changed since version {version}")
+        return store.get_task(project_id, task_id)
+
+    @app.delete('/projects/{project_id}/tasks/{task_id}', status_code=204)
+    def delete_task(request: Request, project_id: str, task_id: str):
+        header_or_404(project_id)
+        if store.get_task(project_id, task_id) is None:
+            raise HTTPException(404, f"Task {task_id} not found")
+        version = if_match_version(request)
+        if store.delete_tasks(project_id, [task_id], None if version is None else {task_id: version}):
+            raise HTTPException(412, f"Task {task_id} was changed since version {version}")
+        return Response(status_code=204)
+
+    return app
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(prog='python -m cip.api', description="Serve the CIP HTTP API.")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8000)
+    parser.add_argument('--pool-size', type=int, help=f"worker threads / store connections "
+                                                      f"(default: CIP_API_POOL_SIZE or {DEFAULT_POOL_SIZE})")
+    parser.add_argument('--store', help="store URL (default: CIP_STORE_URL or cip_projects.db)")
+    args = parser.parse_args(argv)
+
+    import uvicorn
+    uvicorn.run(create_app(open_store(args.store), args.pool_size), host=args.host, port=args.port)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,265 @@
+"""Reproducible benchmarks of the core operations on a synthetic portfolio.
+
+``generate_portfolio`` builds N projects with M tasks each from a seed, so
+every run measures the same data. The benchmarks run headlessly against a
+fresh SQLite store in a temporary directory: store writes and reads,
+progress calculation, dashboard and portfolio KPIs, export, import, search
+and the KPI time series. Results are written as JSON together with the
+configuration and environment, and can be compared with an earlier result
+file to catch regressions.
+
+Usage::
+
+    python -m cip.benchmark --projects 1000 --tasks 20 -o results.json
+    python -m cip.benchmark -o new.json --compare results.json --threshold 1.25
+"""
+import argparse
+import io
+import json
+import os
+import platform
+import random
+import statistics
+import sys
+import tempfile
+import time
+import uuid
+from datetime import date, datetime, timedelta, timezone
+from typing import Any, Callable, Dict, Iterator, List, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+from cip import analytics, export, importer, portfolio, search, spc, timeseries
+from cip.projects import PROJECT_STATUSES, TASK_PRIORITIES, TASK_STATUSES, calculate_progress
+from cip.store import ProjectStore, open_store
+
+WORDS = ('changeover', 'setup', 'wait', 'time', 'scrap', 'rework', 'machine', 'capacity', 'training',
+         'bottleneck', 'inventory', 'delivery', 'quality', 'maintenance', 'layout', 'kanban', 'audit')
+PEOPLE = tuple(f'{first} {last}' for first in ('Anna', 'John', 'Tom', 'Maria', 'Li', 'Omar', 'Eva')
+               for last in ('Smith', 'Johnson', 'Wilson', 'Garcia', 'Chen', 'Novak'))
+SEARCH_QUERIES = ('changeover', 'chang*', '"wait time"', 'cause:capacity', 'scrap OR rework')
+# Reads and single-project operations are timed on this many projects
+SAMPLE_PROJECTS = 100
+START_DATE = date(2024, 1, 1)
+
+
+def _text(rng: random.Random, words: int) -> str:
+    return ' '.join(rng.choice(WORDS) for _ in range(words)).capitalize()
+
+
+def generate_project(rng: random.Random, index: int, tasks: int) -> Dict[str, Any]:
+    """One project in the export format; all values come from ``rng``."""
+    created = START_DATE + timedelta(days=rng.randrange(365))
+    before = round(rng.uniform(20, 100), 1)
+    after = round(before * rng.uniform(0.5, 1.05), 1)
+    return {
+        'id': str(uuid.UUID(int=rng.getrandbits(128), version=4)),
+        'name': f'Project {index}: {_text(rng, 3)}',
+        'description': _text(rng, 12),
+        'created_date': created.isoformat(),
+        'status': rng.choice(PROJECT_STATUSES),
+        'plan': {'problem': _text(rng, 20), 'goal': _text(rng, 10), 'root_cause': _text(rng, 15),
+                 'measures': [_text(rng, 4) for _ in range(rng.randint(1, 5))]},
+        'do': {'implementation_steps': [
+            {'task': _text(rng, 5), 'responsible': rng.choice(PEOPLE),
+             'due_date': (created + timedelta(days=rng.randrange(180))).isoformat(),
+             'status': rng.choice(TASK_STATUSES), 'priority': rng.choice(TASK_PRIORITIES)}
+            for _ in range(tasks)]},
+        'check': {'metrics': {'wait_time_before': before, 'wait_time_after': after,
+                              'improvement_percent': (before - after) / before * 100},
+                  'results': _text(rng, 10) if rng.random() < 0.6 else ''},
+        'act': {'standardization': _text(rng, 8) if rng.random() < 0.4 else '',
+                'lessons_learned': _text(rng, 8), 'next_steps': _text(rng, 6)},
+    }
+
+
+def generate_portfolio(projects: int, tasks: int, seed: int = 0) -> List[Dict[str, Any]]:
+    """``projects`` projects with ``tasks`` tasks each, identical for the same seed."""
+    rng = random.Random(seed)
+    return [generate_project(rng, index, tasks) for index in range(1, projects + 1)]
+
+
+def generate_series(points: int, seed: int = 0, step: str = '1min') -> Tuple[np.ndarray, np.ndarray]:
+    """A noisy KPI that drops by 20% halfway, as millisecond timestamps and values."""
+    rng = np.random.default_rng(seed)
+    ts = timeseries.to_millis(pd.date_range(START_DATE, periods=points, freq=step))
+    values = rng.normal(45.0, 3.0, points)
+    values[points // 2:] *= 0.8
+    return ts, values
+
+
+def _measure(run: Callable[[Any], Any], repeat: int, setup: Optional[Callable[[], Any]] = None) -> List[float]:
+    # Setup is not timed, so each run can start from a fresh store or series
+    timings = []
+    for _ in range(repeat):
+        arg = setup() if setup else None
+        started = time.perf_counter()
+        run(arg)
+        timings.append(time.perf_counter() - started)
+    return timings
+
+
+class Suite:
+    """A store loaded with a synthetic portfolio and the benchmarks that run on it."""
+
+    def __init__(self, directory: str, projects: int, tasks: int, points: int, seed: int = 0):
+        self.directory = directory
+        self._stores = 0
+        self.points = points
+        self.seed = seed
+        self.portfolio = generate_portfolio(projects, tasks, seed)
+        self.store = self.fresh_store()
+        self.store.save_projects(self.portfolio)
+        sample = random.Random(seed).sample(self.portfolio, min(SAMPLE_PROJECTS, len(self.portfolio)))
+        self.sample_ids = [project['id'] for project in sample]
+        self.jsonl = ''.join(json.dumps(project, ensure_ascii=False) + '\n' for project in self.portfolio)
+        self.series = generate_series(points, seed)
+        self.series_project = self.portfolio[0]['id']
+
+    def fresh_store(self) -> ProjectStore:
+        self._stores += 1
+        return open_store(os.path.join(self.directory, f'bench-{self._stores}.db'))
+
+    def benchmarks(self) -> Dict[str, Tuple[Callable[[Any], Any], Optional[Callable[[], Any]]]]:
+        """Name -> (timed function, untimed setup whose result it receives)."""
+        store = self.store
+        ts, values = self.series
+
+        def ingest_setup():
+            store.delete_metric_series(self.series_project, 'wait_time')
+
+        def series_setup():
+            if not store.metric_series(self.series_project):
+                timeseries.ingest(store, self.series_project, {'wait_time': self.series})
+
+        def spc_run(_):
+            loaded_ts, loaded = timeseries.load_series(store, self.series_project, 'wait_time')
+            spc.compare_phases(loaded_ts, loaded, pd.Timestamp(int(loaded_ts[len(loaded_ts) // 2]), unit='ms'))
+
+        benchmarks = {
+            'store_write': (lambda fresh: fresh.save_projects(self.portfolio), self.fresh_store),
+            'store_read': (lambda _: [store.get_project(pid) for pid in self.sample_ids], None),
+            'store_update': (lambda _: [store.update_phase(pid, 'check', {'results': f'Run {i}'})
+                                        for i, pid in enumerate(self.sample_ids)], None),
+            'progress': (lambda _: [calculate_progress(project) for project in self.portfolio], None),
+            'dashboard_kpis': (lambda _: [analytics.task_kpis(analytics.load_tasks_frame(store, pid))
+                                          for pid in self.sample_ids], None),
+            'portfolio_kpis': (lambda _: portfolio.portfolio_kpis(portfolio.load_portfolio(store)), None),
+            'portfolio_analytics': (lambda _: analytics.burndown(analytics.load_tasks_frame(store)), None),
+            'export_jsonl': (lambda _: export.write_export(store, io.StringIO(), 'jsonl'), None),
+            'export_csv_tasks': (lambda _: export.write_export(store, io.StringIO(), 'csv', 'tasks'), None),
+            'import_jsonl': (lambda fresh: importer.import_projects(
+                fresh, importer.read_records(io.StringIO(self.jsonl), 'jsonl')), self.fresh_store),
+        }
+        if getattr(store, 'has_search', False):
+            benchmarks['search'] = (lambda _: [search.search_projects(store, query) for query in SEARCH_QUERIES],
+                                    None)
+        if self.points:
+            benchmarks.update({
+                'series_ingest': (lambda _: timeseries.ingest(store, self.series_project, {'wait_time': (ts, values)}),
+                                  ingest_setup),
+                'series_load': (lambda _: timeseries.downsample(
+                    *timeseries.load_series(store, self.series_project, 'wait_time')), series_setup),
+                'spc': (spc_run, series_setup),
+            })
+        return benchmarks
+
+
+def environment() -> Dict[str, Any]:
+    import sqlite3
+    return {'python': platform.python_version(), 'implementation': platform.python_implementation(),
+            'platform': platform.platform(), 'machine': platform.machine(), 'cpus': os.cpu_count(),
+            'sqlite': sqlite3.sqlite_version, 'numpy': np.__version__, 'pandas': pd.__version__}
+
+
+def run_benchmarks(projects: int = 1000, tasks: int = 20, points: int = 100_000, repeat: int = 5,
+                   seed: int = 0, names: Optional[Sequence[str]] = None,
+                   directory: Optional[str] = None) -> Dict[str, Any]:
+    """Run the selected benchmarks (all by default) and return the result document."""
+    with tempfile.TemporaryDirectory(prefix='cip-bench-', dir=directory) as tmp:
+        started = time.perf_counter()
+        suite = Suite(tmp, projects, tasks, points, seed)
+        generate_seconds = time.perf_counter() - started
+        benchmarks = suite.benchmarks()
+        unknown = set(names or ()) - set(benchmarks)
+        if unknown:
+            raise ValueError(f"Unknown benchmarks: {', '.join(sorted(unknown))}")
+        results = {}
+        for name, (run, setup) in benchmarks.items():
+            if names and name not in names:
+                continue
+            timings = _measure(run, repeat, setup)
+            results[name] = {'min': min(timings), 'median': statistics.median(timings),
+                             'mean': statistics.fmean(timings), 'max': max(timings), 'runs': timings}
+    return {
+        'created_at': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+        'config': {'projects': projects, 'tasks': tasks, 'points': points, 'repeat': repeat, 'seed': seed},
+        'environment': environment(),
+        'setup_seconds': generate_seconds,
+        'results': results,
+    }
+
+
+def compare(current: Dict[str, Any], baseline: Dict[str, Any], threshold: float = 1.25) -> List[Dict[str, Any]]:
+    """Benchmarks of both documents with the ratio of their medians; ``regressed`` above ``threshold``."""
+    rows = []
+    for name, result in current['results'].items():
+        previous = baseline.get('results', {}).get(name)
+        if previous is None or not previous['median']:
+            continue
+        ratio = result['median'] / previous['median']
+        rows.append({'name': name, 'baseline': previous['median'], 'current': result['median'],
+                     'ratio': ratio, 'regressed': ratio > threshold})
+    return rows
+
+
+def iter_report(document: Dict[str, Any], comparison: Optional[List[Dict[str, Any]]] = None) -> Iterator[str]:
+    config = document['config']
+    yield (f"{config['projects']} projects x {config['tasks']} tasks, {config['points']:,} series points, "
+           f"median of {config['repeat']}")
+    ratios = {row['name']: row for row in comparison or ()}
+    for name, result in document['results'].items():
+        line = f"{name:<22}{1000 * result['median']:>10.1f} ms median{1000 * result['min']:>10.1f} ms min"
+        if name in ratios:
+            row = ratios[name]
+            line += f"  x{row['ratio']:.2f}" + ('  REGRESSION' if row['regressed'] else '')
+        yield line
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(prog='python -m cip.benchmark',
+                                     description="Benchmark the core operations on a synthetic portfolio.")
+    parser.add_argument('--projects', type=int, default=1000)
+    parser.add_argument('--tasks', type=int, default=20, help="tasks per project")
+    parser.add_argument('--points', type=int, default=100_000, help="KPI series points (0 to skip the series)")
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--only', action='append', help="run only this benchmark (repeatable)")
+    parser.add_argument('--dir', help="directory for the temporary stores (default: system temp)")
+    parser.add_argument('-o', '--output', help="write the results as JSON")
+    parser.add_argument('--compare', help="earlier results JSON to compare medians with")
+    parser.add_argument('--threshold', type=float, default=1.25,
+                        help="median ratio above which a benchmark counts as regressed")
+    args = parser.parse_args(argv)
+
+    try:
+        document = run_benchmarks(args.projects, args.tasks, args.points, args.repeat, args.seed,
+                                  args.only, args.dir)
+    except ValueError as exc:
+        parser.error(str(exc))
+    comparison = None
+    if args.compare:
+        with open(args.compare, encoding='utf-8') as fh:
+            comparison = compare(document, json.load(fh), args.threshold)
+    for line in iter_report(document, comparison):
+        print(line, file=sys.stderr)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as out:
+            json.dump(document, out, indent=2)
+            out.write('\n')
+    return 1 if comparison and any(row['regressed'] for row in comparison) else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,121 @@
+"""Plotly figure builders with a content-addressed figure cache.
+
+Figures are rebuilt only when the data they show changes; any rerun with the
+same inputs reuses the cached figure. Cached figures are shared between
+sessions and must be treated as read-only.
+"""
+import hashlib
+import json
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, Tuple
+
+import plotly.express as px
+import plotly.graph_objects as go
+
+from cip import profiling
+
+STATUS_COLORS = {
+    'completed': '#4CAF50',
+    'in_progress': '#FFA500',
+    'open': '#FF4444'
+}
+
+
+def content_hash(inputs: Any) -> str:
+    """Stable hash of JSON-like chart inputs (dict key order does not matter)."""
+    payload = json.dumps(inputs, sort_keys=True, default=str, separators=(',', ':'))
+    return hashlib.blake2b(payload.encode('utf-8'), digest_size=16).hexdigest()
+
+
+class FigureCache:
+    """Thread-safe LRU of built figures with hit/miss counters."""
+
+    def __init__(self, maxsize: int = 256):
+        self.maxsize = maxsize
+        self._figures: 'OrderedDict[Tuple[Hashable, str], go.Figure]' = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, kind: Hashable, inputs: Any, build: Callable[[], go.Figure]) -> go.Figure:
+        key = (kind, content_hash(inputs))
+        with self._lock:
+            figure = self._figures.get(key)
+            if figure is not None:
+                self._figures.move_to_end(key)
+                self.hits += 1
+                return figure
+            self.misses += 1
+        # Build outside the lock; two sessions racing on the same key just build twice
+        with profiling.section('chart_build'):
+            figure = build()
+        with self._lock:
+            self._figures[key] = figure
+            self._figures.move_to_end(key)
+            while len(self._figures) > self.maxsize:
+                self._figures.popitem(last=False)
+        return figure
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {'hits': self.hits, 'misses': self.misses, 'size': len(self._figures),
+                'maxsize': self.maxsize, 'hit_rate': self.hits / lookups if lookups else 0.0}
+
+    def clear(self) -> None:
+        with self._lock:
+            self._figures.clear()
+            self.hits = self.misses = 0
+
+
+def build_status_pie(status_counts: Dict[str, int]) -> go.Figure:
+    return px.pie(
+        values=list(status_counts.values()),
+        names=list(status_counts.keys()),
+        title="Task Status Distribution",
+        color=list(status_counts.keys()),
+        color_discrete_map=STATUS_COLORS
+    )
+
+
+def build_improvement_bar(before: float, after: float) -> go.Figure:
+    fig = go.Figure()
+    fig.add_trace(go.Bar(
+        x=['Before', 'After'],
+        y=[before, after],
+        marker_color=['#FF6B6B', '#4CAF50']
+    ))
+    fig.update_layout(title="Improvement Comparison", yaxis_title="Value")
+    return fig
+
+
+def build_series_chart(frame, title: str, baseline=None, change_at=None, limits=None) -> go.Figure:
+    """Downsampled series (see ``cip.timeseries.downsample``): mean line inside a min/max band."""
+    fig = go.Figure()
+    fig.add_trace(go.Scatter(x=frame['time'], y=frame['max'], mode='lines', line={'width': 0},
+                             showlegend=False, hoverinfo='skip'))
+    fig.add_trace(go.Scatter(x=frame['time'], y=frame['min'], mode='lines', line={'width': 0},
+                             fill='tonexty', fillcolor='rgba(69, 183, 209, 0.25)', name='Min / max'))
+    fig.add_trace(go.Scatter(x=frame['time'], y=frame['mean'], mode='lines',
+                             line={'color': '#45B7D1'}, name='Mean'))
+    if baseline is not None:
+        fig.add_trace(go.Scatter(x=frame['time'], y=baseline, mode='lines',
+                                 line={'color': '#96CEB4', 'dash': 'dash'}, name='Rolling baseline'))
+    if change_at is not None:
+        fig.add_vline(x=change_at, line_dash='dot', line_color='#FF6B6B')
+    if limits is not None:
+        # Control limits (cip.spc.Limits) of the baseline period
+        for value, dash in ((limits.center, 'solid'), (limits.ucl, 'dash'), (limits.lcl, 'dash')):
+            fig.add_hline(y=value, line_dash=dash, line_color='#888888', line_width=1)
+    fig.update_layout(title=title, yaxis_title="Value", hovermode='x unified')
+    return fig
+
+
+def status_pie(cache: FigureCache, status_counts: Dict[str, int]) -> go.Figure:
+    return cache.get('status_pie', status_counts, lambda: build_status_pie(status_counts))
+
+
+def improvement_bar(cache: FigureCache, metrics: Dict[str, Any]) -> go.Figure:
+    before = metrics.get('wait_time_before', 0)
+    after = metrics.get('wait_time_after', 0)
+    return cache.get('improvement_bar', [before, after], lambda: build_improvement_bar(before, after))
@@ -0,0 +1,175 @@
+"""Streaming bulk export of the whole portfolio.
+
+Projects are pulled from the store in batches and written out row by row,
+so memory stays bounded by the batch size no matter how many projects
+exist. Two kinds of records can be exported:
+
+* ``projects``: one record per project. JSON Lines keeps the nested format of
+  the single-project JSON export; CSV and Parquet flatten it into
+  ``PROJECT_EXPORT_COLUMNS`` with lists and dicts stored as JSON text.
+* ``tasks``: one flat row per implementation step, with its project.
+
+Usage::
+
+    python -m cip.export --format csv --kind tasks -o tasks.csv
+    python -m cip.export --format jsonl --checkpoint last_export.txt -o changes.jsonl
+"""
+import argparse
+import csv
+import json
+import sys
+from datetime import date, datetime
+from typing import Any, Dict, Iterator, List, Optional, Union
+
+from cip.store import TASK_COLUMNS, TASK_TIMESTAMPS, ProjectStore, now_timestamp, open_store
+
+FORMATS = ('jsonl', 'csv', 'parquet')
+KINDS = ('projects', 'tasks')
+
+PROJECT_HEADER_COLUMNS = ['id', 'name', 'description', 'created_date', 'status', 'updated_at']
+PROJECT_PHASE_COLUMNS = [
+    'plan.problem', 'plan.goal', 'plan.root_cause', 'plan.measures',
+    'do.implementation_steps',
+    'check.metrics', 'check.results',
+    'act.standardization', 'act.lessons_learned', 'act.next_steps',
+]
+PROJECT_EXPORT_COLUMNS = PROJECT_HEADER_COLUMNS + PROJECT_PHASE_COLUMNS
+TASK_EXPORT_COLUMNS = ['project_id', 'project_name', 'project_status', 'id',
+                       *TASK_COLUMNS, *TASK_TIMESTAMPS]
+
+MIME_TYPES = {
+    'jsonl': 'application/x-ndjson',
+    'csv': 'text/csv',
+    'parquet': 'application/vnd.apache.parquet',
+}
+
+
+def normalize_since(since: Union[str, date, datetime, None]) -> Optional[str]:
+    """Turn a date/datetime into the store's updated_at text format."""
+    if since is None or isinstance(since, str):
+        return since or None
+    if isinstance(since, datetime):
+        return since.strftime('%Y-%m-%dT%H:%M:%S.%fZ')
+    return since.isoformat()
+
+
+def iter_project_records(store: ProjectStore, since=None, batch_size: int = 200) -> Iterator[Dict[str, Any]]:
+    yield from store.iter_projects(changed_since=normalize_since(since), batch_size=batch_size)
+
+
+def flatten_project(project: Dict[str, Any]) -> Dict[str, Any]:
+    row = {column: project.get(column) for column in PROJECT_HEADER_COLUMNS}
+    for column in PROJECT_PHASE_COLUMNS:
+        phase, field = column.split('.', 1)
+        value = (project.get(phase) or {}).get(field)
+        if isinstance(value, (list, dict)):
+            value = json.dumps(value, ensure_ascii=False, default=str)
+        row[column] = value
+    return row
+
+
+def iter_rows(store: ProjectStore, kind: str = 'projects', since=None,
+              batch_size: int = 200) -> Iterator[Dict[str, Any]]:
+    """Flat rows of the given kind, one project batch at a time."""
+    for project in iter_project_records(store, since, batch_size):
+        if kind == 'projects':
+            yield flatten_project(project)
+            continue
+        for task in project.get('do', {}).get('implementation_steps', []):
+            row = {'project_id': project['id'], 'project_name': project['name'],
+                   'project_status': project['status']}
+            row.update({column: task.get(column) for column in TASK_EXPORT_COLUMNS[3:]})
+            yield row
+
+
+def iter_jsonl(store: ProjectStore, kind: str = 'projects', since=None) -> Iterator[str]:
+    records = iter_project_records(store, since) if kind == 'projects' else iter_rows(store, kind, since)
+    for record in records:
+        yield json.dumps(record, ensure_ascii=False, default=str) + '\n'
+
+
+def write_parquet(store: ProjectStore, target, kind: str = 'projects', since=None,
+                  row_group_size: int = 10_000) -> int:
+    """Write Parquet in row groups of ``row_group_size``; needs the optional ``pyarrow``."""
+    try:
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+    except ImportError as exc:
+        raise RuntimeError("Parquet export requires pyarrow (pip install pyarrow)") from exc
+    columns = PROJECT_EXPORT_COLUMNS if kind == 'projects' else TASK_EXPORT_COLUMNS
+    schema = pa.schema([(column, pa.string()) for column in columns])
+    count = 0
+    batch: List[Dict[str, Any]] = []
+    with pq.ParquetWriter(target, schema) as writer:
+        for row in iter_rows(store, kind, since):
+            batch.append({column: None if row[column] is None else str(row[column]) for column in columns})
+            if len(batch) >= row_group_size:
+                writer.write_table(pa.Table.from_pylist(batch, schema=schema))
+                count += len(batch)
+                batch = []
+        if batch or count == 0:
+            writer.write_table(pa.Table.from_pylist(batch, schema=schema))
+            count += len(batch)
+    return count
+
+
+def write_export(store: ProjectStore, target, fmt: str = 'jsonl', kind: str = 'projects', since=None) -> int:
+    """Stream an export to ``target`` (a text file for jsonl/csv, a path or binary file for parquet)."""
+    if fmt not in FORMATS:
+        raise ValueError(f"Unknown export format: {fmt}")
+    if kind not in KINDS:
+        raise ValueError(f"Unknown export kind: {kind}")
+    if fmt == 'parquet':
+        return write_parquet(store, target, kind, since)
+    count = 0
+    if fmt == 'jsonl':
+        for count, line in enumerate(iter_jsonl(store, kind, since), 1):
+            target.write(line)
+        return count
+    columns = PROJECT_EXPORT_COLUMNS if kind == 'projects' else TASK_EXPORT_COLUMNS
+    writer = csv.DictWriter(target, fieldnames=columns)
+    writer.writeheader()
+    for count, row in enumerate(iter_rows(store, kind, since), 1):
+        writer.writerow(row)
+    return count
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(prog='python -m cip.export', description="Export CIP projects in bulk.")
+    parser.add_argument('--format', choices=FORMATS, default='jsonl')
+    parser.add_argument('--kind', choices=KINDS, default='projects')
+    parser.add_argument('--since', help="only projects changed after this date/timestamp (UTC)")
+    parser.add_argument('--checkpoint', help="file holding the time of the previous export; "
+                                             "used as --since and updated afterwards")
+    parser.add_argument('--store', help="store URL (default: CIP_STORE_URL or cip_projects.db)")
+    parser.add_argument('-o', '--output', help="output file (default: stdout)")
+    args = parser.parse_args(argv)
+
+    since = args.since
+    if args.checkpoint and since is None:
+        try:
+            with open(args.checkpoint, encoding='utf-8') as fh:
+                since = fh.read().strip() or None
+        except FileNotFoundError:
+            pass
+    if args.format == 'parquet' and not args.output:
+        parser.error("--output is required for parquet")
+
+    store = open_store(args.store)
+    started = now_timestamp()
+    if args.format == 'parquet':
+        count = write_export(store, args.output, args.format, args.kind, since)
+    elif args.output:
+        with open(args.output, 'w', encoding='utf-8', newline='') as out:
+            count = write_export(store, out, args.format, args.kind, since)
+    else:
+        count = write_export(store, sys.stdout, args.format, args.kind, since)
+    if args.checkpoint:
+        with open(args.checkpoint, 'w', encoding='utf-8') as fh:
+            fh.write(started + '\n')
+    print(f"Exported {count} {args.kind} records", file=sys.stderr)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,270 @@
+"""Bulk import of projects, the counterpart of ``cip.export``.
+
+Accepts the single-project JSON export (an object or a list of objects),
+JSON Lines with one project per line, and the flattened projects CSV
+written by ``python -m cip.export --format csv``. Every record is validated
+against the PDCA structure, duplicates are resolved on ``id`` and valid
+records are written in batched transactions.
+
+Usage::
+
+    python -m cip.importer projects.jsonl
+    python -m cip.importer backlog.csv --replace --batch-size 1000
+"""
+import argparse
+import csv
+import io
+import json
+import os
+import sqlite3
+import sys
+import time
+from datetime import datetime
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional
+
+from cip.export import PROJECT_EXPORT_COLUMNS, PROJECT_PHASE_COLUMNS
+from cip.projects import DATE_FORMAT, PROJECT_STATUSES, TASK_PRIORITIES, TASK_STATUSES
+from cip.store import PHASES, ProjectStore, open_store
+
+FORMATS = ('json', 'jsonl', 'csv')
+
+# Expected type of every known phase field; unknown fields are kept as they are
+PHASE_SCHEMA = {
+    'plan': {'problem': str, 'goal': str, 'root_cause': str, 'measures': list},
+    'do': {'implementation_steps': list},
+    'check': {'metrics': dict, 'results': str},
+    'act': {'standardization': str, 'lessons_learned': str, 'next_steps': str},
+}
+
+TYPE_NAMES = {str: 'text', list: 'a list', dict: 'an object'}
+
+
+def _is_date(value: Any) -> bool:
+    try:
+        datetime.strptime(value, DATE_FORMAT)
+        return True
+    except (TypeError, ValueError):
+        return False
+
+
+def validate_task(task: Any, where: str, partial: bool = False) -> List[str]:
+    """Schema violations of one task; ``partial`` allows updates without the task text."""
+    if not isinstance(task, dict):
+        return [f"{where}: must be an object"]
+    errors = []
+    if partial and 'task' not in task:
+        pass
+    elif not isinstance(task.get('task'), str) or not task['task'].strip():
+        errors.append(f"{where}.task: required text")
+    if not isinstance(task.get('responsible', ''), str):
+        errors.append(f"{where}.responsible: must be text")
+    if task.get('due_date') is not None and not _is_date(task['due_date']):
+        errors.append(f"{where}.due_date: expected YYYY-MM-DD")
+    if task.get('status', 'open') not in TASK_STATUSES:
+        errors.append(f"{where}.status: must be one of {', '.join(TASK_STATUSES)}")
+    if task.get('priority', 'medium') not in TASK_PRIORITIES:
+        errors.append(f"{where}.priority: must be one of {', '.join(TASK_PRIORITIES)}")
+    if task.get('id') is not None and not isinstance(task['id'], str):
+        errors.append(f"{where}.id: must be text")
+    return errors
+
+
+def validate_project(record: Any) -> List[str]:
+    """All schema violations of one project record (empty when valid)."""
+    if not isinstance(record, dict):
+        return ["record must be an object"]
+    errors = []
+    if record.get('id') is not None and not isinstance(record['id'], str):
+        errors.append("id: must be text")
+    if not isinstance(record.get('name'), str) or not record['name'].strip():
+        errors.append("name: required text")
+    if not isinstance(record.get('description', ''), str):
+        errors.append("description: must be text")
+    if record.get('created_date') is not None and not _is_date(record['created_date']):
+        errors.append("created_date: expected YYYY-MM-DD")
+    if record.get('status', 'draft') not in PROJECT_STATUSES:
+        errors.append(f"status: must be one of {', '.join(PROJECT_STATUSES)}")
+    for phase in PHASES:
+        data = record.get(phase, {})
+        if data is None:
+            continue
+        if not isinstance(data, dict):
+            errors.append(f"{phase}: must be an object")
+            continue
+        for field, expected in PHASE_SCHEMA[phase].items():
+            if data.get(field) is not None and not isinstance(data[field], expected):
+                errors.append(f"{phase}.{field}: must be {TYPE_NAMES[expected]}")
+    plan = record.get('plan') or {}
+    if isinstance(plan.get('measures'), list) and not all(isinstance(m, str) for m in plan['measures']):
+        errors.append("plan.measures: must be a list of text")
+    metrics = (record.get('check') or {}).get('metrics')
+    if isinstance(metrics, dict):
+        for name, value in metrics.items():
+            if value is not None and (isinstance(value, bool) or not isinstance(value, (int, float))):
+                errors.append(f"check.metrics.{name}: must be a number")
+    tasks = (record.get('do') or {}).get('implementation_steps')
+    if isinstance(tasks, list):
+        seen = set()
+        for index, task in enumerate(tasks):
+            errors += validate_task(task, f"do.implementation_steps[{index}]")
+            task_id = task.get('id') if isinstance(task, dict) else None
+            if task_id is not None:
+                if task_id in seen:
+                    errors.append(f"do.implementation_steps[{index}].id: duplicate task id")
+                seen.add(task_id)
+    return errors
+
+
+def unflatten_row(row: Dict[str, str]) -> Dict[str, Any]:
+    """Rebuild a nested project from a flattened projects-CSV row."""
+    project: Dict[str, Any] = {phase: {} for phase in PHASES}
+    for column, value in row.items():
+        if value in (None, ''):
+            continue
+        if column in PROJECT_PHASE_COLUMNS:
+            phase, field = column.split('.', 1)
+            if PHASE_SCHEMA[phase].get(field) in (list, dict):
+                value = json.loads(value)
+            project[phase][field] = value
+        elif column in PROJECT_EXPORT_COLUMNS:
+            project[column] = value
+    return project
+
+
+def detect_format(name: str) -> str:
+    extension = os.path.splitext(name)[1].lower().lstrip('.')
+    if extension == 'ndjson':
+        return 'jsonl'
+    if extension not in FORMATS:
+        raise ValueError(f"Cannot tell the import format of {name!r}; use json, jsonl or csv")
+    return extension
+
+
+def read_records(stream: Iterable[str], fmt: str) -> Iterator[Any]:
+    """Yield raw records from a text stream; JSON Lines and CSV are read line by line."""
+    if fmt == 'json':
+        data = json.load(stream) if hasattr(stream, 'read') else json.loads(''.join(stream))
+        yield from (data if isinstance(data, list) else [data])
+    elif fmt == 'jsonl':
+        for line_number, line in enumerate(stream, 1):
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                yield json.loads(line)
+            except json.JSONDecodeError as exc:
+                yield ValueError(f"line {line_number}: invalid JSON ({exc.msg})")
+    elif fmt == 'csv':
+        for row in csv.DictReader(stream):
+            try:
+                yield unflatten_row(row)
+            except json.JSONDecodeError as exc:
+                yield ValueError(f"invalid JSON in a nested column ({exc.msg})")
+    else:
+        raise ValueError(f"Unknown import format: {fmt}")
+
+
+def import_projects(store: ProjectStore, records: Iterable[Any], replace: bool = False,
+                    batch_size: int = 500,
+                    progress: Optional[Callable[[Dict[str, int]], None]] = None) -> Dict[str, Any]:
+    """Validate and import records in batches.
+
+    A record whose ``id`` already exists, in the store or earlier in the
+    same import, is skipped, or overwrites the earlier project when
+    ``replace`` is set. ``progress`` is called with the running counters
+    after every batch.
+    """
+    report: Dict[str, Any] = {'read': 0, 'imported': 0, 'skipped': 0, 'invalid': 0,
+                              'tasks': 0, 'errors': []}
+    batch: Dict[Any, Dict[str, Any]] = {}
+
+    def flush():
+        if not batch:
+            return
+        ids = [key for key in batch if isinstance(key, str)]
+        existing = store.existing_project_ids(ids) if ids else set()
+        projects = []
+        for key, project in batch.items():
+            if key in existing and not replace:
+                report['skipped'] += 1
+            else:
+                projects.append(project)
+        try:
+            store.save_projects(projects)
+            saved = projects
+        except sqlite3.IntegrityError:
+            # e.g. a task id already used by another project: isolate the offending records
+            saved = []
+            for project in projects:
+                try:
+                    store.save_project(project)
+                    saved.append(project)
+                except sqlite3.IntegrityError as exc:
+                    report['invalid'] += 1
+                    report['errors'].append((project.get('id') or project.get('name'), [str(exc)]))
+        report['imported'] += len(saved)
+        report['tasks'] += sum(len((p.get('do') or {}).get('implementation_steps') or []) for p in saved)
+        batch.clear()
+        if progress:
+            progress({key: value for key, value in report.items() if key != 'errors'})
+
+    for index, record in enumerate(records, 1):
+        report['read'] += 1
+        errors = [str(record)] if isinstance(record, Exception) else validate_project(record)
+        if errors:
+            report['invalid'] += 1
+            label = record.get('id') or record.get('name') if isinstance(record, dict) else None
+            report['errors'].append((label or f"record {index}", errors))
+            continue
+        key = record.get('id') or object()
+        if key in batch:
+            report['skipped'] += 1
+            if not replace:
+                continue
+        batch[key] = record
+        if len(batch) >= batch_size:
+            flush()
+    flush()
+    return report
+
+
+def import_file(store: ProjectStore, data: bytes, name: str, **kwargs) -> Dict[str, Any]:
+    """Import an uploaded file's contents; the format comes from the file name."""
+    stream = io.TextIOWrapper(io.BytesIO(data), encoding='utf-8-sig', newline='')
+    return import_projects(store, read_records(stream, detect_format(name)), **kwargs)
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(prog='python -m cip.importer', description="Import CIP projects in bulk.")
+    parser.add_argument('path', help="JSON, JSON Lines or CSV file ('-' for stdin)")
+    parser.add_argument('--format', choices=FORMATS, help="input format (default: from the file extension)")
+    parser.add_argument('--replace', action='store_true', help="overwrite projects whose id already exists")
+    parser.add_argument('--batch-size', type=int, default=500)
+    parser.add_argument('--store', help="store URL (default: CIP_STORE_URL or cip_projects.db)")
+    args = parser.parse_args(argv)
+
+    fmt = args.format or detect_format(args.path)
+    store = open_store(args.store)
+    started = time.perf_counter()
+
+    def show(counters):
+        elapsed = time.perf_counter() - started
+        print(f"\r{counters['read']} read, {counters['imported']} imported, "
+              f"{counters['tasks'] / elapsed if elapsed else 0:,.0f} tasks/s", end='', file=sys.stderr)
+
+    if args.path == '-':
+        report = import_projects(store, read_records(sys.stdin, fmt), args.replace, args.batch_size, show)
+    else:
+        with open(args.path, encoding='utf-8-sig', newline='') as fh:
+            report = import_projects(store, read_records(fh, fmt), args.replace, args.batch_size, show)
+    print(file=sys.stderr)
+    for label, errors in report['errors']:
+        print(f"{label}: {'; '.join(errors)}", file=sys.stderr)
+    print(f"Imported {report['imported']} projects ({report['tasks']} tasks), "
+          f"skipped {report['skipped']}, invalid {report['invalid']} "
+          f"in {time.perf_counter() - started:.2f}s", file=sys.stderr)
+    return 1 if report['invalid'] else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,281 @@
+"""Typed model of projects and tasks.
+
+Projects and tasks travel through the store, the API, the importer and the
+UI as plain dicts in the JSON export format; the values their status,
+priority and date fields may take are defined here once.
+
+``Project`` and ``Task`` are the typed form of those dicts: statuses and
+priorities are enums and dates are parsed into ``date`` objects once, in
+``from_dict``. All classes use ``__slots__``. ``to_dict`` writes the export
+format again and ``to_dict(from_dict(data)) == data`` for every valid dict:
+unknown keys, absent keys and values the typed fields would write
+differently (e.g. ``''`` as a due date) are kept in ``extra``. Invalid
+statuses, priorities and dates raise ``ValueError``.
+
+``measure_task_memory`` compares the memory of 10,000 tasks held as dicts
+and as ``Task`` objects.
+"""
+from dataclasses import dataclass, field
+from datetime import date, datetime
+from enum import Enum
+from typing import Any, Dict, List, Optional
+
+DATE_FORMAT = '%Y-%m-%d'
+
+
+class ProjectStatus(str, Enum):
+    DRAFT = 'draft'
+    IN_PROGRESS = 'in_progress'
+    COMPLETED = 'completed'
+    ON_HOLD = 'on_hold'
+
+
+class TaskStatus(str, Enum):
+    OPEN = 'open'
+    IN_PROGRESS = 'in_progress'
+    COMPLETED = 'completed'
+
+
+class Priority(str, Enum):
+    LOW = 'low'
+    MEDIUM = 'medium'
+    HIGH = 'high'
+
+
+class _Missing:
+    def __repr__(self):
+        return 'MISSING'
+
+
+# Marks a known key in ``extra`` that the original dict did not have
+MISSING = _Missing()
+
+
+def parse_date(value: Any) -> Optional[date]:
+    if value is None or value == '':
+        return None
+    if isinstance(value, datetime):
+        return value.date()
+    if isinstance(value, date):
+        return value
+    return datetime.strptime(value, DATE_FORMAT).date()
+
+
+def format_date(value: Optional[date]) -> Optional[str]:
+    return value.strftime(DATE_FORMAT) if value is not None else None
+
+
+def _enum(cls, value):
+    return cls(value) if value is not None else None
+
+
+# One shared ``extra`` per set of absent keys (e.g. tasks loaded without their version); never modified
+_ABSENT: Dict[tuple, Dict[str, Any]] = {}
+
+
+def _keep_rest(obj, data: Dict[str, Any]):
+    # Whatever the typed fields do not write back as it was goes into ``extra``;
+    # None instead of an empty dict saves one allocation per object
+    written = obj._fields()
+    extra = {key: value for key, value in data.items() if key not in written or written[key] != value}
+    extra.update((key, MISSING) for key in written if key not in data)
+    if extra and all(value is MISSING for value in extra.values()):
+        extra = _ABSENT.setdefault(tuple(extra), extra)
+    obj.extra = extra or None
+    return obj
+
+
+class _Record:
+    __slots__ = ()
+
+    def to_dict(self) -> Dict[str, Any]:
+        data = self._fields()
+        for key, value in (self.extra or {}).items():
+            if value is MISSING:
+                del data[key]
+            else:
+                data[key] = value
+        return data
+
+
+@dataclass(slots=True)
+class Task(_Record):
+    task: str = ''
+    responsible: Optional[str] = ''
+    due_date: Optional[date] = None
+    status: Optional[TaskStatus] = TaskStatus.OPEN
+    priority: Optional[Priority] = Priority.MEDIUM
+    id: Optional[str] = None
+    created_at: Optional[str] = None
+    completed_at: Optional[str] = None
+    version: Optional[int] = None
+    extra: Optional[Dict[str, Any]] = None
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> 'Task':
+        task = cls(
+            task=data.get('task', ''),
+            responsible=data.get('responsible', ''),
+            due_date=parse_date(data.get('due_date')),
+            status=_enum(TaskStatus, data.get('status', 'open')),
+            priority=_enum(Priority, data.get('priority', 'medium')),
+            id=data.get('id'),
+            created_at=data.get('created_at'),
+            completed_at=data.get('completed_at'),
+            version=data.get('version'),
+        )
+        return _keep_rest(task, data)
+
+    def _fields(self) -> Dict[str, Any]:
+        return {
+            'id': self.id,
+            'task': self.task,
+            'responsible': self.responsible,
+            'due_date': format_date(self.due_date),
+            'status': self.status.value if self.status is not None else None,
+            'priority': self.priority.value if self.priority is not None else None,
+            'created_at': self.created_at,
+            'completed_at': self.completed_at,
+            'version': self.version,
+        }
+
+    def is_overdue(self, today: Optional[date] = None) -> bool:
+        """Not completed and due before ``today``, as in ``ProjectStore.overdue_tasks`` and the reminders."""
+        return (self.status is not TaskStatus.COMPLETED and self.due_date is not None
+                and self.due_date < (today or date.today()))
+
+
+class _Phase(_Record):
+    __slots__ = ()
+    KEYS = ()
+
+    def _fields(self) -> Dict[str, Any]:
+        # Phase fields that were never set are absent, as in the stored projects
+        data = {}
+        for key in self.KEYS:
+            value = getattr(self, key)
+            if value is not None:
+                data[key] = [task.to_dict() for task in value] if key == 'implementation_steps' else value
+        return data
+
+
+@dataclass(slots=True)
+class PlanPhase(_Phase):
+    problem: Optional[str] = None
+    goal: Optional[str] = None
+    root_cause: Optional[str] = None
+    measures: Optional[List[str]] = None
+    extra: Optional[Dict[str, Any]] = None
+
+    KEYS = ('problem', 'goal', 'root_cause', 'measures')
+
+
+@dataclass(slots=True)
+class DoPhase(_Phase):
+    implementation_steps: Optional[List[Task]] = None
+    extra: Optional[Dict[str, Any]] = None
+
+    KEYS = ('implementation_steps',)
+
+
+@dataclass(slots=True)
+class CheckPhase(_Phase):
+    metrics: Optional[Dict[str, float]] = None
+    results: Optional[str] = None
+    extra: Optional[Dict[str, Any]] = None
+
+    KEYS = ('metrics', 'results')
+
+
+@dataclass(slots=True)
+class ActPhase(_Phase):
+    standardization: Optional[str] = None
+    lessons_learned: Optional[str] = None
+    next_steps: Optional[str] = None
+    extra: Optional[Dict[str, Any]] = None
+
+    KEYS = ('standardization', 'lessons_learned', 'next_steps')
+
+
+def _phase_from_dict(cls, data: Optional[Dict[str, Any]]):
+    data = data or {}
+    values = {key: data[key] for key in cls.KEYS if data.get(key) is not None}
+    if cls is DoPhase and 'implementation_steps' in values:
+        values['implementation_steps'] = [Task.from_dict(task) for task in values['implementation_steps']]
+    return _keep_rest(cls(**values), data)
+
+
+@dataclass(slots=True)
+class Project(_Record):
+    name: str = ''
+    id: Optional[str] = None
+    description: Optional[str] = ''
+    created_date: Optional[date] = None
+    status: Optional[ProjectStatus] = ProjectStatus.DRAFT
+    updated_at: Optional[str] = None
+    plan: PlanPhase = field(default_factory=PlanPhase)
+    do: DoPhase = field(default_factory=DoPhase)
+    check: CheckPhase = field(default_factory=CheckPhase)
+    act: ActPhase = field(default_factory=ActPhase)
+    extra: Optional[Dict[str, Any]] = None
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> 'Project':
+        project = cls(
+            name=data.get('name', ''),
+            id=data.get('id'),
+            description=data.get('description', ''),
+            created_date=parse_date(data.get('created_date')),
+            status=_enum(ProjectStatus, data.get('status', 'draft')),
+            updated_at=data.get('updated_at'),
+            plan=_phase_from_dict(PlanPhase, data.get('plan')),
+            do=_phase_from_dict(DoPhase, data.get('do')),
+            check=_phase_from_dict(CheckPhase, data.get('check')),
+            act=_phase_from_dict(ActPhase, data.get('act')),
+        )
+        return _keep_rest(project, data)
+
+    def _fields(self) -> Dict[str, Any]:
+        return {
+            'id': self.id,
+            'name': self.name,
+            'description': self.description,
+            'created_date': format_date(self.created_date),
+            'status': self.status.value if self.status is not None else None,
+            'updated_at': self.updated_at,
+            'plan': self.plan.to_dict(),
+            'do': self.do.to_dict(),
+            'check': self.check.to_dict(),
+            'act': self.act.to_dict(),
+        }
+
+    @property
+    def tasks(self) -> List[Task]:
+        return self.do.implementation_steps or []
+
+
+def measure_task_memory(count: int = 10_000) -> Dict[str, int]:
+    """Bytes allocated for ``count`` tasks as export-format dicts vs. ``Task`` objects."""
+    import tracemalloc
+
+    def sample(i):
+        # Distinct strings per task, as tasks loaded from a store would have
+        return {'id': f'{i:08d}-0000-0000-0000-000000000000', 'task': f'Task {i}',
+                'responsible': f'Person {i % 50}', 'due_date': f'2024-{i % 12 + 1:02d}-{i % 28 + 1:02d}',
+                'status': 'open', 'priority': 'medium',
+                'created_at': f'2024-01-01T00:00:{i % 60:02d}.000000Z', 'completed_at': None, 'version': 1}
+
+    def allocated(build):
+        tracemalloc.start()
+        objects = build()
+        size = tracemalloc.get_traced_memory()[0]
+        tracemalloc.stop()
+        del objects
+        return size
+
+    raw = [sample(i) for i in range(count)]
+    dict_bytes = allocated(lambda: [dict(task) for task in raw])
+    # Strings are shared by both and not counted; only the containers and parsed values
+    model_bytes = allocated(lambda: [Task.from_dict(task) for task in raw])
+    return {'tasks': count, 'dict_bytes': dict_bytes, 'model_bytes': model_bytes,
+            'saved_bytes': dict_bytes - model_bytes}
@@ -0,0 +1,43 @@
+"""Cross-project portfolio view built from the store's precomputed summary rows."""
+from datetime import date
+from typing import Any, Dict, Optional, Sequence, Tuple
+
+import pandas as pd
+
+from cip.projects import overdue_cutoff
+from cip.store import SUMMARY_COLUMNS, ProjectStore
+
+
+def load_portfolio(store: ProjectStore, statuses: Optional[Sequence[str]] = None,
+                   created_from: Optional[date] = None, created_to: Optional[date] = None,
+                   today: Optional[date] = None, progress: Optional[Tuple[float, float]] = None,
+                   by_progress: bool = False) -> pd.DataFrame:
+    """One row per project with progress (overall and per phase), task counts, overdue tasks and improvement."""
+    rows = store.project_summaries(
+        statuses=statuses,
+        created_from=created_from.isoformat() if created_from else None,
+        created_to=created_to.isoformat() if created_to else None,
+        progress_from=progress[0] if progress else None,
+        progress_to=progress[1] if progress else None,
+        by_progress=by_progress)
+    df = pd.DataFrame.from_records(rows, columns=SUMMARY_COLUMNS)
+    # Kept in the summaries; only projects with a task that came due since are recounted
+    overdue = store.overdue_counts(overdue_cutoff(today))
+    df['overdue'] = df['id'].map(overdue).fillna(0).astype('int64')
+    df['created_date'] = pd.to_datetime(df['created_date'], format='%Y-%m-%d', errors='coerce')
+    df['status'] = df['status'].astype('category')
+    return df
+
+
+def portfolio_kpis(df: pd.DataFrame) -> Dict[str, Any]:
+    task_total = int(df['task_total'].sum())
+    task_completed = int(df['task_completed'].sum())
+    return {
+        'projects': len(df),
+        'avg_progress': float(df['progress'].mean()) if len(df) else 0.0,
+        'task_total': task_total,
+        'task_completed': task_completed,
+        'completion_rate': task_completed / task_total * 100 if task_total else 0.0,
+        'overdue': int(df['overdue'].sum()),
+        'avg_improvement': float(df['improvement_percent'].mean()) if df['improvement_percent'].notna().any() else None,
+    }
@@ -0,0 +1,336 @@
+"""Rerun profiling: section timings, widget counts and session size.
+
+A ``RerunProfiler`` times the sections of one rerun of the app: ``lap`` ends
+the current top-level section and starts the next one, ``section`` times a
+nested block (its time also counts towards the enclosing lap). Library code
+calls the module-level ``lap``, ``section`` and ``count_widget``, which record
+into the profiler running on the current thread and do nothing otherwise;
+``instrument_widgets`` makes Streamlit's widget functions call ``count_widget``.
+
+Finished reruns are aggregated process-wide in a ``MetricsRegistry`` and
+rendered in the Prometheus text format, to be scraped from ``serve`` or
+written for a node_exporter textfile collector with ``write_textfile``.
+"""
+import bisect
+import functools
+import os
+import sys
+import tempfile
+import threading
+import time
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import TYPE_CHECKING, Any, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+SECONDS_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+WIDGET_BUCKETS = (10, 25, 50, 100, 250, 500, 1000)
+BYTES_BUCKETS = (1e4, 1e5, 1e6, 1e7, 1e8)
+
+# Streamlit functions counted as widgets by ``instrument_widgets``
+WIDGET_FUNCTIONS = ('button', 'download_button', 'checkbox', 'toggle', 'radio', 'selectbox', 'multiselect',
+                    'slider', 'select_slider', 'text_input', 'text_area', 'number_input', 'date_input',
+                    'time_input', 'file_uploader', 'color_picker', 'data_editor')
+
+_active = threading.local()
+
+
+class Histogram:
+    """Cumulative Prometheus histogram for one label set."""
+
+    def __init__(self, buckets: Sequence[float]):
+        self.buckets = tuple(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def quantile(self, q: float) -> Optional[float]:
+        """Upper bound of the bucket holding the ``q`` quantile (None if empty or beyond the last bucket)."""
+        if not self.count:
+            return None
+        rank, seen = q * self.count, 0
+        for bound, count in zip(self.buckets, self.counts):
+            seen += count
+            if seen >= rank:
+                return bound
+        return None
+
+
+class MetricsRegistry:
+    """Process-wide metrics of all sessions' reruns, safe to update from any thread."""
+
+    def __init__(self, prefix: str = 'cip'):
+        self.prefix = prefix
+        self._lock = threading.Lock()
+        self._histograms: Dict[Tuple[str, Tuple[Tuple[str, str], ...]], Histogram] = {}
+        self._help: Dict[str, str] = {}
+        self._counters: Dict[str, float] = {}
+        self._last_write = 0.0
+
+    def observe(self, name: str, value: float, buckets: Sequence[float] = SECONDS_BUCKETS,
+                help: str = '', **labels: str) -> None:
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            histogram = self._histograms.get(key)
+            if histogram is None:
+                histogram = self._histograms[key] = Histogram(buckets)
+                self._help.setdefault(name, help)
+            histogram.observe(value)
+
+    def inc(self, name: str, value: float = 1, help: str = '') -> None:
+        with self._lock:
+            self._counters[name] = self._counters.get(name, 0) + value
+            self._help.setdefault(name, help)
+
+    def record(self, profile: Dict[str, Any]) -> None:
+        """Add a finished rerun (see ``RerunProfiler.finish``)."""
+        self.inc('reruns_total', help="Reruns of the app script")
+        self.observe('rerun_seconds', profile['seconds'], help="Wall time of a whole rerun",
+                     scope=profile.get('scope', 'app'))
+        for name, seconds in profile['sections'].items():
+            self.observe('section_seconds', seconds, help="Wall time of one section of a rerun", section=name)
+        self.observe('rerun_widgets', profile['widgets'], WIDGET_BUCKETS, help="Widgets created per rerun")
+        if profile.get('session_bytes') is not None:
+            self.observe('session_state_bytes', profile['session_bytes'], BYTES_BUCKETS,
+                         help="Approximate size of a session's state after a rerun")
+
+    def summary_rows(self) -> List[Dict[str, Any]]:
+        """Count, mean and approximate p95 per section (rerun totals as ``(<scope> rerun)``)."""
+        rows = []
+        with self._lock:
+            for (name, labels), histogram in self._histograms.items():
+                if name not in ('rerun_seconds', 'section_seconds'):
+                    continue
+                labels = dict(labels)
+                section = labels.get('section') or f"({labels.get('scope', 'app')} rerun)"
+                rows.append({'section': section, 'count': histogram.count,
+                             'mean_ms': 1000 * histogram.sum / histogram.count,
+                             'p95_ms': 1000 * (histogram.quantile(0.95) or float('inf'))})
+        return rows
+
+    def summary(self) -> 'pd.DataFrame':
+        """``summary_rows`` as a DataFrame."""
+        import pandas as pd
+        return pd.DataFrame(self.summary_rows(), columns=['section', 'count', 'mean_ms', 'p95_ms'])
+
+    def render(self) -> str:
+        """All metrics in the Prometheus text exposition format."""
+        lines: List[str] = []
+        with self._lock:
+            for name, value in sorted(self._counters.items()):
+                full = f'{self.prefix}_{name}'
+                lines += [f'# HELP {full} {self._help[name]}', f'# TYPE {full} counter', f'{full} {value:g}']
+            by_name: Dict[str, List[Tuple[Tuple[Tuple[str, str], ...], Histogram]]] = {}
+            for (name, labels), histogram in sorted(self._histograms.items()):
+                by_name.setdefault(name, []).append((labels, histogram))
+            for name, series in by_name.items():
+                full = f'{self.prefix}_{name}'
+                lines += [f'# HELP {full} {self._help[name]}', f'# TYPE {full} histogram']
+                for labels, histogram in series:
+                    cumulative = 0
+                    for bound, count in zip((*histogram.buckets, float('inf')), histogram.counts):
+                        cumulative += count
+                        le = '+Inf' if bound == float('inf') else f'{bound:g}'
+                        lines.append(f'{full}_bucket{_labels(labels, le=le)} {cumulative}')
+                    lines.append(f'{full}_sum{_labels(labels)} {histogram.sum:g}')
+                    lines.append(f'{full}_count{_labels(labels)} {histogram.count}')
+        return '\n'.join(lines) + '\n'
+
+    def write_textfile(self, path: str, min_interval: float = 0.0) -> bool:
+        """Atomically replace ``path`` with the rendered metrics, at most every ``min_interval`` seconds."""
+        now = time.monotonic()
+        with self._lock:
+            if self._last_write and now - self._last_write < min_interval:
+                return False
+            self._last_write = now
+        directory = os.path.dirname(os.path.abspath(path))
+        fd, tmp = tempfile.mkstemp(dir=directory, prefix='.cip_metrics')
+        with os.fdopen(fd, 'w', encoding='utf-8') as out:
+            out.write(self.render())
+        # Scrapers never see a half-written file
+        os.replace(tmp, path)
+        return True
+
+
+def _labels(labels: Tuple[Tuple[str, str], ...], **extra: str) -> str:
+    pairs = [*labels, *extra.items()]
+    if not pairs:
+        return ''
+    escaped = (str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n') for _, value in pairs)
+    return '{' + ','.join(f'{name}="{value}"' for (name, _), value in zip(pairs, escaped)) + '}'
+
+
+def serve(registry: MetricsRegistry, port: int, host: str = '127.0.0.1') -> ThreadingHTTPServer:
+    """Serve ``GET /metrics`` from a daemon thread; returns the running server."""
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path.split('?')[0] != '/metrics':
+                self.send_error(404)
+                return
+            body = registry.render().encode('utf-8')
+            self.send_response(200)
+            self.send_header('Content-Type', 'text/plain; version=0.0.4; charset=utf-8')
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            pass  # one line per scrape would drown the app's log
+
+    server = ThreadingHTTPServer((host, port), Handler)
+    threading.Thread(target=server.serve_forever, name='cip-metrics', daemon=True).start()
+    return server
+
+
+def deep_sizeof(obj: Any, exclude: Iterable[Any] = ()) -> int:
+    """Approximate memory held by ``obj`` and everything it references.
+
+    Containers and plain objects are followed; frames and series count
+    their values (arrays already do through ``sys.getsizeof``). Shared
+    objects are counted once; modules, classes and functions not at all,
+    nor anything in ``exclude`` (e.g. the store all sessions share).
+    """
+    seen = {id(item) for item in exclude}
+    total = 0
+    stack = [obj]
+    while stack:
+        item = stack.pop()
+        if id(item) in seen or isinstance(item, (type, type(sys), type(deep_sizeof))):
+            continue
+        seen.add(id(item))
+        if type(item).__module__.startswith('pandas.') and hasattr(item, 'memory_usage'):
+            # DataFrame/Series/Index (checked by module so that profiling does not import pandas)
+            usage = item.memory_usage(deep=True)
+            total += int(usage.sum()) if hasattr(usage, 'sum') else int(usage)
+            continue
+        total += sys.getsizeof(item)
+        if isinstance(item, dict):
+            stack.extend(item.keys())
+            stack.extend(item.values())
+        elif isinstance(item, (list, tuple, set, frozenset)):
+            stack.extend(item)
+        elif not isinstance(item, (str, bytes, bytearray, int, float, complex, bool)):
+            if hasattr(item, '__dict__'):
+                stack.append(vars(item))
+            for name in getattr(type(item), '__slots__', ()):
+                if hasattr(item, name):
+                    stack.append(getattr(item, name))
+    return total
+
+
+class RerunProfiler:
+    """Timings and widget count of one rerun."""
+
+    def __init__(self, registry: Optional[MetricsRegistry] = None, scope: str = 'app'):
+        self.registry = registry
+        # 'app' for a full rerun, or the name of a fragment rerun on its own
+        self.scope = scope
+        self.sections: Dict[str, float] = {}
+        self.widgets: Dict[str, int] = {}
+        self._lap: Optional[Tuple[str, float]] = None
+        self._started = 0.0
+
+    @contextmanager
+    def rerun(self) -> Iterator['RerunProfiler']:
+        """Profile the enclosed rerun on this thread (also when it ends in ``st.rerun()`` or an error)."""
+        previous = getattr(_active, 'profiler', None)
+        _active.profiler = self
+        self._started = time.perf_counter()
+        try:
+            yield self
+        finally:
+            self.lap(None)
+            _active.profiler = previous
+
+    def lap(self, name: Optional[str]) -> None:
+        """End the current top-level section and start ``name`` (None just ends it)."""
+        now = time.perf_counter()
+        if self._lap is not None:
+            current, started = self._lap
+            self.sections[current] = self.sections.get(current, 0.0) + now - started
+        self._lap = (name, now) if name is not None else None
+
+    @contextmanager
+    def section(self, name: str) -> Iterator[None]:
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.sections[name] = self.sections.get(name, 0.0) + time.perf_counter() - started
+
+    def finish(self, session_state: Any = None, shared: Iterable[Any] = ()) -> Dict[str, Any]:
+        """Close the rerun and record it; ``session_state`` is sized with ``deep_sizeof`` without ``shared``."""
+        self.lap(None)
+        profile = {
+            'scope': self.scope,
+            'seconds': time.perf_counter() - self._started,
+            'sections': dict(self.sections),
+            'widgets': sum(self.widgets.values()),
+            'widget_kinds': dict(self.widgets),
+            'session_bytes': deep_sizeof(session_state, shared) if session_state is not None else None,
+        }
+        if self.registry is not None:
+            self.registry.record(profile)
+        return profile
+
+
+def active() -> Optional[RerunProfiler]:
+    return getattr(_active, 'profiler', None)
+
+
+def lap(name: Optional[str]) -> None:
+    """Start the next top-level section of the rerun profiled on this thread, if any."""
+    profiler = active()
+    if profiler is not None:
+        profiler.lap(name)
+
+
+@contextmanager
+def section(name: str) -> Iterator[None]:
+    """Time a block into the rerun profiled on this thread, if any."""
+    profiler = active()
+    if profiler is None:
+        yield
+        return
+    with profiler.section(name):
+        yield
+
+
+def count_widget(kind: str) -> None:
+    profiler = active()
+    if profiler is not None:
+        profiler.widgets[kind] = profiler.widgets.get(kind, 0) + 1
+
+
+def instrument_widgets(st: Any, names: Sequence[str] = WIDGET_FUNCTIONS) -> None:
+    """Make the ``streamlit`` module's widget functions count themselves (idempotent).
+
+    Both the ``DeltaGenerator`` methods (``st.sidebar.button``, ``col.button``)
+    and the module-level functions bound at import (``st.button``) are wrapped.
+    """
+    from streamlit.delta_generator import DeltaGenerator
+
+    def counted(function, kind):
+        if getattr(function, '_cip_counted', False):
+            return function
+
+        @functools.wraps(function)
+        def wrapper(*args, **kwargs):
+            count_widget(kind)
+            return function(*args, **kwargs)
+        wrapper._cip_counted = True
+        return wrapper
+
+    for name in names:
+        for owner in (DeltaGenerator, st):
+            function = getattr(owner, name, None)
+            if function is not None:
+                setattr(owner, name, counted(function, name))
@@ -0,0 +1,169 @@
+"""Project-level logic shared by the UI, the store and other entry points."""
+import uuid
+from datetime import date, datetime, timedelta
+from typing import Any, Dict, Optional
+
+from cip.models import DATE_FORMAT, Priority, ProjectStatus, TaskStatus
+
+PROJECT_STATUSES = tuple(status.value for status in ProjectStatus)
+TASK_STATUSES = tuple(status.value for status in TaskStatus)
+TASK_PRIORITIES = tuple(priority.value for priority in Priority)
+
+
+# Empty project as created by the "New Project" button
+def new_project(name: str = 'New CIP Project') -> Dict[str, Any]:
+    return {
+        'id': str(uuid.uuid4()),
+        'name': name,
+        'description': '',
+        'created_date': datetime.now().strftime('%Y-%m-%d'),
+        'status': 'draft',
+        'plan': {}, 'do': {}, 'check': {}, 'act': {}
+    }
+
+
+# Create sample project
+def create_sample_project():
+    sample_id = str(uuid.uuid4())
+    return {
+        'id': sample_id,
+        'name': 'Example: Reducing Wait Times',
+        'description': 'Reduce production wait times by 30%',
+        'created_date': datetime.now().strftime('%Y-%m-%d'),
+        'status': 'in_progress',
+        'plan': {
+            'problem': 'Long wait times between production steps',
+            'goal': 'Reduce wait times by 30%',
+            'root_cause': 'Unbalanced machine capacities',
+            'measures': ['Machine analysis', 'Process optimization', 'Training']
+        },
+        'do': {
+            'implementation_steps': [
+                {'task': 'Analyze machine utilization', 'responsible': 'John Smith', 'due_date': '2024-07-15', 'status': 'completed'},
+                {'task': 'Identify bottlenecks', 'responsible': 'Anna Johnson', 'due_date': '2024-07-20', 'status': 'in_progress'},
+                {'task': 'Implement optimization measures', 'responsible': 'Tom Wilson', 'due_date': '2024-07-30', 'status': 'open'}
+            ]
+        },
+        'check': {
+            'metrics': {'wait_time_before': 45, 'wait_time_after': 32, 'improvement_percent': 28.9},
+            'results': 'Wait times were reduced by 28.9%'
+        },
+        'act': {
+            'standardization': 'New work instructions created',
+            'lessons_learned': 'Regular capacity analysis is essential',
+            'next_steps': 'Extension to other production lines'
+        }
+    }
+
+
+# Fields that make up the text phases; each filled one counts equally
+PLAN_FIELDS = ('problem', 'goal', 'root_cause', 'measures')
+ACT_FIELDS = ('standardization', 'lessons_learned', 'next_steps')
+# Before/after values the Check phase measures; 0 is the number input's empty value
+CHECK_METRICS = ('wait_time_before', 'wait_time_after')
+# Share of a task's weight credited while it is in progress
+IN_PROGRESS_CREDIT = 0.5
+# A phase's share of the whole project's progress
+PHASE_WEIGHTS = {'plan': 0.25, 'do': 0.25, 'check': 0.25, 'act': 0.25}
+
+
+def _filled(data: Dict[str, Any], fields) -> float:
+    return sum(1 for field in fields if data.get(field)) / len(fields)
+
+
+def do_completion(task_open: int, task_in_progress: int, task_completed: int) -> float:
+    """Do-phase completion (0-100) from task counts: completed tasks fully, started ones partly.
+
+    Due dates do not weigh in: the value is stored with the project, and a
+    weight by lateness would change with the day, not with the project.
+    Overdue tasks are counted separately (``summarize_project``).
+    """
+    total = task_open + task_in_progress + task_completed
+    if not total:
+        return 0.0
+    return 100 * (task_completed + IN_PROGRESS_CREDIT * task_in_progress) / total
+
+
+def phase_completion(project_data: Dict[str, Any], task_counts: Optional[Dict[str, int]] = None) -> Dict[str, float]:
+    """Completion (0-100) of every PDCA phase; ``task_counts`` (per status) saves counting the tasks."""
+    if task_counts is None:
+        task_counts = {status: 0 for status in TASK_STATUSES}
+        for task in project_data.get('do', {}).get('implementation_steps') or []:
+            status = task.get('status', 'open')
+            task_counts[status] = task_counts.get(status, 0) + 1
+    check = project_data.get('check', {})
+    metrics = check.get('metrics') or {}
+    return {
+        'plan': 100 * _filled(project_data.get('plan', {}), PLAN_FIELDS),
+        'do': do_completion(task_counts['open'], task_counts['in_progress'], task_counts['completed']),
+        # Half for measuring (metric coverage), half for assessing the results
+        'check': 50 * _filled(metrics, CHECK_METRICS) + (50 if check.get('results') else 0),
+        'act': 100 * _filled(project_data.get('act', {}), ACT_FIELDS),
+    }
+
+
+def combine_progress(phases: Dict[str, float]) -> float:
+    return sum(PHASE_WEIGHTS[phase] * value for phase, value in phases.items())
+
+
+# Progress calculation
+def calculate_progress(project_data):
+    return combine_progress(phase_completion(project_data))
+
+
+# Relative improvement of a metric where lower is better (e.g. wait time)
+def improvement_percent(before: float, after: float) -> Optional[float]:
+    if not before or before <= 0:
+        return None
+    return ((before - after) / before) * 100
+
+
+# Check-phase metrics for a before/after measurement, as stored by the Check tab
+def check_metrics(before: float, after: float) -> Dict[str, float]:
+    improvement = improvement_percent(before, after)
+    return {
+        'wait_time_before': before,
+        'wait_time_after': after,
+        'improvement_percent': improvement if improvement is not None else 0
+    }
+
+
+# Open tasks due before this day are overdue: a task due today counts once the day has started,
+# as on the project dashboard
+def overdue_cutoff(today: Optional[date] = None) -> str:
+    return ((today or date.today()) + timedelta(days=1)).strftime(DATE_FORMAT)
+
+
+# Per-project numbers behind the portfolio view; the overdue count is for ``overdue_cutoff(today)``
+def summarize_project(project: Dict[str, Any], today: Optional[date] = None) -> Dict[str, Any]:
+    tasks = project.get('do', {}).get('implementation_steps') or []
+    counts = {status: 0 for status in TASK_STATUSES}
+    cutoff = overdue_cutoff(today)
+    next_due = next_due_after = None
+    overdue = 0
+    for task in tasks:
+        status = task.get('status', 'open')
+        counts[status] = counts.get(status, 0) + 1
+        due = task.get('due_date')
+        if status != 'completed' and due:
+            if next_due is None or due < next_due:
+                next_due = due
+            if due < cutoff:
+                overdue += 1
+            elif next_due_after is None or due < next_due_after:
+                next_due_after = due
+    metrics = project.get('check', {}).get('metrics') or {}
+    phases = phase_completion(project, counts)
+    return {
+        'progress': combine_progress(phases),
+        'task_total': len(tasks),
+        'task_open': counts['open'],
+        'task_in_progress': counts['in_progress'],
+        'task_completed': counts['completed'],
+        'next_due_date': next_due,
+        'improvement_percent': metrics.get('improvement_percent'),
+        **{f'{phase}_progress': value for phase, value in phases.items()},
+        'task_overdue': overdue,
+        'overdue_before': cutoff,
+        'next_due_after': next_due_after,
+    }
@@ -0,0 +1,282 @@
+"""Overdue detection and reminder digests in the background.
+
+A check asks the store for the overdue open tasks nobody was reminded of
+yet, groups them by responsible person and hands one digest per person to
+a sink. The query is a range scan of the status/due-date index that visits
+every open overdue task, reminded or not, on each check and drops the
+reminded ones with a lookup per task: its cost grows with the number of
+open overdue tasks (which stay in the scan until they are completed or
+rescheduled), not with the portfolio size.
+
+Each sent reminder is recorded per task, due date and responsible person,
+so a restart or a second app process does not send it again, while a task
+that is added late, rescheduled, reassigned or reopened is reminded anew.
+Only the tasks of a digest that failed are sent again by the next check; a
+digest the sink skips (an SMTP recipient without address) is recorded as
+handled, since it would be skipped again.
+
+Sinks deliver digests by e-mail (``SMTPSink``), as JSON to a webhook
+(``WebhookSink``) or into a list (``MemorySink``, for tests and dry runs).
+``ReminderScheduler`` runs the check on a daemon thread.
+
+Usage::
+
+    python -m cip.reminders --webhook https://chat.example.com/hooks/cip
+    python -m cip.reminders --smtp mail.example.com --sender cip@example.com --addresses people.json --loop
+"""
+import argparse
+import json
+import os
+import smtplib
+import sys
+import threading
+import time
+import urllib.request
+from datetime import date, datetime, timedelta
+from email.message import EmailMessage
+from typing import Any, Callable, Dict, List, Mapping, Optional
+
+from cip.projects import DATE_FORMAT
+from cip.store import ProjectStore, open_store
+
+DEFAULT_INTERVAL = 3600.0
+TASK_FIELDS = ('project_id', 'project', 'id', 'task', 'responsible', 'due_date', 'status', 'priority')
+
+
+class MemorySink:
+    """Keeps digests in ``sent`` instead of delivering them."""
+
+    def __init__(self):
+        self.sent: List[Dict[str, Any]] = []
+
+    def send(self, digest: Dict[str, Any]) -> bool:
+        self.sent.append(digest)
+        return True
+
+
+class WebhookSink:
+    """POSTs each digest as JSON to ``url``."""
+
+    def __init__(self, url: str, timeout: float = 10.0, headers: Optional[Mapping[str, str]] = None):
+        self.url = url
+        self.timeout = timeout
+        self.headers = {'Content-Type': 'application/json', **(headers or {})}
+
+    def send(self, digest: Dict[str, Any]) -> bool:
+        request = urllib.request.Request(self.url, data=json.dumps(digest, default=str).encode('utf-8'),
+                                         headers=self.headers, method='POST')
+        with urllib.request.urlopen(request, timeout=self.timeout):
+            return True
+
+
+class SMTPSink:
+    """E-mails each digest to the responsible person's address.
+
+    Responsible names that are e-mail addresses are used as they are, others
+    are looked up in ``addresses``; digests for people without an address
+    are skipped (``send`` returns None).
+    """
+
+    def __init__(self, host: str, sender: str, addresses: Optional[Mapping[str, str]] = None,
+                 port: int = 587, username: Optional[str] = None, password: Optional[str] = None,
+                 starttls: bool = True, timeout: float = 30.0):
+        self.host = host
+        self.port = port
+        self.sender = sender
+        self.addresses = dict(addresses or {})
+        self.username = username
+        self.password = password
+        self.starttls = starttls
+        self.timeout = timeout
+
+    def address(self, responsible: str) -> Optional[str]:
+        return responsible if '@' in responsible else self.addresses.get(responsible)
+
+    def send(self, digest: Dict[str, Any]) -> Optional[bool]:
+        recipient = self.address(digest['responsible'])
+        if not recipient:
+            return None
+        message = EmailMessage()
+        message['From'] = self.sender
+        message['To'] = recipient
+        message['Subject'] = digest['subject']
+        message.set_content(digest['text'])
+        with smtplib.SMTP(self.host, self.port, timeout=self.timeout) as smtp:
+            if self.starttls:
+                smtp.starttls()
+            if self.username:
+                smtp.login(self.username, self.password or '')
+            smtp.send_message(message)
+        return True
+
+
+def sink_from_env(environ: Mapping[str, str] = os.environ):
+    """Sink configured by ``CIP_REMINDER_WEBHOOK`` or ``CIP_SMTP_HOST`` (None if neither is set)."""
+    if environ.get('CIP_REMINDER_WEBHOOK'):
+        return WebhookSink(environ['CIP_REMINDER_WEBHOOK'])
+    if environ.get('CIP_SMTP_HOST'):
+        addresses = {}
+        if environ.get('CIP_REMINDER_ADDRESSES'):
+            with open(environ['CIP_REMINDER_ADDRESSES'], encoding='utf-8') as fh:
+                addresses = json.load(fh)
+        return SMTPSink(environ['CIP_SMTP_HOST'], environ.get('CIP_SMTP_SENDER', 'cip@localhost'), addresses,
+                        port=int(environ.get('CIP_SMTP_PORT', '587')), username=environ.get('CIP_SMTP_USER'),
+                        password=environ.get('CIP_SMTP_PASSWORD'),
+                        starttls=environ.get('CIP_SMTP_STARTTLS', '1') != '0')
+    return None
+
+
+def build_digests(rows: List[tuple], today: date) -> List[Dict[str, Any]]:
+    """One digest per responsible person from ``ProjectStore.overdue_tasks`` rows."""
+    digests: Dict[str, Dict[str, Any]] = {}
+    for row in rows:
+        task = dict(zip(TASK_FIELDS, row))
+        responsible = task['responsible'] or ''
+        digest = digests.get(responsible)
+        if digest is None:
+            digest = digests[responsible] = {'responsible': responsible, 'date': today.isoformat(), 'tasks': []}
+        digest['tasks'].append(task)
+    for digest in digests.values():
+        tasks = digest['tasks']
+        digest['subject'] = f"CIP: {len(tasks)} task{'s' if len(tasks) != 1 else ''} overdue"
+        lines = [f"Hello {digest['responsible'] or 'team'},", "",
+                 "these CIP tasks are past their due date:", ""]
+        lines += [f"- {task['task']} ({task['project']}), due {task['due_date']}" for task in tasks]
+        digest['text'] = '\n'.join(lines) + '\n'
+    return list(digests.values())
+
+
+def reminder_key(task: Dict[str, Any]) -> tuple:
+    return task['id'], task['due_date'], task['responsible']
+
+
+def check_overdue(store: ProjectStore, sink, today: Optional[date] = None, commit: bool = True) -> Dict[str, Any]:
+    """Send digests for the overdue tasks nobody was reminded of yet.
+
+    A task due today counts as overdue, as on the dashboard. The tasks are
+    claimed in the store before sending, so concurrent workers never both
+    send them. A sink returns True for a sent digest, None for a skipped
+    one (no recipient) and False or raises if sending failed; only the
+    claims of failed digests are released, so those tasks alone are tried
+    again by the next check. Skipped digests stay claimed: releasing them
+    would rebuild and skip the same digest on every check. Without
+    ``commit`` nothing is recorded (a dry run).
+    """
+    today = today or date.today()
+    due_before = (today + timedelta(days=1)).strftime(DATE_FORMAT)
+    report = {'due_before': due_before, 'tasks': 0, 'digests': 0, 'skipped': 0, 'errors': []}
+    rows = store.overdue_tasks(due_before, unreminded=True)
+    if commit and rows:
+        # Another worker may have claimed some of them since the read
+        claimed = set(store.claim_reminders([(row[2], row[5], row[4]) for row in rows]))
+        rows = [row for row in rows if (row[2], row[5], row[4]) in claimed]
+    report['tasks'] = len(rows)
+    for digest in build_digests(rows, today):
+        try:
+            sent = sink.send(digest)
+        except Exception as exc:
+            sent = False
+            report['errors'].append((digest['responsible'], str(exc)))
+        else:
+            if sent is None:
+                report['skipped'] += 1
+            elif sent:
+                report['digests'] += 1
+            else:
+                report['errors'].append((digest['responsible'], "not sent"))
+        if commit and sent is False:
+            store.release_reminders([reminder_key(task) for task in digest['tasks']])
+    return report
+
+
+class ReminderScheduler:
+    """Runs ``check_overdue`` every ``interval`` seconds on a daemon thread."""
+
+    def __init__(self, store_factory: Callable[[], ProjectStore], sink, interval: float = DEFAULT_INTERVAL,
+                 today: Callable[[], date] = date.today, commit: bool = True):
+        # The store is opened on the worker thread (store connections are per thread anyway)
+        self.store_factory = store_factory
+        self.sink = sink
+        self.interval = interval
+        self.today = today
+        self.commit = commit
+        self.last_report: Optional[Dict[str, Any]] = None
+        self.last_run: Optional[datetime] = None
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self) -> 'ReminderScheduler':
+        if self._thread is None or not self._thread.is_alive():
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name='cip-reminders', daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self, timeout: Optional[float] = None) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+
+    def run_once(self, store: Optional[ProjectStore] = None) -> Dict[str, Any]:
+        report = check_overdue(store or self.store_factory(), self.sink, self.today(), self.commit)
+        self.last_report, self.last_run = report, datetime.now()
+        return report
+
+    def _run(self) -> None:
+        store = self.store_factory()
+        while not self._stop.is_set():
+            try:
+                self.run_once(store)
+            except Exception as exc:
+                # A broken database or sink must not end the thread; the next check retries
+                self.last_report, self.last_run = {'errors': [(None, str(exc))]}, datetime.now()
+            self._stop.wait(self.interval)
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(prog='python -m cip.reminders',
+                                     description="Send digests of newly overdue CIP tasks.")
+    parser.add_argument('--webhook', help="POST digests as JSON to this URL")
+    parser.add_argument('--smtp', help="SMTP host to e-mail digests through")
+    parser.add_argument('--port', type=int, default=587)
+    parser.add_argument('--sender', default='cip@localhost')
+    parser.add_argument('--addresses', help="JSON file mapping responsible names to e-mail addresses")
+    parser.add_argument('--dry-run', action='store_true', help="print the digests instead of sending them")
+    parser.add_argument('--loop', action='store_true', help="keep checking every --interval seconds")
+    parser.add_argument('--interval', type=float, default=DEFAULT_INTERVAL)
+    parser.add_argument('--store', help="store URL (default: CIP_STORE_URL or cip_projects.db)")
+    args = parser.parse_args(argv)
+
+    if args.dry_run:
+        sink = MemorySink()
+    elif args.webhook:
+        sink = WebhookSink(args.webhook)
+    elif args.smtp:
+        addresses = {}
+        if args.addresses:
+            with open(args.addresses, encoding='utf-8') as fh:
+                addresses = json.load(fh)
+        sink = SMTPSink(args.smtp, args.sender, addresses, port=args.port)
+    else:
+        sink = sink_from_env()
+        if sink is None:
+            parser.error("one of --webhook, --smtp or --dry-run is required (or CIP_REMINDER_WEBHOOK / CIP_SMTP_HOST)")
+
+    scheduler = ReminderScheduler(lambda: open_store(args.store), sink, args.interval, commit=not args.dry_run)
+    while True:
+        report = scheduler.run_once()
+        if args.dry_run:
+            for digest in sink.sent:
+                print(f"To: {digest['responsible'] or '(unassigned)'}\nSubject: {digest['subject']}\n\n{digest['text']}")
+            sink.sent.clear()
+        for responsible, error in report['errors']:
+            print(f"{responsible or '(unassigned)'}: {error}", file=sys.stderr)
+        print(f"{report['tasks']} newly overdue tasks, {report['digests']} digests sent, "
+              f"{report['skipped']} without address", file=sys.stderr)
+        if not args.loop:
+            return 1 if report['errors'] else 0
+        time.sleep(args.interval)
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,357 @@
+"""A3 project reports rendered to static HTML or PDF in a process pool.
+
+A report shows one project on one A3 landscape page: the four PDCA phases,
+the task table and the dashboard charts as static images. Reports are
+rendered by worker processes, each with its own store connection, so the
+Streamlit threads only submit jobs and pick up finished files. Finished
+reports are cached on disk under the project's version (its ``updated_at``
+and that of its KPI series); any change makes a new report, an unchanged
+project is never rendered twice.
+
+Static chart images need the optional ``kaleido`` (without it the chart
+data is shown as a table), PDF output needs the optional ``weasyprint``;
+both are listed in ``requirements-reports.txt``, without them reports are
+HTML only.
+
+Writing a new version of a report removes the older ones. A reader that
+finds its file gone (``FileNotFoundError``) asks for the report again and
+gets the current version.
+
+Usage::
+
+    python -m cip.reports --project <id> --format pdf -o report.pdf
+    python -m cip.reports --completed-in 2024-06 -o june.zip --workers 4
+"""
+import argparse
+import base64
+import hashlib
+import html
+import multiprocessing
+import os
+import sys
+import tempfile
+import threading
+import zipfile
+from concurrent.futures import FIRST_COMPLETED, Future, ProcessPoolExecutor, ThreadPoolExecutor, wait
+from datetime import date
+from typing import Any, Dict, Iterable, List, Optional
+
+from cip import analytics, charts, timeseries
+from cip.projects import calculate_progress
+from cip.store import ProjectStore, open_store
+
+FORMATS = ('html', 'pdf')
+MIME_TYPES = {'html': 'text/html', 'pdf': 'application/pdf', 'zip': 'application/zip'}
+DEFAULT_REPORT_DIR = '.cip_reports'
+# Bumped whenever the layout changes, so cached reports of the old layout are not reused
+LAYOUT_VERSION = 2
+# KPI time series charts per report (the first metrics by name)
+MAX_SERIES_CHARTS = 2
+CHART_SIZE = (520, 300)
+
+PAGE_CSS = """
+@page { size: A3 landscape; margin: 12mm; }
+body { font-family: Helvetica, Arial, sans-serif; font-size: 10pt; color: #222; margin: 0; }
+header { display: flex; justify-content: space-between; align-items: baseline;
+         border-bottom: 3px solid #45B7D1; margin-bottom: 8px; }
+h1 { font-size: 18pt; margin: 0 0 4px 0; }
+h2 { font-size: 12pt; margin: 0 0 6px 0; }
+.grid { display: grid; grid-template-columns: 1fr 1fr; gap: 8px; }
+.phase { border-left: 5px solid; padding: 6px 10px; break-inside: avoid; }
+.plan { border-color: #FF6B6B; background: #FFE5E5; }
+.do { border-color: #4ECDC4; background: #E5F9F6; }
+.check { border-color: #45B7D1; background: #E5F3FF; }
+.act { border-color: #96CEB4; background: #E5F5E5; }
+table { border-collapse: collapse; width: 100%; font-size: 9pt; }
+th, td { border-bottom: 1px solid #ccc; padding: 2px 4px; text-align: left; }
+.charts { display: flex; flex-wrap: wrap; gap: 8px; margin-top: 8px; }
+.charts img { width: 49%; }
+.muted { color: #777; }
+"""
+
+
+def _text(value: Any) -> str:
+    return html.escape(str(value)) if value not in (None, '') else '<span class="muted">–</span>'
+
+
+def _field(label: str, value: Any) -> str:
+    if isinstance(value, list) and value:
+        body = '<ul>' + ''.join(f'<li>{html.escape(str(item))}</li>' for item in value) + '</ul>'
+    else:
+        body = _text(value)
+    return f'<p><b>{html.escape(label)}:</b> {body}</p>'
+
+
+def _table(columns: List[str], rows: Iterable[Iterable[Any]]) -> str:
+    head = ''.join(f'<th>{html.escape(column)}</th>' for column in columns)
+    body = ''.join('<tr>' + ''.join(f'<td>{_text(cell)}</td>' for cell in row) + '</tr>' for row in rows)
+    return f'<table><thead><tr>{head}</tr></thead><tbody>{body}</tbody></table>'
+
+
+def figure_image(fig, data: Dict[str, Any]) -> str:
+    """The figure as an inline SVG image, or ``data`` as a table without ``kaleido``."""
+    try:
+        svg = fig.to_image(format='svg', width=CHART_SIZE[0], height=CHART_SIZE[1])
+    except (ImportError, ValueError, RuntimeError):
+        title = fig.layout.title.text or ''
+        return f'<div><h2>{html.escape(title)}</h2>{_table(["", "Value"], data.items())}</div>'
+    return f'<img src="data:image/svg+xml;base64,{base64.b64encode(svg).decode("ascii")}">'
+
+
+def report_charts(store: ProjectStore, project: Dict[str, Any]) -> List[str]:
+    images = []
+    task_df = analytics.tasks_frame(project.get('do', {}).get('implementation_steps', []))
+    if len(task_df):
+        counts = analytics.task_kpis(task_df)['status_counts']
+        images.append(figure_image(charts.build_status_pie(counts), counts))
+    metrics = project.get('check', {}).get('metrics') or {}
+    if metrics:
+        before, after = metrics.get('wait_time_before', 0), metrics.get('wait_time_after', 0)
+        images.append(figure_image(charts.build_improvement_bar(before, after), {'Before': before, 'After': after}))
+    for metric in timeseries.list_series(store, project['id'])['metric'][:MAX_SERIES_CHARTS]:
+        frame = timeseries.downsample(*timeseries.load_series(store, project['id'], metric), max_points=500)
+        summary = {'Points': int(frame['count'].sum()), 'Mean': round(float(frame['mean'].mean()), 2)}
+        images.append(figure_image(charts.build_series_chart(frame, metric), summary))
+    return images
+
+
+def render_html(store: ProjectStore, project: Dict[str, Any]) -> str:
+    """The A3 report of a project loaded from ``store`` as a standalone HTML page."""
+    plan, do, check, act = (project.get(phase) or {} for phase in ('plan', 'do', 'check', 'act'))
+    tasks = do.get('implementation_steps') or []
+    metrics = check.get('metrics') or {}
+    task_rows = [(task.get('task'), task.get('responsible'), task.get('due_date'),
+                  str(task.get('status', '')).replace('_', ' '), task.get('priority')) for task in tasks]
+    improvement = metrics.get('improvement_percent')
+    task_table = _table(['Task', 'Responsible', 'Due', 'Status', 'Priority'], task_rows) if task_rows else _text(None)
+    return f"""<!DOCTYPE html>
+<html><head><meta charset="utf-8"><title>{html.escape(project['name'])}</title>
+<style>{PAGE_CSS}</style></head>
+<body>
+<header><div><h1>{html.escape(project['name'])}</h1>{_text(project.get('description'))}</div>
+<div>Status: <b>{_text(str(project.get('status', '')).replace('_', ' '))}</b> ·
+Progress: <b>{calculate_progress(project):.0f}%</b> · Created: {_text(project.get('created_date'))} ·
+As of {last_change(store, project)[:10]}</div></header>
+<div class="grid">
+<section class="phase plan"><h2>📋 Plan</h2>{_field('Problem', plan.get('problem'))}{_field('Goal', plan.get('goal'))}
+{_field('Root causes', plan.get('root_cause'))}{_field('Actions', plan.get('measures'))}</section>
+<section class="phase do"><h2>🔨 Do</h2>{task_table}</section>
+<section class="phase check"><h2>📊 Check</h2>
+{_field('Before', metrics.get('wait_time_before'))}{_field('After', metrics.get('wait_time_after'))}
+{_field('Improvement', f'{improvement:.1f}%' if improvement is not None else None)}
+{_field('Results', check.get('results'))}</section>
+<section class="phase act"><h2>🎯 Act</h2>{_field('Standardization', act.get('standardization'))}
+{_field('Lessons learned', act.get('lessons_learned'))}{_field('Next steps', act.get('next_steps'))}</section>
+</div>
+<div class="charts">{''.join(report_charts(store, project))}</div>
+</body></html>
+"""
+
+
+def render_pdf(page: str) -> bytes:
+    """PDF of a rendered report page; needs the optional ``weasyprint``."""
+    try:
+        from weasyprint import HTML
+    except ImportError as exc:
+        raise RuntimeError("PDF reports require weasyprint (pip install weasyprint)") from exc
+    return HTML(string=page).write_pdf()
+
+
+def series_updated(store: ProjectStore, project_id: str) -> str:
+    return max((row[4] for row in store.metric_series(project_id)), default='')
+
+
+def last_change(store: ProjectStore, header: Dict[str, Any]) -> str:
+    """Timestamp of the newest change the report shows; reports are dated with it, so cached ones stay right."""
+    return max(header['updated_at'], series_updated(store, header['id']))
+
+
+def project_version(store: ProjectStore, header: Dict[str, Any]) -> str:
+    """Changes whenever anything shown in the report changes: the project or its KPI series."""
+    return f"{header['updated_at']}|{series_updated(store, header['id'])}"
+
+
+def report_path(directory: str, project_id: str, version: str, fmt: str) -> str:
+    payload = f'{project_id}|{version}|{fmt}|{LAYOUT_VERSION}'
+    key = hashlib.blake2b(payload.encode('utf-8'), digest_size=8).hexdigest()
+    return os.path.join(directory, f'{project_id}-{key}.{fmt}')
+
+
+def write_report(store: ProjectStore, project_id: str, fmt: str = 'html',
+                 directory: str = DEFAULT_REPORT_DIR) -> Optional[str]:
+    """Render a project's report into the cache (unless it is there already); None if the project is gone."""
+    if fmt not in FORMATS:
+        raise ValueError(f"Unknown report format: {fmt}")
+    project = store.get_project(project_id)
+    if project is None:
+        return None
+    path = report_path(directory, project_id, project_version(store, project), fmt)
+    if os.path.exists(path):
+        return path
+    page = render_html(store, project)
+    data = render_pdf(page) if fmt == 'pdf' else page.encode('utf-8')
+    os.makedirs(directory, exist_ok=True)
+    fd, tmp = tempfile.mkstemp(dir=directory, prefix='.report')
+    with os.fdopen(fd, 'wb') as out:
+        out.write(data)
+    os.replace(tmp, path)
+    # Reports of older versions of the project are never served again
+    prefix, suffix = f'{project_id}-', f'.{fmt}'
+    for name in os.listdir(directory):
+        if name.startswith(prefix) and name.endswith(suffix) and os.path.join(directory, name) != path:
+            try:
+                os.remove(os.path.join(directory, name))
+            except FileNotFoundError:
+                pass
+    return path
+
+
+# Each worker process opens the store once
+_worker_store: Optional[ProjectStore] = None
+
+
+def _init_worker(store_url: Optional[str]) -> None:
+    global _worker_store
+    _worker_store = open_store(store_url)
+
+
+def _render_job(project_id: str, fmt: str, directory: str) -> Optional[str]:
+    return write_report(_worker_store, project_id, fmt, directory)
+
+
+def completed_in_month(store: ProjectStore, month: date) -> List[str]:
+    """Projects that were completed in ``month`` (and are still completed)."""
+    start = month.replace(day=1)
+    end = start.replace(year=start.year + 1, month=1) if start.month == 12 else start.replace(month=start.month + 1)
+    return store.completed_projects(start.isoformat(), end.isoformat())
+
+
+class ReportQueue:
+    """Renders reports in a process pool; jobs for the same project version are shared.
+
+    The store must be reachable from other processes (a database file, not
+    ``:memory:``).
+    """
+
+    def __init__(self, store: ProjectStore, store_url: Optional[str] = None, directory: str = DEFAULT_REPORT_DIR,
+                 workers: int = 2):
+        self.store = store
+        self.directory = directory
+        self.workers = workers
+        # Spawned, not forked: the parent (e.g. the Streamlit server) runs many threads
+        self._pool = ProcessPoolExecutor(workers, mp_context=multiprocessing.get_context('spawn'),
+                                         initializer=_init_worker, initargs=(store_url,))
+        self._batches = ThreadPoolExecutor(1, thread_name_prefix='cip-report-batch')
+        self._pending: Dict[str, Future] = {}
+        self._lock = threading.Lock()
+
+    def submit(self, project_id: str, fmt: str = 'html') -> Future:
+        """Future of the report's path (None if the project was deleted)."""
+        header = self.store.get_project(project_id, ())
+        if header is None:
+            done: Future = Future()
+            done.set_result(None)
+            return done
+        path = report_path(self.directory, project_id, project_version(self.store, header), fmt)
+        with self._lock:
+            future = self._pending.get(path)
+            if future is not None:
+                return future
+            if os.path.exists(path):
+                future = Future()
+                future.set_result(path)
+                return future
+            future = self._pending[path] = self._pool.submit(_render_job, project_id, fmt, self.directory)
+        future.add_done_callback(lambda _: self._forget(path))
+        return future
+
+    def _forget(self, path: str) -> None:
+        with self._lock:
+            self._pending.pop(path, None)
+
+    def write_batch(self, project_ids: Iterable[str], target, fmt: str = 'html') -> int:
+        """Zip the reports of ``project_ids`` into ``target`` (a path or binary file).
+
+        At most two jobs per worker are in flight and each finished report is
+        copied into the archive from disk, so memory does not grow with the
+        number of projects.
+        """
+        count = 0
+        in_flight = {}
+        with zipfile.ZipFile(target, 'w', zipfile.ZIP_DEFLATED) as archive:
+            def collect(futures):
+                nonlocal count
+                for future in futures:
+                    path = future.result()
+                    while path is not None:
+                        try:
+                            archive.write(path, os.path.basename(path))
+                        except FileNotFoundError:
+                            # The project changed and a newer report replaced this one
+                            path = self.submit(in_flight[future], fmt).result()
+                            continue
+                        count += 1
+                        break
+                    del in_flight[future]
+            for project_id in project_ids:
+                in_flight[self.submit(project_id, fmt)] = project_id
+                if len(in_flight) >= 2 * self.workers:
+                    done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+                    collect(done)
+            collect(list(in_flight))
+        return count
+
+    def submit_batch(self, project_ids: Iterable[str], target, fmt: str = 'html') -> Future:
+        """``write_batch`` in the background; the future holds the number of reports."""
+        return self._batches.submit(self.write_batch, list(project_ids), target, fmt)
+
+    def shutdown(self) -> None:
+        self._batches.shutdown()
+        self._pool.shutdown()
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(prog='python -m cip.reports', description="Render A3 project reports.")
+    selection = parser.add_mutually_exclusive_group(required=True)
+    selection.add_argument('--project', action='append', help="project id (repeatable)")
+    selection.add_argument('--completed-in', metavar='YYYY-MM', help="projects completed in this month")
+    selection.add_argument('--all', action='store_true', help="every project")
+    parser.add_argument('--format', choices=FORMATS, default='html')
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1)
+    parser.add_argument('--dir', default=DEFAULT_REPORT_DIR, help="report cache directory")
+    parser.add_argument('--store', help="store URL (default: CIP_STORE_URL or cip_projects.db)")
+    parser.add_argument('-o', '--output', required=True,
+                        help="report file for a single --project, otherwise a .zip archive")
+    args = parser.parse_args(argv)
+
+    store = open_store(args.store)
+    if args.project:
+        project_ids = args.project
+    elif args.completed_in:
+        project_ids = completed_in_month(store, date.fromisoformat(args.completed_in + '-01'))
+    else:
+        project_ids = [project['id'] for project in store.list_projects()]
+
+    queue = ReportQueue(store, args.store, args.dir, args.workers)
+    try:
+        if args.project and len(project_ids) == 1 and not args.output.endswith('.zip'):
+            path = queue.submit(project_ids[0], args.format).result()
+            if path is None:
+                print(f"No project {project_ids[0]}", file=sys.stderr)
+                return 1
+            with open(path, 'rb') as src, open(args.output, 'wb') as out:
+                out.write(src.read())
+            count = 1
+        else:
+            count = queue.write_batch(project_ids, args.output, args.format)
+    except RuntimeError as exc:
+        print(str(exc), file=sys.stderr)
+        return 1
+    finally:
+        queue.shutdown()
+    print(f"Wrote {count} {args.format.upper()} reports to {args.output}", file=sys.stderr)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
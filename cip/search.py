@@ -0,0 +1,91 @@
+"""Full-text search over the text fields of all projects.
+
+The index lives in the store (an SQLite FTS5 table kept in sync on every
+write), so a query never loads projects. ``build_match`` turns what users
+type into a safe FTS5 expression:
+
+* ``changeover setup`` - both words, anywhere
+* ``chang*`` - prefix match
+* ``"wait time"`` - exact phrase (so is ``wait-time``)
+* ``cause:changeover`` - only in one field (see ``FIELD_ALIASES``)
+* ``changeover OR setup`` - either word
+"""
+import re
+import sqlite3
+from typing import Any, Dict, List
+
+from cip.store import SEARCH_COLUMNS, ProjectStore
+
+FIELD_ALIASES = {
+    'title': 'name',
+    'cause': 'root_cause',
+    'rootcause': 'root_cause',
+    'root': 'root_cause',
+    'measure': 'measures',
+    'result': 'results',
+    'standard': 'standardization',
+    'lessons': 'lessons_learned',
+    'lesson': 'lessons_learned',
+    'next': 'next_steps',
+    'task': 'tasks',
+    'steps': 'tasks',
+}
+
+TOKEN_PATTERN = re.compile(r'(?:(\w+):)?(?:"([^"]*)"|(\S+))')
+WORD_PATTERN = re.compile(r'\w+')
+
+
+def _field(name: str) -> str:
+    name = name.lower()
+    name = FIELD_ALIASES.get(name, name)
+    return name if name in SEARCH_COLUMNS else ''
+
+
+def build_match(query: str) -> str:
+    """FTS5 MATCH expression for a user query ('' when nothing is searchable)."""
+    terms = []
+    for prefix, phrase, word in TOKEN_PATTERN.findall(query):
+        if word == 'OR' and not prefix:
+            if terms and terms[-1] != 'OR':
+                terms.append('OR')
+            continue
+        field = _field(prefix) if prefix else ''
+        if phrase:
+            words = WORD_PATTERN.findall(phrase)
+            if not words:
+                continue
+            term = '"' + ' '.join(words) + '"'
+        else:
+            if prefix and not field:
+                # Not a known field: search "word:rest" as plain text
+                word = f'{prefix} {word}'
+            words = WORD_PATTERN.findall(word)
+            if not words:
+                continue
+            # Quoted, so FTS5 operators typed by users stay plain words; a word the
+            # tokenizer splits (wait-time, e-mail) is matched as a phrase
+            term = '"' + ' '.join(words) + '"'
+            if word.endswith('*'):
+                term += '*'
+        terms.append(f'{field} : {term}' if field else term)
+    while terms and terms[-1] == 'OR':
+        terms.pop()
+    if terms and terms[0] == 'OR':
+        terms.pop(0)
+    return ' '.join(terms)
+
+
+def search_projects(store: ProjectStore, query: str, limit: int = 20) -> List[Dict[str, Any]]:
+    """Best matching projects with a highlighted snippet of the matching text.
+
+    A query FTS5 still rejects finds nothing instead of raising.
+    """
+    match = build_match(query)
+    if not match:
+        return []
+    try:
+        rows = store.search(match, limit)
+    except sqlite3.OperationalError:
+        return []
+    return [{'id': project_id, 'name': name, 'status': status, 'score': score, 'snippet': snippet}
+            for project_id, name, status, score, snippet in rows]
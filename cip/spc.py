@@ -0,0 +1,279 @@
+"""Statistical process control for Check-phase time series.
+
+Control limits for individuals (I-MR) and X-bar/R charts, Western Electric
+rule checks and a before/after significance test, vectorized over the arrays
+returned by ``cip.timeseries.load_series``. ``RunningLimits`` keeps the sums
+behind the limits and reads only the chunks written since its last sync, so
+they are updated as points arrive instead of being recomputed over the whole
+history.
+"""
+import math
+import threading
+from dataclasses import dataclass
+from typing import Any, Dict, Optional, Tuple
+
+import numpy as np
+
+from cip import timeseries
+
+# Control chart constants by subgroup size: (A2, D3, D4, d2)
+CHART_CONSTANTS = {
+    2: (1.880, 0.0, 3.267, 1.128),
+    3: (1.023, 0.0, 2.574, 1.693),
+    4: (0.729, 0.0, 2.282, 2.059),
+    5: (0.577, 0.0, 2.114, 2.326),
+    6: (0.483, 0.0, 2.004, 2.534),
+    7: (0.419, 0.076, 1.924, 2.704),
+    8: (0.373, 0.136, 1.864, 2.847),
+    9: (0.337, 0.184, 1.816, 2.970),
+    10: (0.308, 0.223, 1.777, 3.078),
+}
+
+WESTERN_ELECTRIC_RULES = {
+    1: "1 point beyond 3σ",
+    2: "2 of 3 points beyond 2σ on one side",
+    3: "4 of 5 points beyond 1σ on one side",
+    4: "8 points in a row on one side",
+}
+# rule: (window, points needed in the window, threshold in σ)
+_RULE_WINDOWS = {1: (1, 1, 3.0), 2: (3, 2, 2.0), 3: (5, 4, 1.0), 4: (8, 8, 0.0)}
+
+
+@dataclass(slots=True)
+class Limits:
+    """Limits of the plotted statistic (individual values or subgroup means) and of its range chart."""
+    center: float
+    lcl: float
+    ucl: float
+    sigma: float
+    range_center: float
+    range_lcl: float
+    range_ucl: float
+    subgroup_size: int = 1
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {name: getattr(self, name) for name in self.__slots__}
+
+
+def _constants(subgroup_size: int) -> Tuple[float, float, float, float]:
+    if subgroup_size == 1:
+        # Individuals chart: moving ranges of two consecutive points
+        return 3 / CHART_CONSTANTS[2][3], *CHART_CONSTANTS[2][1:]
+    if subgroup_size not in CHART_CONSTANTS:
+        raise ValueError(f"Subgroup size must be 1 to {max(CHART_CONSTANTS)}")
+    return CHART_CONSTANTS[subgroup_size]
+
+
+def _limits(center: float, range_bar: float, subgroup_size: int) -> Limits:
+    a2, d3, d4, _ = _constants(subgroup_size)
+    center, range_bar = float(center), float(range_bar)
+    return Limits(center, center - a2 * range_bar, center + a2 * range_bar, a2 * range_bar / 3,
+                  range_bar, d3 * range_bar, d4 * range_bar, subgroup_size)
+
+
+def subgroups(values: np.ndarray, size: int) -> Tuple[np.ndarray, np.ndarray]:
+    """Means and ranges of consecutive subgroups; an incomplete last subgroup is left out."""
+    count = len(values) // size
+    groups = np.asarray(values, dtype=float)[:count * size].reshape(count, size)
+    return groups.mean(axis=1), np.ptp(groups, axis=1)
+
+
+def statistic(values: np.ndarray, subgroup_size: int = 1) -> np.ndarray:
+    """The values plotted on the chart: the points themselves or subgroup means."""
+    return np.asarray(values, dtype=float) if subgroup_size == 1 else subgroups(values, subgroup_size)[0]
+
+
+def control_limits(values: np.ndarray, subgroup_size: int = 1) -> Limits:
+    """Individuals (``subgroup_size=1``) or X-bar/R limits from a baseline period."""
+    values = np.asarray(values, dtype=float)
+    if subgroup_size == 1:
+        if len(values) < 2:
+            raise ValueError("At least 2 points are needed for control limits")
+        return _limits(values.mean(), np.abs(np.diff(values)).mean(), 1)
+    means, ranges = subgroups(values, subgroup_size)
+    if len(means) < 2:
+        raise ValueError(f"At least 2 subgroups of {subgroup_size} points are needed for control limits")
+    return _limits(means.mean(), ranges.mean(), subgroup_size)
+
+
+def western_electric(points: np.ndarray, limits: Limits) -> Dict[int, np.ndarray]:
+    """Mask per rule, True at the last point of every window that breaks it."""
+    with np.errstate(divide='ignore', invalid='ignore'):
+        z = np.nan_to_num((np.asarray(points, dtype=float) - limits.center) / limits.sigma, nan=0.0)
+    masks = {}
+    for rule, (window, needed, threshold) in _RULE_WINDOWS.items():
+        hit = np.zeros(len(z), dtype=bool)
+        for side in (1, -1):
+            beyond = (side * z > threshold).astype(np.int32)
+            # Trailing window sums: count of beyond-threshold points among the last ``window``
+            hit |= np.convolve(beyond, np.ones(window, dtype=np.int32))[:len(z)] >= needed
+        masks[rule] = hit
+    return masks
+
+
+def violation_counts(masks: Dict[int, np.ndarray]) -> Dict[int, int]:
+    return {rule: int(mask.sum()) for rule, mask in masks.items()}
+
+
+def _betacf(a: float, b: float, x: float) -> float:
+    # Continued fraction of the incomplete beta function (modified Lentz)
+    tiny = 1e-300
+    c, d = 1.0, 1.0 - (a + b) * x / (a + 1.0)
+    d = 1.0 / (d if abs(d) > tiny else tiny)
+    result = d
+    for m in range(1, 500):
+        for numerator in (m * (b - m) * x / ((a + 2 * m - 1) * (a + 2 * m)),
+                          -(a + m) * (a + b + m) * x / ((a + 2 * m) * (a + 2 * m + 1))):
+            d = 1.0 + numerator * d
+            d = 1.0 / (d if abs(d) > tiny else tiny)
+            c = 1.0 + numerator / c
+            c = c if abs(c) > tiny else tiny
+            delta = d * c
+            result *= delta
+        if abs(delta - 1.0) < 1e-14:
+            break
+    return result
+
+
+def _betainc(a: float, b: float, x: float) -> float:
+    """Regularized incomplete beta function I_x(a, b)."""
+    if x <= 0.0:
+        return 0.0
+    if x >= 1.0:
+        return 1.0
+    front = math.exp(math.lgamma(a + b) - math.lgamma(a) - math.lgamma(b) + a * math.log(x) + b * math.log1p(-x))
+    if x < (a + 1.0) / (a + b + 2.0):
+        return front * _betacf(a, b, x) / a
+    return 1.0 - front * _betacf(b, a, 1.0 - x) / b
+
+
+def welch_test(before: np.ndarray, after: np.ndarray, alpha: float = 0.05) -> Dict[str, Any]:
+    """Welch's two-sample t-test for a change in the mean (two-sided)."""
+    before, after = np.asarray(before, dtype=float), np.asarray(after, dtype=float)
+    result: Dict[str, Any] = {'before_mean': float(before.mean()) if len(before) else None,
+                              'after_mean': float(after.mean()) if len(after) else None,
+                              't': None, 'df': None, 'p_value': None, 'significant': False}
+    if len(before) < 2 or len(after) < 2:
+        return result
+    var_before, var_after = before.var(ddof=1) / len(before), after.var(ddof=1) / len(after)
+    standard_error = math.sqrt(var_before + var_after)
+    difference = result['after_mean'] - result['before_mean']
+    if standard_error == 0:
+        # Two constant samples: any difference is certain, none is no evidence at all
+        result.update(p_value=0.0 if difference else 1.0, significant=bool(difference))
+        return result
+    t = difference / standard_error
+    df = (var_before + var_after) ** 2 / (var_before ** 2 / (len(before) - 1) + var_after ** 2 / (len(after) - 1))
+    p_value = float(_betainc(df / 2, 0.5, df / (df + t * t)))
+    # Plain floats and bools, so the result serializes as JSON (the API returns it as is)
+    result.update(t=float(t), df=float(df), p_value=p_value, significant=bool(p_value < alpha))
+    return result
+
+
+def compare_phases(ts: np.ndarray, values: np.ndarray, change_at: Any, subgroup_size: int = 1,
+                   alpha: float = 0.05) -> Dict[str, Any]:
+    """Check-phase verification: limits from the points before ``change_at``,
+    rule violations among the points after it and a significance test of the shift."""
+    split = np.searchsorted(ts, timeseries.millis(change_at), 'left')
+    before, after = values[:split], values[split:]
+    limits = control_limits(before, subgroup_size)
+    return {
+        'limits': limits,
+        'violations': violation_counts(western_electric(statistic(after, subgroup_size), limits)),
+        'test': welch_test(before, after, alpha),
+    }
+
+
+class RunningLimits:
+    """Control limits over a growing series, updated with each batch of new points.
+
+    Only sums, the carried-over tail (last value or incomplete subgroup) and
+    a copy of the newest chunk are kept, so an update costs as much as the
+    new points, not the history.
+    """
+
+    def __init__(self, subgroup_size: int = 1):
+        _constants(subgroup_size)
+        self.subgroup_size = subgroup_size
+        self._lock = threading.RLock()
+        self.reset()
+
+    def reset(self) -> None:
+        self.points = 0
+        self.last_ts: Optional[int] = None
+        # Series version (latest chunk ``updated_at``) and newest chunk the sums were built from
+        self.version: Optional[str] = None
+        self._last_bucket: Optional[int] = None
+        self._last_chunk = (np.empty(0, dtype=timeseries.TS_DTYPE), np.empty(0, dtype=timeseries.VALUE_DTYPE))
+        self._sum = 0.0
+        self._count = 0
+        self._range_sum = 0.0
+        self._range_count = 0
+        self._tail = np.empty(0)
+
+    def update(self, values: np.ndarray, ts: Optional[np.ndarray] = None) -> 'RunningLimits':
+        values = np.asarray(values, dtype=float)
+        with self._lock:
+            self.points += len(values)
+            if ts is not None and len(ts):
+                self.last_ts = int(ts[-1])
+            joined = np.r_[self._tail, values]
+            if self.subgroup_size == 1:
+                self._sum += values.sum()
+                self._count += len(values)
+                self._range_sum += np.abs(np.diff(joined)).sum()
+                self._range_count += max(len(joined) - 1, 0)
+                self._tail = joined[-1:]
+            else:
+                means, ranges = subgroups(joined, self.subgroup_size)
+                self._sum += means.sum()
+                self._count += len(means)
+                self._range_sum += ranges.sum()
+                self._range_count += len(ranges)
+                self._tail = joined[len(means) * self.subgroup_size:]
+        return self
+
+    def sync(self, store, project_id: str, metric: str, version: str, points: int) -> 'RunningLimits':
+        """Bring the limits up to the stored series at ``version`` (its latest chunk write) with ``points`` points.
+
+        Only chunks written since the last sync are read. Appends (new daily
+        chunks, or points added at the end of the newest one) are added to
+        the sums; a rewrite of earlier points, e.g. corrected values
+        re-ingested at existing timestamps, rebuilds the limits chunk by chunk.
+        """
+        with self._lock:
+            if version == self.version and points == self.points:
+                return self
+            changed = store.metric_chunks(project_id, metric, updated_since=self.version) if self.version else None
+            if changed is None or not self._append(changed) or self.points != points:
+                self._rebuild(store.metric_chunks(project_id, metric))
+            self.version = version
+            return self
+
+    def _append(self, chunks) -> bool:
+        """Add appended points of changed chunks; False if earlier points changed (nothing is added then)."""
+        decoded = [(bucket, np.frombuffer(ts, dtype=timeseries.TS_DTYPE),
+                    np.frombuffer(value, dtype=timeseries.VALUE_DTYPE)) for bucket, _, ts, value in chunks]
+        for bucket, ts, values in decoded:
+            if self._last_bucket is not None and bucket < self._last_bucket:
+                return False
+            if bucket == self._last_bucket:
+                last_ts, last_values = self._last_chunk
+                if (len(ts) < len(last_ts) or not np.array_equal(ts[:len(last_ts)], last_ts)
+                        or not np.array_equal(values[:len(last_values)], last_values)):
+                    return False
+        for bucket, ts, values in decoded:
+            seen = len(self._last_chunk[0]) if bucket == self._last_bucket else 0
+            self.update(values[seen:], ts[seen:])
+            self._last_bucket, self._last_chunk = bucket, (ts, values)
+        return True
+
+    def _rebuild(self, chunks) -> None:
+        self.reset()
+        self._append(chunks)
+
+    def limits(self) -> Limits:
+        with self._lock:
+            if self._range_count < 1:
+                raise ValueError("Not enough points for control limits yet")
+            return _limits(self._sum / self._count, self._range_sum / self._range_count, self.subgroup_size)
@@ -0,0 +1,227 @@
+"""Lazy imports and a cold-start benchmark of the Streamlit app.
+
+``lazy_import`` registers a module whose code only runs on first attribute
+access, so the app can name the charting and analytics modules (plotly,
+numpy, pandas) at the top without paying for them on a rerun that never
+uses them.
+
+The benchmark runs in fresh interpreters, as after a container cold start:
+
+- imports: ``python -X importtime`` of the app's module-level imports,
+  reported per top-level package and in total;
+- first render: one ``streamlit.testing.v1.AppTest`` run of the app
+  against an empty temporary store (the welcome screen), and which of
+  the lazily imported modules (``DEFERRED_MODULES``) it loaded.
+
+Both are checked against a budget; the exit status is 1 when one is
+exceeded, so a deployment pipeline can fail on a startup regression.
+
+Usage::
+
+    python -m cip.startup
+    python -m cip.startup --repeat 5 --import-budget 1.0 --render-budget 2.5 -o startup.json
+"""
+import argparse
+import ast
+import importlib.util
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from typing import Any, Dict, List, Optional
+
+# Budgets in seconds (median of --repeat cold runs)
+IMPORT_BUDGET = 1.5
+RENDER_BUDGET = 3.0
+IMPORTS_MARKER = '-- app imports --'
+# Modules the first render must not load (the app imports them lazily)
+DEFERRED_MODULES = ('pandas', 'numpy', 'plotly', 'pyarrow', 'cip.analytics', 'cip.charts', 'cip.portfolio',
+                    'cip.reports', 'cip.spc', 'cip.task_table', 'cip.timeseries')
+DEFAULT_SCRIPT = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'app.py')
+
+_lazy_types = set()
+
+
+def lazy_import(name: str):
+    """Module ``name``, imported now but executed on first attribute access."""
+    module = sys.modules.get(name)
+    if module is not None:
+        return module
+    spec = importlib.util.find_spec(name)
+    if spec is None:
+        raise ModuleNotFoundError(f"No module named {name!r}", name=name)
+    loader = importlib.util.LazyLoader(spec.loader)
+    spec.loader = loader
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[name] = module
+    loader.exec_module(module)
+    _lazy_types.add(type(module))
+    return module
+
+
+def is_loaded(name: str) -> bool:
+    """Whether module ``name`` has been executed (a pending lazy import has not)."""
+    module = sys.modules.get(name)
+    return module is not None and type(module) not in _lazy_types
+
+
+def module_imports(script: str) -> str:
+    """The module-level import statements of ``script`` as source."""
+    with open(script, encoding='utf-8') as fh:
+        tree = ast.parse(fh.read(), script)
+    return '\n'.join(ast.unparse(node) for node in tree.body if isinstance(node, (ast.Import, ast.ImportFrom)))
+
+
+def parse_importtime(output: str) -> List[Dict[str, Any]]:
+    """Top-level entries of ``-X importtime`` output with self and cumulative seconds.
+
+    Imports the interpreter itself makes on start (before ``IMPORTS_MARKER``) are left out.
+    """
+    rows = []
+    if IMPORTS_MARKER in output:
+        output = output.split(IMPORTS_MARKER, 1)[1]
+    for line in output.splitlines():
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        self_us, cumulative_us, name = line[len('import time:'):].split('|', 2)
+        if name.startswith('  '):
+            continue  # imported by another module, already in its cumulative time
+        rows.append({'module': name.strip(), 'self': int(self_us) / 1e6, 'cumulative': int(cumulative_us) / 1e6})
+    return rows
+
+
+def measure_imports(script: str = DEFAULT_SCRIPT) -> Dict[str, Any]:
+    """Import time of ``script``'s module-level imports in a fresh interpreter."""
+    code = f"import sys; sys.stderr.write({IMPORTS_MARKER + chr(10)!r})\n{module_imports(script)}"
+    result = subprocess.run([sys.executable, '-X', 'importtime', '-c', code],
+                            cwd=os.path.dirname(os.path.abspath(script)), capture_output=True, text=True)
+    if result.returncode:
+        missing = result.stderr.rstrip().rpartition('\n')[2]
+        if missing.startswith('ModuleNotFoundError'):
+            raise RuntimeError(f"importing the app's modules failed: {missing}")
+        raise RuntimeError(f"importing the app's modules failed:\n{result.stderr[-2000:]}")
+    modules = parse_importtime(result.stderr)
+    return {'seconds': sum(row['cumulative'] for row in modules), 'modules': modules}
+
+
+RENDER_CODE = """
+import json, sys, time
+from streamlit.testing.v1 import AppTest
+from cip.startup import DEFERRED_MODULES, is_loaded
+# Modules Streamlit itself already loaded are not the app's doing
+before = {name for name in DEFERRED_MODULES if is_loaded(name)}
+started = time.perf_counter()
+app = AppTest.from_file(sys.argv[1], default_timeout=float(sys.argv[2])).run()
+seconds = time.perf_counter() - started
+loaded = [name for name in DEFERRED_MODULES if name not in before and is_loaded(name)]
+print(json.dumps({'seconds': seconds, 'loaded': loaded, 'exceptions': [str(e.value) for e in app.exception]}))
+"""
+
+
+def measure_first_render(script: str = DEFAULT_SCRIPT, store_url: Optional[str] = None,
+                         timeout: float = 60.0) -> Dict[str, Any]:
+    """Time of the app's first run in a fresh interpreter (its imports included).
+
+    ``process`` also covers interpreter start and importing Streamlit, ``loaded``
+    lists the DEFERRED_MODULES the run loaded. Without
+    ``store_url`` the app runs against an empty store in a temporary directory.
+    """
+    with tempfile.TemporaryDirectory(prefix='cip-startup-') as tmp:
+        env = dict(os.environ, CIP_STORE_URL=store_url or os.path.join(tmp, 'startup.db'))
+        env.pop('CIP_METRICS_PORT', None)
+        started = time.perf_counter()
+        result = subprocess.run([sys.executable, '-c', RENDER_CODE, os.path.abspath(script), str(timeout)],
+                                cwd=os.path.dirname(os.path.abspath(script)), env=env,
+                                capture_output=True, text=True)
+        process = time.perf_counter() - started
+    if result.returncode:
+        if 'streamlit' in result.stderr and 'No module named' in result.stderr:
+            raise RuntimeError("The first-render benchmark requires streamlit (pip install streamlit)")
+        raise RuntimeError(f"running the app failed:\n{result.stderr[-2000:]}")
+    render = json.loads(result.stdout.strip().splitlines()[-1])
+    if render['exceptions']:
+        raise RuntimeError(f"the app raised on its first run: {render['exceptions'][0]}")
+    return {'seconds': render['seconds'], 'process': process, 'loaded': render['loaded']}
+
+
+def run_startup(script: str = DEFAULT_SCRIPT, repeat: int = 3, store_url: Optional[str] = None,
+                render: bool = True) -> Dict[str, Any]:
+    """Median import and first-render times over ``repeat`` cold runs."""
+    if repeat < 1:
+        raise ValueError("repeat must be at least 1")
+    imports = sorted((measure_imports(script) for _ in range(repeat)), key=lambda run: run['seconds'])
+    document = {'script': script, 'repeat': repeat, 'python': sys.version.split()[0],
+                'imports': {'median': statistics.median(run['seconds'] for run in imports),
+                            'runs': [run['seconds'] for run in imports],
+                            # Slowest packages of the median run
+                            'modules': sorted(imports[len(imports) // 2]['modules'],
+                                              key=lambda row: -row['cumulative'])}}
+    if render:
+        renders = [measure_first_render(script, store_url) for _ in range(repeat)]
+        document['render'] = {'median': statistics.median(run['seconds'] for run in renders),
+                              'process_median': statistics.median(run['process'] for run in renders),
+                              'runs': [run['seconds'] for run in renders],
+                              'loaded': sorted({name for run in renders for name in run['loaded']})}
+    return document
+
+
+def check_budget(document: Dict[str, Any], import_budget: float = IMPORT_BUDGET,
+                 render_budget: float = RENDER_BUDGET) -> List[str]:
+    """Descriptions of the budgets ``document`` exceeds (empty when within budget).
+
+    Loading any of DEFERRED_MODULES on the first render counts as exceeding it.
+    """
+    exceeded = []
+    if document['imports']['median'] > import_budget:
+        exceeded.append(f"imports take {document['imports']['median']:.2f} s (budget {import_budget:.2f} s)")
+    if 'render' in document and document['render']['median'] > render_budget:
+        exceeded.append(f"first render takes {document['render']['median']:.2f} s (budget {render_budget:.2f} s)")
+    if document.get('render', {}).get('loaded'):
+        exceeded.append(f"first render loads {', '.join(document['render']['loaded'])}")
+    return exceeded
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(prog='python -m cip.startup',
+                                     description="Measure cold-start import and first-render time of the app.")
+    parser.add_argument('--script', default=DEFAULT_SCRIPT)
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--top', type=int, default=15, help="slowest imported packages to list")
+    parser.add_argument('--store', help="store URL to render against (default: an empty temporary store)")
+    parser.add_argument('--imports-only', action='store_true', help="skip the first-render benchmark")
+    parser.add_argument('--import-budget', type=float, default=IMPORT_BUDGET)
+    parser.add_argument('--render-budget', type=float, default=RENDER_BUDGET)
+    parser.add_argument('-o', '--output', help="write the results as JSON")
+    args = parser.parse_args(argv)
+
+    try:
+        document = run_startup(args.script, args.repeat, args.store, not args.imports_only)
+    except ValueError as exc:
+        parser.error(str(exc))
+    except RuntimeError as exc:
+        print(exc, file=sys.stderr)
+        return 2
+    imports = document['imports']
+    print(f"imports: {imports['median']:.3f} s (budget {args.import_budget:.2f} s)", file=sys.stderr)
+    for row in imports['modules'][:args.top]:
+        print(f"  {row['cumulative']:8.3f} s  {row['module']}", file=sys.stderr)
+    if 'render' in document:
+        render = document['render']
+        print(f"first render: {render['median']:.3f} s (budget {args.render_budget:.2f} s), "
+              f"{render['process_median']:.3f} s from process start", file=sys.stderr)
+    exceeded = check_budget(document, args.import_budget, args.render_budget)
+    document['exceeded'] = exceeded
+    for line in exceeded:
+        print(f"over budget: {line}", file=sys.stderr)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as out:
+            json.dump(document, out, indent=2)
+            out.write('\n')
+    return 1 if exceeded else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,1211 @@
+"""Persistent project storage.
+
+The app only talks to storage through ``ProjectStore``, so the SQLite default
+can be replaced by another backend registered in ``BACKENDS``. Projects keep
+the same nested dict shape the UI and the JSON export have always used.
+"""
+import json
+import os
+import sqlite3
+import threading
+import uuid
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Tuple
+
+from cip.projects import PHASE_WEIGHTS, combine_progress, do_completion, overdue_cutoff, summarize_project
+
+PHASES = ('plan', 'do', 'check', 'act')
+PROJECT_COLUMNS = ('name', 'description', 'created_date', 'status')
+TASK_COLUMNS = ('task', 'responsible', 'due_date', 'status', 'priority')
+# Maintained by the store: creation time and time of the transition to 'completed'
+TASK_TIMESTAMPS = ('created_at', 'completed_at')
+# Columns the task table may be sorted by ('position' is the order tasks were added in)
+TASK_SORT_COLUMNS = ('position', 'task', 'responsible', 'due_date', 'status', 'priority')
+
+DEFAULT_DB_PATH = 'cip_projects.db'
+
+
+def now_timestamp() -> str:
+    """UTC modification timestamp; the fixed format keeps them sortable as text."""
+    return datetime.now(timezone.utc).strftime('%Y-%m-%dT%H:%M:%S.%fZ')
+
+
+class ProjectStore:
+    """Interface every storage backend implements."""
+
+    @contextmanager
+    def transaction(self):
+        """Group several writes into one unit; backends without transactions just run them."""
+        yield None
+
+    def count_projects(self) -> int:
+        raise NotImplementedError
+
+    def list_projects(self) -> List[Dict[str, Any]]:
+        """Header rows (no phase data) of all projects, oldest first."""
+        raise NotImplementedError
+
+    def get_project(self, project_id: str, phases: Sequence[str] = PHASES) -> Optional[Dict[str, Any]]:
+        """Load a project with only the requested phases filled in."""
+        raise NotImplementedError
+
+    def get_phase(self, project_id: str, phase: str) -> Dict[str, Any]:
+        raise NotImplementedError
+
+    def iter_projects(self, changed_since: Optional[str] = None,
+                      batch_size: int = 200) -> Iterator[Dict[str, Any]]:
+        """Stream full projects (optionally only those updated after ``changed_since``)."""
+        for header in self.list_projects():
+            if changed_since is None or header['updated_at'] > changed_since:
+                yield self.get_project(header['id'])
+
+    def save_project(self, project: Dict[str, Any]) -> str:
+        """Insert or fully replace a project, returning its id."""
+        raise NotImplementedError
+
+    def save_projects(self, projects: Sequence[Dict[str, Any]]) -> List[str]:
+        """Insert or replace many projects in one transaction, returning their ids."""
+        with self.transaction():
+            return [self.save_project(project) for project in projects]
+
+    def existing_project_ids(self, project_ids: Sequence[str]) -> set:
+        return {project_id for project_id in project_ids if self.get_project(project_id, ()) is not None}
+
+    def update_project(self, project_id: str, expected_version: Optional[int] = None,
+                       **fields: Any) -> List[str]:
+        """Update header columns such as name or status.
+
+        With ``expected_version`` nothing is written if the header changed
+        since that version; the fields are then returned as conflicts.
+        """
+        raise NotImplementedError
+
+    def update_phase(self, project_id: str, phase: str, fields: Dict[str, Any],
+                     versions: Optional[Dict[str, int]] = None) -> List[str]:
+        """Write the given fields of one phase, leaving the others untouched."""
+        raise NotImplementedError
+
+    def delete_project(self, project_id: str) -> None:
+        raise NotImplementedError
+
+    def get_tasks(self, project_id: str) -> List[Dict[str, Any]]:
+        raise NotImplementedError
+
+    def task_rows(self, project_id: Optional[str] = None) -> List[tuple]:
+        """Raw task tuples (``project_id``, ``id``, TASK_COLUMNS, TASK_TIMESTAMPS) for analytics."""
+        raise NotImplementedError
+
+    def get_task(self, project_id: str, task_id: str) -> Optional[Dict[str, Any]]:
+        """One task including its ``version``, which every write of the task increments.
+
+        The version checks of ``update_tasks`` and ``delete_tasks`` compare
+        against it, so backends whose ``get_tasks`` rows carry no version
+        override this.
+        """
+        return next((task for task in self.get_tasks(project_id) if task.get('id') == task_id), None)
+
+    def add_task(self, project_id: str, task: Dict[str, Any]) -> str:
+        raise NotImplementedError
+
+    def update_task(self, project_id: str, task_id: str, **fields: Any) -> None:
+        raise NotImplementedError
+
+    def delete_task(self, project_id: str, task_id: str) -> None:
+        raise NotImplementedError
+
+    def query_tasks(self, project_id: str, statuses: Optional[Sequence[str]] = None,
+                    responsible: Optional[str] = None, due_from: Optional[str] = None,
+                    due_to: Optional[str] = None, sort_by: str = 'position',
+                    descending: bool = False, limit: int = 50,
+                    offset: int = 0) -> Tuple[List[Dict[str, Any]], int]:
+        """One filtered, sorted page of a project's tasks plus the total match count."""
+        raise NotImplementedError
+
+    def task_responsibles(self, project_id: str) -> List[str]:
+        raise NotImplementedError
+
+    def update_tasks(self, project_id: str, updates: Dict[str, Dict[str, Any]],
+                     versions: Optional[Dict[str, int]] = None) -> List[str]:
+        """Apply ``{task_id: fields}`` edits in one batch.
+
+        Tasks whose version is no longer ``versions[task_id]`` are left
+        unchanged and returned as conflicts. The checks are only atomic
+        with the writes in a backend whose ``transaction`` is a real one.
+        """
+        versions = versions or {}
+        conflicts = []
+        with self.transaction():
+            for task_id, fields in updates.items():
+                if task_id in versions:
+                    current = self.get_task(project_id, task_id)
+                    if current is None or current.get('version') != versions[task_id]:
+                        conflicts.append(task_id)
+                        continue
+                self.update_task(project_id, task_id, **fields)
+        return conflicts
+
+    def upsert_tasks(self, project_id: str, tasks: Sequence[Dict[str, Any]]) -> List[str]:
+        """Update tasks whose id exists in the project and append the others, in one transaction."""
+        existing = {task['id'] for task in self.get_tasks(project_id)}
+        ids = []
+        with self.transaction():
+            for task in tasks:
+                fields = {name: value for name, value in task.items() if name in TASK_COLUMNS}
+                if task.get('id') in existing:
+                    self.update_tasks(project_id, {task['id']: fields})
+                    ids.append(task['id'])
+                else:
+                    ids.append(self.add_task(project_id, task))
+        return ids
+
+    def delete_tasks(self, project_id: str, task_ids: Sequence[str],
+                     versions: Optional[Dict[str, int]] = None) -> List[str]:
+        """Delete tasks; with ``versions``, tasks changed since are kept and returned as conflicts."""
+        versions = versions or {}
+        conflicts = []
+        with self.transaction():
+            for task_id in task_ids:
+                if task_id in versions:
+                    current = self.get_task(project_id, task_id)
+                    if current is None:
+                        continue  # already gone: no conflict
+                    if current.get('version') != versions[task_id]:
+                        conflicts.append(task_id)
+                        continue
+                self.delete_task(project_id, task_id)
+        return conflicts
+
+    def revision(self) -> Any:
+        """Cheap token that changes whenever any project changes (for cache keys)."""
+        raise NotImplementedError
+
+    # Concurrency: record versions and the change feed
+    def set_actor(self, actor: Optional[str]) -> None:
+        """Tag the following writes of the calling thread (e.g. with a session id) in the change feed."""
+
+    def record_versions(self, project_id: str) -> Dict[Tuple[str, Optional[str]], int]:
+        """Current versions: ``('project', None)`` for the header, ``(phase, field)`` for phase fields.
+
+        Fields that were never written are absent (version 0).
+        """
+        raise NotImplementedError
+
+    def change_seq(self) -> int:
+        """Sequence number of the latest change of any project (0 if none)."""
+        raise NotImplementedError
+
+    def changes_since(self, seq: int, project_id: Optional[str] = None) -> Optional[List[tuple]]:
+        """(seq, project_id, kind, record, actor) entries after ``seq``, oldest first.
+
+        None when entries after ``seq`` were already pruned, i.e. the caller
+        has to reload everything.
+        """
+        raise NotImplementedError
+
+    def project_summaries(self, statuses: Optional[Sequence[str]] = None,
+                          created_from: Optional[str] = None,
+                          created_to: Optional[str] = None,
+                          progress_from: Optional[float] = None,
+                          progress_to: Optional[float] = None,
+                          by_progress: bool = False) -> List[tuple]:
+        """Precomputed summary rows (SUMMARY_COLUMNS) of the matching projects.
+
+        Rows come in creation order, or by descending progress with ``by_progress``.
+        """
+        raise NotImplementedError
+
+    def completed_projects(self, completed_from: str, completed_to: str) -> List[str]:
+        """Ids of projects with status 'completed' that were completed in [``completed_from``, ``completed_to``).
+
+        Bounds are dates ('%Y-%m-%d') or timestamps as written by ``now_timestamp``.
+        """
+        raise NotImplementedError
+
+    def overdue_counts(self, today: str) -> Dict[str, int]:
+        """Open tasks due before ``today`` ('%Y-%m-%d'), per project."""
+        raise NotImplementedError
+
+    def overdue_tasks(self, due_before: str, unreminded: bool = False) -> List[tuple]:
+        """Open tasks of all projects due before ``due_before`` ('%Y-%m-%d').
+
+        Rows are (project_id, project name, task id, task, responsible,
+        due_date, status, priority), ordered by responsible and due date.
+        With ``unreminded``, tasks with a reminder recorded for their
+        current due date and responsible person are left out; they are
+        still visited, so the cost grows with all open overdue tasks.
+        """
+        raise NotImplementedError
+
+    # Reminders: one record per (task id, due date, responsible); completing a task clears its records
+    def claim_reminders(self, keys: Sequence[Tuple[str, str, str]]) -> List[Tuple[str, str, str]]:
+        """Record reminders for (task id, due date, responsible) keys, returning the ones not recorded before.
+
+        Concurrent workers never both claim the same key.
+        """
+        raise NotImplementedError
+
+    def release_reminders(self, keys: Sequence[Tuple[str, str, str]]) -> None:
+        """Forget recorded reminders (e.g. after sending them failed), so they are sent again."""
+        raise NotImplementedError
+
+    def metric_series(self, project_id: str) -> List[tuple]:
+        """(metric, points, first_ts, last_ts, updated_at) of every time series of a project."""
+        raise NotImplementedError
+
+    def metric_chunks(self, project_id: str, metric: str, start: Optional[int] = None,
+                      end: Optional[int] = None, updated_since: Optional[str] = None) -> List[tuple]:
+        """(bucket, points, ts, value) chunks overlapping [start, end], in time order.
+
+        ``ts`` and ``value`` are the raw column buffers written by ``cip.timeseries``.
+        With ``updated_since``, only chunks written after that ``updated_at`` are returned.
+        """
+        raise NotImplementedError
+
+    def write_metric_chunks(self, project_id: str, chunks: Sequence[tuple]) -> None:
+        """Insert or replace (metric, bucket, points, first_ts, last_ts, ts, value) chunks."""
+        raise NotImplementedError
+
+    def delete_metric_series(self, project_id: str, metric: str) -> None:
+        raise NotImplementedError
+
+    def search(self, match: str, limit: int = 20) -> List[tuple]:
+        """Projects matching a full-text query, best first.
+
+        Rows are (id, name, status, score, snippet); ``match`` uses the FTS5
+        query syntax (see ``cip.search.build_match``).
+        """
+        raise NotImplementedError
+
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS projects (
+    id TEXT PRIMARY KEY,
+    name TEXT NOT NULL,
+    description TEXT NOT NULL DEFAULT '',
+    created_date TEXT,
+    status TEXT NOT NULL DEFAULT 'draft',
+    updated_at TEXT NOT NULL,
+    version INTEGER NOT NULL DEFAULT 1
+);
+CREATE INDEX IF NOT EXISTS idx_projects_status ON projects(status);
+CREATE INDEX IF NOT EXISTS idx_projects_updated_at ON projects(updated_at);
+
+CREATE TABLE IF NOT EXISTS phase_fields (
+    project_id TEXT NOT NULL REFERENCES projects(id) ON DELETE CASCADE,
+    phase TEXT NOT NULL,
+    field TEXT NOT NULL,
+    value TEXT NOT NULL,
+    version INTEGER NOT NULL DEFAULT 1,
+    PRIMARY KEY (project_id, phase, field)
+) WITHOUT ROWID;
+
+CREATE TABLE IF NOT EXISTS implementation_steps (
+    id TEXT PRIMARY KEY,
+    project_id TEXT NOT NULL REFERENCES projects(id) ON DELETE CASCADE,
+    position INTEGER NOT NULL,
+    task TEXT NOT NULL,
+    responsible TEXT NOT NULL DEFAULT '',
+    due_date TEXT,
+    status TEXT NOT NULL DEFAULT 'open',
+    priority TEXT NOT NULL DEFAULT 'medium',
+    created_at TEXT,
+    completed_at TEXT,
+    version INTEGER NOT NULL DEFAULT 1
+);
+CREATE INDEX IF NOT EXISTS idx_steps_project ON implementation_steps(project_id, position);
+CREATE INDEX IF NOT EXISTS idx_steps_status_due ON implementation_steps(status, due_date);
+CREATE INDEX IF NOT EXISTS idx_steps_project_due ON implementation_steps(project_id, due_date);
+
+CREATE TABLE IF NOT EXISTS metrics (
+    project_id TEXT NOT NULL REFERENCES projects(id) ON DELETE CASCADE,
+    name TEXT NOT NULL,
+    value REAL,
+    PRIMARY KEY (project_id, name)
+) WITHOUT ROWID;
+
+CREATE TABLE IF NOT EXISTS project_summaries (
+    project_id TEXT PRIMARY KEY REFERENCES projects(id) ON DELETE CASCADE,
+    progress REAL NOT NULL DEFAULT 0,
+    task_total INTEGER NOT NULL DEFAULT 0,
+    task_open INTEGER NOT NULL DEFAULT 0,
+    task_in_progress INTEGER NOT NULL DEFAULT 0,
+    task_completed INTEGER NOT NULL DEFAULT 0,
+    next_due_date TEXT,
+    improvement_percent REAL,
+    plan_progress REAL NOT NULL DEFAULT 0,
+    do_progress REAL NOT NULL DEFAULT 0,
+    check_progress REAL NOT NULL DEFAULT 0,
+    act_progress REAL NOT NULL DEFAULT 0,
+    task_overdue INTEGER NOT NULL DEFAULT 0,
+    overdue_before TEXT,
+    next_due_after TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_summaries_progress ON project_summaries(progress);
+
+CREATE TABLE IF NOT EXISTS metric_chunks (
+    project_id TEXT NOT NULL REFERENCES projects(id) ON DELETE CASCADE,
+    metric TEXT NOT NULL,
+    bucket INTEGER NOT NULL,
+    points INTEGER NOT NULL,
+    first_ts INTEGER NOT NULL,
+    last_ts INTEGER NOT NULL,
+    ts BLOB NOT NULL,
+    value BLOB NOT NULL,
+    updated_at TEXT NOT NULL
+);
+CREATE UNIQUE INDEX IF NOT EXISTS idx_metric_chunks ON metric_chunks(project_id, metric, bucket);
+
+CREATE TABLE IF NOT EXISTS changes (
+    seq INTEGER PRIMARY KEY AUTOINCREMENT,
+    project_id TEXT NOT NULL,
+    kind TEXT NOT NULL,
+    record TEXT,
+    actor TEXT,
+    changed_at TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_changes_project ON changes(project_id, seq);
+
+CREATE TABLE IF NOT EXISTS task_reminders (
+    task_id TEXT NOT NULL,
+    due_date TEXT NOT NULL,
+    responsible TEXT NOT NULL,
+    sent_at TEXT NOT NULL,
+    PRIMARY KEY (task_id, due_date, responsible)
+) WITHOUT ROWID;
+-- A completed task is reminded again if it is reopened (replaces reinsert tasks, hence the insert trigger)
+CREATE TRIGGER IF NOT EXISTS trg_steps_completed AFTER UPDATE OF status ON implementation_steps
+WHEN NEW.status = 'completed' BEGIN
+    DELETE FROM task_reminders WHERE task_id = NEW.id;
+END;
+CREATE TRIGGER IF NOT EXISTS trg_steps_inserted_completed AFTER INSERT ON implementation_steps
+WHEN NEW.status = 'completed' BEGIN
+    DELETE FROM task_reminders WHERE task_id = NEW.id;
+END;
+CREATE INDEX IF NOT EXISTS idx_projects_created_date ON projects(created_date);
+"""
+
+# Columns added after a table was first released, applied to existing databases
+ADDED_COLUMNS = {
+    'projects': {'version': 'INTEGER NOT NULL DEFAULT 1', 'completed_at': 'TEXT'},
+    'phase_fields': {'version': 'INTEGER NOT NULL DEFAULT 1'},
+    'implementation_steps': {'created_at': 'TEXT', 'completed_at': 'TEXT',
+                             'version': 'INTEGER NOT NULL DEFAULT 1'},
+    'project_summaries': {**{f'{phase}_progress': 'REAL NOT NULL DEFAULT 0' for phase in PHASE_WEIGHTS},
+                          'task_overdue': 'INTEGER NOT NULL DEFAULT 0', 'overdue_before': 'TEXT',
+                          'next_due_after': 'TEXT'},
+}
+
+# Indexes on added columns, created once the columns exist
+ADDED_INDEXES = ('CREATE INDEX IF NOT EXISTS idx_projects_completed_at ON projects(completed_at)',)
+
+# Change feed entries kept for sessions catching up; older ones are pruned
+CHANGE_LOG_SIZE = 10_000
+# Kinds of change feed entries; ``record`` is the phase name or task id
+CHANGE_KINDS = ('project', 'phase', 'task', 'replaced', 'deleted')
+
+PHASE_PROGRESS_FIELDS = tuple(f'{phase}_progress' for phase in PHASE_WEIGHTS)
+SUMMARY_FIELDS = ('progress', 'task_total', 'task_open', 'task_in_progress',
+                  'task_completed', 'next_due_date', 'improvement_percent', *PHASE_PROGRESS_FIELDS)
+# Open tasks due before ``overdue_before`` and the first due date after it; only valid up to that date,
+# so readers go through ``overdue_counts``
+OVERDUE_FIELDS = ('task_overdue', 'overdue_before', 'next_due_after')
+# Task fields whose changes only move the summary's counters (the search document stays the same)
+TASK_COUNTER_FIELDS = {'status', 'due_date', 'priority'}
+TASK_STATUS_COUNTERS = {'open': 'task_open', 'in_progress': 'task_in_progress', 'completed': 'task_completed'}
+SUMMARY_COLUMNS = ('id', 'name', 'status', 'created_date', 'updated_at', *SUMMARY_FIELDS)
+
+TASK_INSERT = (
+    'INSERT INTO implementation_steps (id, project_id, position, task, responsible, due_date, '
+    'status, priority, created_at, completed_at) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)')
+# Reinsert of replaced tasks, carrying on from their previous version
+TASK_REPLACE = (
+    'INSERT INTO implementation_steps (id, project_id, position, task, responsible, due_date, '
+    'status, priority, created_at, completed_at, version) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)')
+PHASE_FIELD_UPSERT = (
+    'INSERT INTO phase_fields (project_id, phase, field, value) VALUES (?, ?, ?, ?) '
+    'ON CONFLICT(project_id, phase, field) DO UPDATE SET value = excluded.value, '
+    'version = phase_fields.version + 1')
+METRIC_INSERT = 'INSERT INTO metrics (project_id, name, value) VALUES (?, ?, ?)'
+# Full-text search: one FTS5 row per project (rowid = projects.rowid), one column per text field
+SEARCH_COLUMNS = {
+    'name': (None, 'name'),
+    'description': (None, 'description'),
+    'problem': ('plan', 'problem'),
+    'goal': ('plan', 'goal'),
+    'root_cause': ('plan', 'root_cause'),
+    'measures': ('plan', 'measures'),
+    'results': ('check', 'results'),
+    'standardization': ('act', 'standardization'),
+    'lessons_learned': ('act', 'lessons_learned'),
+    'next_steps': ('act', 'next_steps'),
+    'tasks': ('do', 'implementation_steps'),
+}
+SEARCH_SCHEMA = (
+    f'CREATE VIRTUAL TABLE IF NOT EXISTS search_index USING fts5({", ".join(SEARCH_COLUMNS)}, '
+    "tokenize = 'unicode61 remove_diacritics 2', prefix = '2 3')")
+SEARCH_INSERT = (f'INSERT INTO search_index (rowid, {", ".join(SEARCH_COLUMNS)}) '
+                 f'VALUES (?{", ?" * len(SEARCH_COLUMNS)})')
+
+
+def search_document(project: Dict[str, Any]) -> Tuple[str, ...]:
+    """Text of every SEARCH_COLUMNS field of a project, in column order."""
+    values = []
+    for phase, field in SEARCH_COLUMNS.values():
+        value = (project.get(phase) or {}).get(field) if phase else project.get(field)
+        if field == 'implementation_steps':
+            value = '\n'.join(f"{task.get('task', '')} {task.get('responsible', '')}" for task in value or [])
+        elif isinstance(value, list):
+            value = '\n'.join(map(str, value))
+        values.append(value or '')
+    return tuple(values)
+
+
+SUMMARY_UPSERT = (
+    f'INSERT OR REPLACE INTO project_summaries (project_id, {", ".join(SUMMARY_FIELDS + OVERDUE_FIELDS)}) '
+    f'VALUES (?{", ?" * len(SUMMARY_FIELDS + OVERDUE_FIELDS)})')
+
+
+class SQLiteProjectStore(ProjectStore):
+    """SQLite backend in WAL mode with one connection per thread.
+
+    Streamlit serves every browser session from its own thread, so each
+    thread gets its own connection while all sessions share one database.
+    """
+
+    def __init__(self, path: str = DEFAULT_DB_PATH):
+        self._local = threading.local()
+        self._keepalive = None
+        if path == ':memory:':
+            # A named shared-cache database lets every thread see the same data
+            self._target, self._uri = f'file:cip-{uuid.uuid4().hex}?mode=memory&cache=shared', True
+            self._keepalive = self._open()
+        else:
+            self._target, self._uri = path, False
+        self._init_schema()
+
+    def _init_schema(self):
+        # executescript() commits on its own, so it runs outside transaction()
+        self.conn.executescript(SCHEMA)
+        added = set()
+        for table, columns in ADDED_COLUMNS.items():
+            existing = {row['name'] for row in self.conn.execute(f'PRAGMA table_info({table})')}
+            for name, declaration in columns.items():
+                if name not in existing:
+                    self.conn.execute(f'ALTER TABLE {table} ADD COLUMN {name} {declaration}')
+                    added.add(table)
+                    if (table, name) == ('projects', 'completed_at'):
+                        # Best guess for projects completed before completion times were recorded
+                        self.conn.execute("UPDATE projects SET completed_at = updated_at WHERE status = 'completed'")
+        for statement in ADDED_INDEXES:
+            self.conn.execute(statement)
+        try:
+            self.conn.execute(SEARCH_SCHEMA)
+            self.has_search = True
+        except sqlite3.OperationalError:
+            # SQLite built without FTS5: everything but search keeps working
+            self.has_search = False
+        # Summaries and search rows for projects written before those tables (or summary columns) existed
+        missing = [row[0] for row in self.conn.execute(
+            'SELECT id FROM projects' if 'project_summaries' in added else
+            'SELECT id FROM projects WHERE id NOT IN (SELECT project_id FROM project_summaries)' +
+            (' OR rowid NOT IN (SELECT rowid FROM search_index)' if self.has_search else ''))]
+        for project_id in missing:
+            with self.transaction() as conn:
+                self._project_changed(conn, project_id)
+
+    def _open(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self._target, uri=self._uri, isolation_level=None,
+                               check_same_thread=False)
+        conn.row_factory = sqlite3.Row
+        conn.execute('PRAGMA journal_mode=WAL')
+        conn.execute('PRAGMA synchronous=NORMAL')
+        conn.execute('PRAGMA foreign_keys=ON')
+        conn.execute('PRAGMA busy_timeout=5000')
+        return conn
+
+    @property
+    def conn(self) -> sqlite3.Connection:
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = self._local.conn = self._open()
+        return conn
+
+    @contextmanager
+    def transaction(self) -> Iterator[sqlite3.Connection]:
+        conn = self.conn
+        if conn.in_transaction:
+            # Nested use joins the outer transaction
+            yield conn
+            return
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            yield conn
+        except BaseException:
+            conn.execute('ROLLBACK')
+            raise
+        conn.execute('COMMIT')
+
+    # Projects
+    def count_projects(self) -> int:
+        return self.conn.execute('SELECT COUNT(*) FROM projects').fetchone()[0]
+
+    def list_projects(self) -> List[Dict[str, Any]]:
+        rows = self.conn.execute(
+            'SELECT id, name, description, created_date, status, updated_at '
+            'FROM projects ORDER BY rowid').fetchall()
+        return [dict(row) for row in rows]
+
+    def get_project(self, project_id, phases=PHASES):
+        row = self.conn.execute(
+            'SELECT id, name, description, created_date, status, updated_at '
+            'FROM projects WHERE id = ?', (project_id,)).fetchone()
+        if row is None:
+            return None
+        project = dict(row)
+        for phase in phases:
+            project[phase] = self.get_phase(project_id, phase)
+        return project
+
+    def get_phase(self, project_id, phase):
+        if phase not in PHASES:
+            raise ValueError(f"Unknown phase: {phase}")
+        data = {row['field']: json.loads(row['value']) for row in self.conn.execute(
+            'SELECT field, value FROM phase_fields WHERE project_id = ? AND phase = ?',
+            (project_id, phase))}
+        if phase == 'do':
+            tasks = self.get_tasks(project_id)
+            if tasks:
+                data['implementation_steps'] = tasks
+        elif phase == 'check':
+            metrics = {row['name']: row['value'] for row in self.conn.execute(
+                'SELECT name, value FROM metrics WHERE project_id = ?', (project_id,))}
+            if metrics:
+                data['metrics'] = metrics
+        return data
+
+    def iter_projects(self, changed_since=None, batch_size=200):
+        # Keyset pagination: each batch costs four indexed queries, whatever the total size
+        last_rowid = 0
+        while True:
+            sql = ('SELECT rowid, id, name, description, created_date, status, updated_at '
+                   'FROM projects WHERE rowid > ?')
+            params = [last_rowid]
+            if changed_since is not None:
+                sql += ' AND updated_at > ?'
+                params.append(changed_since)
+            headers = self.conn.execute(sql + ' ORDER BY rowid LIMIT ?', (*params, batch_size)).fetchall()
+            if not headers:
+                return
+            last_rowid = headers[-1]['rowid']
+            projects = {}
+            for row in headers:
+                project = dict(row)
+                del project['rowid']
+                project.update({phase: {} for phase in PHASES})
+                projects[project['id']] = project
+            ids = list(projects)
+            marks = ', '.join('?' * len(ids))
+            for row in self.conn.execute(
+                    f'SELECT project_id, phase, field, value FROM phase_fields '
+                    f'WHERE project_id IN ({marks})', ids):
+                projects[row['project_id']][row['phase']][row['field']] = json.loads(row['value'])
+            for row in self.conn.execute(
+                    'SELECT project_id, id, task, responsible, due_date, status, priority, '
+                    f'created_at, completed_at FROM implementation_steps WHERE project_id IN ({marks}) '
+                    'ORDER BY project_id, position', ids):
+                task = dict(row)
+                do = projects[task.pop('project_id')]['do']
+                do.setdefault('implementation_steps', []).append(task)
+            for row in self.conn.execute(
+                    f'SELECT project_id, name, value FROM metrics WHERE project_id IN ({marks})', ids):
+                check = projects[row['project_id']]['check']
+                check.setdefault('metrics', {})[row['name']] = row['value']
+            yield from projects.values()
+
+    def save_project(self, project):
+        return self.save_projects([project])[0]
+
+    def save_projects(self, projects):
+        # Rows for all projects are collected first and written with one executemany per table
+        now = now_timestamp()
+        ids, headers, fields, tasks, metrics, summaries = [], [], [], [], [], []
+        for project in projects:
+            project_id = project.get('id') or str(uuid.uuid4())
+            ids.append(project_id)
+            status = project.get('status', 'draft')
+            headers.append((project_id, project.get('name', ''), project.get('description', ''),
+                            project.get('created_date'), status, now,
+                            project.get('completed_at') or (now if status == 'completed' else None)))
+            for phase in PHASES:
+                data = dict(project.get(phase) or {})
+                if phase == 'do':
+                    tasks += [self._task_row(project_id, position, task) for position, task
+                              in enumerate(data.pop('implementation_steps', None) or [])]
+                elif phase == 'check':
+                    metrics += [(project_id, name, value)
+                                for name, value in (data.pop('metrics', None) or {}).items()]
+                fields += [(project_id, phase, field, json.dumps(value, ensure_ascii=False, default=str))
+                           for field, value in data.items()]
+            summary = summarize_project(project)
+            summaries.append((project_id, *(summary[field] for field in SUMMARY_FIELDS + OVERDUE_FIELDS)))
+        with self.transaction() as conn:
+            # A replace is a write of every record: versions go up, so sessions holding older ones conflict
+            conn.executemany(
+                'INSERT INTO projects (id, name, description, created_date, status, updated_at, completed_at) '
+                'VALUES (?, ?, ?, ?, ?, ?, ?) '
+                'ON CONFLICT(id) DO UPDATE SET name = excluded.name, '
+                'description = excluded.description, created_date = excluded.created_date, '
+                'status = excluded.status, updated_at = excluded.updated_at, '
+                "completed_at = CASE WHEN excluded.status = 'completed' "
+                'THEN COALESCE(projects.completed_at, excluded.completed_at) END, '
+                'version = projects.version + 1', headers)
+            stale = set(self._select_in(conn, 'SELECT project_id, phase, field FROM phase_fields', ids))
+            stale -= {row[:3] for row in fields}
+            conn.executemany('DELETE FROM phase_fields WHERE project_id = ? AND phase = ? AND field = ?', stale)
+            conn.executemany(PHASE_FIELD_UPSERT, fields)
+            self._replace_tasks(conn, ids, tasks)
+            conn.executemany('DELETE FROM metrics WHERE project_id = ?', [(project_id,) for project_id in ids])
+            conn.executemany(METRIC_INSERT, metrics)
+            conn.executemany(SUMMARY_UPSERT, summaries)
+            if self.has_search:
+                rowids = self._rowids(conn, ids)
+                conn.executemany('DELETE FROM search_index WHERE rowid = ?',
+                                 [(rowids[project_id],) for project_id in ids])
+                conn.executemany(SEARCH_INSERT, [(rowids[project_id], *search_document(project))
+                                                 for project_id, project in zip(ids, projects)])
+            for project_id in ids:
+                self._log_changes(conn, project_id, 'replaced')
+        return ids
+
+    @staticmethod
+    def _select_in(conn, sql, project_ids):
+        """Rows of ``sql`` restricted to ``project_ids`` (chunked below SQLite's parameter limit)."""
+        rows = []
+        for start in range(0, len(project_ids), 500):
+            chunk = project_ids[start:start + 500]
+            rows += conn.execute(f'{sql} WHERE project_id IN ({", ".join("?" * len(chunk))})', chunk).fetchall()
+        return [tuple(row) for row in rows]
+
+    def _replace_tasks(self, conn, project_ids, rows):
+        """Replace all tasks of ``project_ids`` by TASK_INSERT ``rows``; kept task ids get their version + 1."""
+        versions = dict(self._select_in(conn, 'SELECT id, version FROM implementation_steps', project_ids))
+        conn.executemany('DELETE FROM implementation_steps WHERE project_id = ?',
+                         [(project_id,) for project_id in project_ids])
+        conn.executemany(TASK_REPLACE, [(*row, versions.get(row[0], 0) + 1) for row in rows])
+
+    @staticmethod
+    def _rowids(conn, project_ids):
+        rowids = {}
+        for start in range(0, len(project_ids), 500):
+            chunk = project_ids[start:start + 500]
+            rowids.update(conn.execute(
+                f'SELECT id, rowid FROM projects WHERE id IN ({", ".join("?" * len(chunk))})', chunk))
+        return rowids
+
+    def existing_project_ids(self, project_ids):
+        found = set()
+        project_ids = list(project_ids)
+        # Chunked to stay below SQLite's bound-parameter limit
+        for start in range(0, len(project_ids), 500):
+            chunk = project_ids[start:start + 500]
+            found.update(row[0] for row in self.conn.execute(
+                f'SELECT id FROM projects WHERE id IN ({", ".join("?" * len(chunk))})', chunk))
+        return found
+
+    def update_project(self, project_id, expected_version=None, **fields):
+        unknown = set(fields) - set(PROJECT_COLUMNS)
+        if unknown:
+            raise ValueError(f"Unknown project fields: {sorted(unknown)}")
+        if not fields:
+            return []
+        now = now_timestamp()
+        assignments = ', '.join(f'{name} = ?' for name in fields)
+        params = list(fields.values())
+        if 'status' in fields:
+            # Completion time of the transition to 'completed', as for tasks
+            assignments += ", completed_at = CASE WHEN ? = 'completed' THEN COALESCE(completed_at, ?) END"
+            params += [fields['status'], now]
+        sql = f'UPDATE projects SET {assignments}, version = version + 1, updated_at = ? WHERE id = ?'
+        params += [now, project_id]
+        if expected_version is not None:
+            sql += ' AND version = ?'
+            params.append(expected_version)
+        with self.transaction() as conn:
+            if conn.execute(sql, params).rowcount == 0:
+                return sorted(fields)
+            if {'name', 'description'} & set(fields):
+                self._project_changed(conn, project_id)
+            self._log_changes(conn, project_id, 'project')
+        return []
+
+    def update_phase(self, project_id, phase, fields, versions=None):
+        if phase not in PHASES:
+            raise ValueError(f"Unknown phase: {phase}")
+        conflicts = []
+        with self.transaction() as conn:
+            if versions:
+                current = dict(conn.execute(
+                    'SELECT field, version FROM phase_fields WHERE project_id = ? AND phase = ?',
+                    (project_id, phase)).fetchall())
+                # Tasks and metrics live in their own tables and have no field version
+                conflicts = [field for field in fields
+                             if field in versions and field not in ('implementation_steps', 'metrics')
+                             and current.get(field, 0) != versions[field]]
+                fields = {field: value for field, value in fields.items() if field not in conflicts}
+            if fields:
+                self._write_phase(conn, project_id, phase, fields)
+                self._touch(conn, project_id)
+                self._project_changed(conn, project_id)
+                self._log_changes(conn, project_id, 'phase', [phase])
+        return conflicts
+
+    def delete_project(self, project_id):
+        with self.transaction() as conn:
+            if self.has_search:
+                conn.execute('DELETE FROM search_index WHERE rowid = '
+                             '(SELECT rowid FROM projects WHERE id = ?)', (project_id,))
+            conn.execute('DELETE FROM projects WHERE id = ?', (project_id,))
+            self._log_changes(conn, project_id, 'deleted')
+
+    def _write_phase(self, conn, project_id, phase, fields):
+        fields = dict(fields)
+        if phase == 'do' and 'implementation_steps' in fields:
+            self._replace_tasks(conn, [project_id],
+                                [self._task_row(project_id, position, task)
+                                 for position, task in enumerate(fields.pop('implementation_steps') or [])])
+        elif phase == 'check' and 'metrics' in fields:
+            conn.execute('DELETE FROM metrics WHERE project_id = ?', (project_id,))
+            conn.executemany(
+                METRIC_INSERT,
+                [(project_id, name, value) for name, value in (fields.pop('metrics') or {}).items()])
+        conn.executemany(
+            PHASE_FIELD_UPSERT,
+            [(project_id, phase, field, json.dumps(value, ensure_ascii=False, default=str))
+             for field, value in fields.items()])
+
+    def _touch(self, conn, project_id):
+        conn.execute('UPDATE projects SET updated_at = ? WHERE id = ?', (now_timestamp(), project_id))
+
+    def _project_changed(self, conn, project_id, project=None):
+        # Summary and search document are recomputed only when the project is written, never on read
+        if project is None:
+            project = self.get_project(project_id)
+            if project is None:
+                return
+        summary = summarize_project(project)
+        conn.execute(SUMMARY_UPSERT, (project_id, *(summary[field] for field in SUMMARY_FIELDS + OVERDUE_FIELDS)))
+        if self.has_search:
+            rowid = conn.execute('SELECT rowid FROM projects WHERE id = ?', (project_id,)).fetchone()[0]
+            conn.execute('DELETE FROM search_index WHERE rowid = ?', (rowid,))
+            conn.execute(SEARCH_INSERT, (rowid, *search_document(project)))
+
+    def revision(self):
+        return tuple(self.conn.execute('SELECT COUNT(*), MAX(updated_at) FROM projects').fetchone())
+
+    # Concurrency
+    def set_actor(self, actor):
+        self._local.actor = actor
+
+    def _log_changes(self, conn, project_id, kind, records=(None,)):
+        actor, now = getattr(self._local, 'actor', None), now_timestamp()
+        conn.executemany(
+            'INSERT INTO changes (project_id, kind, record, actor, changed_at) VALUES (?, ?, ?, ?, ?)',
+            [(project_id, kind, record, actor, now) for record in records])
+        # Range delete on the primary key; a no-op until the log outgrows CHANGE_LOG_SIZE
+        conn.execute('DELETE FROM changes WHERE seq <= (SELECT MAX(seq) FROM changes) - ?', (CHANGE_LOG_SIZE,))
+
+    def record_versions(self, project_id):
+        versions = {('project', None): version for (version,) in self.conn.execute(
+            'SELECT version FROM projects WHERE id = ?', (project_id,))}
+        versions.update(((phase, field), version) for phase, field, version in self.conn.execute(
+            'SELECT phase, field, version FROM phase_fields WHERE project_id = ?', (project_id,)))
+        return versions
+
+    def change_seq(self):
+        return self.conn.execute('SELECT COALESCE(MAX(seq), 0) FROM changes').fetchone()[0]
+
+    def changes_since(self, seq, project_id=None):
+        oldest = self.conn.execute('SELECT MIN(seq) FROM changes').fetchone()[0]
+        if oldest is not None and oldest > seq + 1 and seq < self.change_seq():
+            return None
+        sql = 'SELECT seq, project_id, kind, record, actor FROM changes WHERE seq > ?'
+        params = [seq]
+        if project_id is not None:
+            sql += ' AND project_id = ?'
+            params.append(project_id)
+        cursor = self.conn.cursor()
+        cursor.row_factory = None
+        return cursor.execute(sql + ' ORDER BY seq', params).fetchall()
+
+    def project_summaries(self, statuses=None, created_from=None, created_to=None,
+                          progress_from=None, progress_to=None, by_progress=False):
+        columns = ', '.join([f'p.{name}' for name in SUMMARY_COLUMNS[:5]] +
+                            [f's.{name}' for name in SUMMARY_FIELDS])
+        sql = (f'SELECT {columns} FROM projects p '
+               'LEFT JOIN project_summaries s ON s.project_id = p.id')
+        conditions, params = [], []
+        if statuses:
+            conditions.append(f'p.status IN ({", ".join("?" * len(statuses))})')
+            params += list(statuses)
+        if created_from:
+            conditions.append('p.created_date >= ?')
+            params.append(created_from)
+        if created_to:
+            conditions.append('p.created_date <= ?')
+            params.append(created_to)
+        # Progress filters and order are range scans of idx_summaries_progress
+        if progress_from is not None:
+            conditions.append('s.progress >= ?')
+            params.append(progress_from)
+        if progress_to is not None:
+            conditions.append('s.progress <= ?')
+            params.append(progress_to)
+        if conditions:
+            sql += ' WHERE ' + ' AND '.join(conditions)
+        cursor = self.conn.cursor()
+        cursor.row_factory = None
+        order = ' ORDER BY s.progress DESC, p.rowid' if by_progress else ' ORDER BY p.rowid'
+        return cursor.execute(sql + order, params).fetchall()
+
+    def completed_projects(self, completed_from, completed_to):
+        return [row[0] for row in self.conn.execute(
+            "SELECT id FROM projects WHERE completed_at >= ? AND completed_at < ? AND status = 'completed' "
+            'ORDER BY completed_at', (completed_from, completed_to))]
+
+    def overdue_counts(self, today):
+        # The summaries hold the count for the day they were written. Only projects with a task that
+        # came due since (or counted for a later day) are recounted, and the recount is kept
+        stale = [row[0] for row in self.conn.execute(
+            'SELECT project_id FROM project_summaries WHERE overdue_before IS NULL OR overdue_before > ? '
+            'OR (overdue_before < ? AND next_due_after < ?)', (today, today, today))]
+        if stale:
+            with self.transaction() as conn:
+                for project_id in stale:
+                    self._count_overdue(conn, project_id, today)
+        cursor = self.conn.cursor()
+        cursor.row_factory = None
+        return dict(cursor.execute(
+            'SELECT project_id, task_overdue FROM project_summaries WHERE task_overdue > 0').fetchall())
+
+    def overdue_tasks(self, due_before, unreminded=False):
+        # A range scan of idx_steps_status_due per open status (plus a primary-key probe per task), not a
+        # pass over all tasks; with ``unreminded`` every open overdue task is still visited (one
+        # task_reminders lookup each), not just the newly overdue ones
+        sql = ("SELECT t.project_id, p.name, t.id, t.task, t.responsible, t.due_date, t.status, t.priority "
+               "FROM implementation_steps t JOIN projects p ON p.id = t.project_id "
+               "WHERE t.status IN ('open', 'in_progress') AND t.due_date < ?")
+        if unreminded:
+            sql += (' AND NOT EXISTS (SELECT 1 FROM task_reminders r WHERE r.task_id = t.id '
+                    'AND r.due_date = t.due_date AND r.responsible = t.responsible)')
+        cursor = self.conn.cursor()
+        cursor.row_factory = None
+        return cursor.execute(sql + ' ORDER BY t.responsible, t.due_date, t.project_id', (due_before,)).fetchall()
+
+    # Reminders
+    def claim_reminders(self, keys):
+        now = now_timestamp()
+        claimed = []
+        with self.transaction() as conn:
+            for key in keys:
+                if conn.execute('INSERT OR IGNORE INTO task_reminders (task_id, due_date, responsible, sent_at) '
+                                'VALUES (?, ?, ?, ?)', (*key, now)).rowcount:
+                    claimed.append(tuple(key))
+            # Records of tasks deleted since are of no further use
+            conn.execute('DELETE FROM task_reminders WHERE task_id NOT IN (SELECT id FROM implementation_steps)')
+        return claimed
+
+    def release_reminders(self, keys):
+        with self.transaction() as conn:
+            conn.executemany('DELETE FROM task_reminders WHERE task_id = ? AND due_date = ? AND responsible = ?',
+                             [tuple(key) for key in keys])
+
+    # Check-phase time series
+    def metric_series(self, project_id):
+        cursor = self.conn.cursor()
+        cursor.row_factory = None
+        return cursor.execute(
+            'SELECT metric, SUM(points), MIN(first_ts), MAX(last_ts), MAX(updated_at) FROM metric_chunks '
+            'WHERE project_id = ? GROUP BY metric ORDER BY metric', (project_id,)).fetchall()
+
+    def metric_chunks(self, project_id, metric, start=None, end=None, updated_since=None):
+        sql = 'SELECT bucket, points, ts, value FROM metric_chunks WHERE project_id = ? AND metric = ?'
+        params = [project_id, metric]
+        if updated_since is not None:
+            sql += ' AND updated_at > ?'
+            params.append(updated_since)
+        if start is not None:
+            sql += ' AND last_ts >= ?'
+            params.append(start)
+        if end is not None:
+            sql += ' AND first_ts <= ?'
+            params.append(end)
+        cursor = self.conn.cursor()
+        cursor.row_factory = None
+        return cursor.execute(sql + ' ORDER BY bucket', params).fetchall()
+
+    def write_metric_chunks(self, project_id, chunks):
+        now = now_timestamp()
+        with self.transaction() as conn:
+            conn.executemany(
+                'INSERT INTO metric_chunks (project_id, metric, bucket, points, first_ts, last_ts, '
+                'ts, value, updated_at) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?) '
+                'ON CONFLICT(project_id, metric, bucket) DO UPDATE SET points = excluded.points, '
+                'first_ts = excluded.first_ts, last_ts = excluded.last_ts, ts = excluded.ts, '
+                'value = excluded.value, updated_at = excluded.updated_at',
+                [(project_id, *chunk, now) for chunk in chunks])
+
+    def delete_metric_series(self, project_id, metric):
+        with self.transaction() as conn:
+            conn.execute('DELETE FROM metric_chunks WHERE project_id = ? AND metric = ?', (project_id, metric))
+
+    def search(self, match, limit=20):
+        if not self.has_search:
+            raise RuntimeError("Search requires SQLite with the FTS5 extension")
+        cursor = self.conn.cursor()
+        cursor.row_factory = None
+        # bm25() is lower for better matches; name and goal hits weigh more than task text
+        return cursor.execute(
+            "SELECT p.id, p.name, p.status, bm25(search_index, 10, 2, 4, 4, 4, 2, 2, 1, 2, 1, 1) AS score, "
+            "snippet(search_index, -1, '**', '**', '…', 12) "
+            "FROM search_index JOIN projects p ON p.rowid = search_index.rowid "
+            "WHERE search_index MATCH ? ORDER BY score LIMIT ?", (match, limit)).fetchall()
+
+    # Tasks
+    @staticmethod
+    def _task_row(project_id, position, task):
+        now = now_timestamp()
+        status = task.get('status', 'open')
+        completed_at = task.get('completed_at') or (now if status == 'completed' else None)
+        return (task.get('id') or str(uuid.uuid4()), project_id, position,
+                task.get('task', ''), task.get('responsible', ''), task.get('due_date'),
+                status, task.get('priority', 'medium'), task.get('created_at') or now, completed_at)
+
+    def get_tasks(self, project_id):
+        rows = self.conn.execute(
+            'SELECT id, task, responsible, due_date, status, priority, created_at, completed_at '
+            'FROM implementation_steps WHERE project_id = ? ORDER BY position',
+            (project_id,)).fetchall()
+        return [dict(row) for row in rows]
+
+    def task_rows(self, project_id=None):
+        sql = ('SELECT project_id, id, task, responsible, due_date, status, priority, '
+               'created_at, completed_at FROM implementation_steps')
+        cursor = self.conn.cursor()
+        cursor.row_factory = None  # plain tuples are cheaper and what pandas expects
+        if project_id is None:
+            return cursor.execute(sql).fetchall()
+        return cursor.execute(sql + ' WHERE project_id = ? ORDER BY position',
+                              (project_id,)).fetchall()
+
+    def get_task(self, project_id, task_id):
+        row = self.conn.execute(
+            'SELECT id, task, responsible, due_date, status, priority, created_at, completed_at, version '
+            'FROM implementation_steps WHERE id = ? AND project_id = ?', (task_id, project_id)).fetchone()
+        return dict(row) if row is not None else None
+
+    def add_task(self, project_id, task):
+        with self.transaction() as conn:
+            position = conn.execute(
+                'SELECT COALESCE(MAX(position) + 1, 0) FROM implementation_steps WHERE project_id = ?',
+                (project_id,)).fetchone()[0]
+            row = self._task_row(project_id, position, task)
+            conn.execute(TASK_INSERT, row)
+            self._touch(conn, project_id)
+            self._project_changed(conn, project_id)
+            self._log_changes(conn, project_id, 'task', [row[0]])
+        return row[0]
+
+    def query_tasks(self, project_id, statuses=None, responsible=None, due_from=None,
+                    due_to=None, sort_by='position', descending=False, limit=50, offset=0):
+        if sort_by not in TASK_SORT_COLUMNS:
+            raise ValueError(f"Cannot sort tasks by: {sort_by}")
+        conditions, params = ['project_id = ?'], [project_id]
+        if statuses:
+            conditions.append(f'status IN ({", ".join("?" * len(statuses))})')
+            params += list(statuses)
+        if responsible is not None:
+            conditions.append('responsible = ?')
+            params.append(responsible)
+        if due_from:
+            conditions.append('due_date >= ?')
+            params.append(due_from)
+        if due_to:
+            conditions.append('due_date <= ?')
+            params.append(due_to)
+        where = ' AND '.join(conditions)
+        total = self.conn.execute(
+            f'SELECT COUNT(*) FROM implementation_steps WHERE {where}', params).fetchone()[0]
+        direction = 'DESC' if descending else 'ASC'
+        # Tasks without a value sort last in either direction; position keeps ties stable
+        rows = self.conn.execute(
+            'SELECT id, task, responsible, due_date, status, priority, created_at, completed_at, version '
+            f'FROM implementation_steps WHERE {where} '
+            f'ORDER BY {sort_by} IS NULL, {sort_by} {direction}, position LIMIT ? OFFSET ?',
+            (*params, limit, offset)).fetchall()
+        return [dict(row) for row in rows], total
+
+    def task_responsibles(self, project_id):
+        return [row[0] for row in self.conn.execute(
+            'SELECT DISTINCT responsible FROM implementation_steps WHERE project_id = ? '
+            'ORDER BY responsible', (project_id,))]
+
+    def update_task(self, project_id, task_id, **fields):
+        self.update_tasks(project_id, {task_id: fields})
+
+    def update_tasks(self, project_id, updates, versions=None):
+        versions = versions or {}
+        statements = []
+        for task_id, fields in updates.items():
+            unknown = set(fields) - set(TASK_COLUMNS)
+            if unknown:
+                raise ValueError(f"Unknown task fields: {sorted(unknown)}")
+            if fields:
+                statements.append((task_id, fields))
+        if not statements:
+            return []
+        # Status, due date and priority edits only move the summary's counters
+        counters_only = all(set(fields) <= TASK_COUNTER_FIELDS for _, fields in statements)
+        conflicts, applied, transitions = [], [], {}
+        with self.transaction() as conn:
+            for task_id, fields in statements:
+                previous = None
+                if 'status' in fields:
+                    row = conn.execute('SELECT status FROM implementation_steps WHERE id = ? AND project_id = ?',
+                                       (task_id, project_id)).fetchone()
+                    previous = row[0] if row else None
+                assignments = ', '.join(f'{name} = ?' for name in fields)
+                params = list(fields.values())
+                if 'status' in fields:
+                    assignments += (", completed_at = CASE WHEN ? = 'completed' "
+                                    "THEN COALESCE(completed_at, ?) END")
+                    params += [fields['status'], now_timestamp()]
+                sql = (f'UPDATE implementation_steps SET {assignments}, version = version + 1 '
+                       'WHERE id = ? AND project_id = ?')
+                params += [task_id, project_id]
+                if task_id in versions:
+                    sql += ' AND version = ?'
+                    params.append(versions[task_id])
+                if conn.execute(sql, params).rowcount:
+                    applied.append(task_id)
+                    if previous is not None and previous != fields['status']:
+                        transitions[previous] = transitions.get(previous, 0) - 1
+                        transitions[fields['status']] = transitions.get(fields['status'], 0) + 1
+                elif task_id in versions:
+                    conflicts.append(task_id)
+            if applied:
+                self._touch(conn, project_id)
+                if not (counters_only and self._count_transitions(conn, project_id, transitions)):
+                    self._project_changed(conn, project_id)
+                self._log_changes(conn, project_id, 'task', applied)
+        return conflicts
+
+    def _count_transitions(self, conn, project_id, transitions):
+        """Move the summary's task counters by status transitions; False if it has to be recomputed."""
+        if set(transitions) - set(TASK_STATUS_COUNTERS):
+            return False
+        row = conn.execute(
+            f'SELECT {", ".join(TASK_STATUS_COUNTERS.values())}, plan_progress, check_progress, act_progress '
+            'FROM project_summaries WHERE project_id = ?', (project_id,)).fetchone()
+        if row is None:
+            return False
+        counts = {status: row[column] + transitions.get(status, 0) for status, column in TASK_STATUS_COUNTERS.items()}
+        do_progress = do_completion(counts['open'], counts['in_progress'], counts['completed'])
+        progress = combine_progress({'plan': row['plan_progress'], 'do': do_progress,
+                                     'check': row['check_progress'], 'act': row['act_progress']})
+        # Next due date of the open tasks: the first qualifying row of idx_steps_project_due
+        next_due = conn.execute(
+            "SELECT MIN(due_date) FROM implementation_steps WHERE project_id = ? AND status != 'completed' "
+            "AND due_date IS NOT NULL AND due_date != ''", (project_id,)).fetchone()[0]
+        conn.execute(
+            f'UPDATE project_summaries SET {", ".join(f"{column} = ?" for column in TASK_STATUS_COUNTERS.values())}, '
+            'do_progress = ?, progress = ?, next_due_date = ? WHERE project_id = ?',
+            (*counts.values(), do_progress, progress, next_due, project_id))
+        self._count_overdue(conn, project_id, overdue_cutoff())
+        return True
+
+    def _count_overdue(self, conn, project_id, cutoff):
+        # Two range scans of idx_steps_project_due for one project
+        overdue = conn.execute(
+            "SELECT COUNT(*) FROM implementation_steps WHERE project_id = ? AND status != 'completed' "
+            "AND due_date != '' AND due_date < ?", (project_id, cutoff)).fetchone()[0]
+        next_due = conn.execute(
+            "SELECT MIN(due_date) FROM implementation_steps WHERE project_id = ? AND status != 'completed' "
+            "AND due_date >= ?", (project_id, cutoff)).fetchone()[0]
+        conn.execute('UPDATE project_summaries SET task_overdue = ?, overdue_before = ?, next_due_after = ? '
+                     'WHERE project_id = ?', (overdue, cutoff, next_due, project_id))
+
+    def upsert_tasks(self, project_id, tasks):
+        with self.transaction() as conn:
+            existing = {row[0] for row in conn.execute(
+                'SELECT id FROM implementation_steps WHERE project_id = ?', (project_id,))}
+            position = conn.execute(
+                'SELECT COALESCE(MAX(position) + 1, 0) FROM implementation_steps WHERE project_id = ?',
+                (project_id,)).fetchone()[0]
+            ids, updates, rows = [], {}, []
+            for task in tasks:
+                if task.get('id') in existing:
+                    updates[task['id']] = {name: value for name, value in task.items() if name in TASK_COLUMNS}
+                    ids.append(task['id'])
+                else:
+                    rows.append(self._task_row(project_id, position, task))
+                    position += 1
+                    ids.append(rows[-1][0])
+            conn.executemany(TASK_INSERT, rows)
+            if rows:
+                self._log_changes(conn, project_id, 'task', [row[0] for row in rows])
+            if any(updates.values()):
+                # Joins this transaction; its counter-only shortcut does not know about the inserted rows
+                self.update_tasks(project_id, updates)
+            if rows or not any(updates.values()):
+                self._touch(conn, project_id)
+                self._project_changed(conn, project_id)
+        return ids
+
+    def delete_task(self, project_id, task_id):
+        self.delete_tasks(project_id, [task_id])
+
+    def delete_tasks(self, project_id, task_ids, versions=None):
+        versions = versions or {}
+        if not task_ids:
+            return []
+        conflicts, deleted = [], []
+        with self.transaction() as conn:
+            for task_id in task_ids:
+                sql = 'DELETE FROM implementation_steps WHERE id = ? AND project_id = ?'
+                params = [task_id, project_id]
+                if task_id in versions:
+                    sql += ' AND version = ?'
+                    params.append(versions[task_id])
+                if conn.execute(sql, params).rowcount:
+                    deleted.append(task_id)
+                elif task_id in versions and self.get_task(project_id, task_id) is not None:
+                    # Changed by someone else since; a task that is already gone is no conflict
+                    conflicts.append(task_id)
+            if deleted:
+                self._touch(conn, project_id)
+                self._project_changed(conn, project_id)
+                self._log_changes(conn, project_id, 'task', deleted)
+        return conflicts
+
+
+BACKENDS = {'sqlite': SQLiteProjectStore}
+
+
+def open_store(url: Optional[str] = None) -> ProjectStore:
+    """Open the store named by ``url`` (or ``CIP_STORE_URL``).
+
+    ``sqlite:///path/to/file.db`` selects the SQLite backend; a bare path is
+    treated as a SQLite file.
+    """
+    url = url or os.environ.get('CIP_STORE_URL') or DEFAULT_DB_PATH
+    scheme, sep, target = url.partition('://')
+    if not sep:
+        scheme, target = 'sqlite', url
+    elif scheme == 'sqlite':
+        target = target[1:] if target.startswith('/') else target
+    try:
+        backend = BACKENDS[scheme]
+    except KeyError:
+        raise ValueError(f"Unsupported store backend: {scheme}") from None
+    return backend(target)
@@ -0,0 +1,81 @@
+"""Paged task table for the Do tab.
+
+Filtering, sorting and paging happen in the store, so the UI only ever holds
+one page of tasks; edits made in the table are diffed against that page and
+written back in one batch. Each row carries the task's version, so edits of
+tasks someone else changed in the meantime are rejected instead of
+overwriting that change.
+"""
+from datetime import date
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import pandas as pd
+
+from cip.store import TASK_COLUMNS, ProjectStore
+
+EDITABLE_COLUMNS = list(TASK_COLUMNS)
+
+
+def load_task_page(store: ProjectStore, project_id: str, statuses: Optional[Sequence[str]] = None,
+                   responsible: Optional[str] = None, due_from: Optional[date] = None,
+                   due_to: Optional[date] = None, sort_by: str = 'position', descending: bool = False,
+                   page: int = 1, page_size: int = 25) -> Tuple[pd.DataFrame, int]:
+    """One page of tasks as a frame indexed by task id, plus the number of matching tasks.
+
+    Besides the editable columns the frame has the task ``version``.
+    """
+    rows, total = store.query_tasks(
+        project_id, statuses=statuses, responsible=responsible,
+        due_from=due_from.isoformat() if due_from else None,
+        due_to=due_to.isoformat() if due_to else None,
+        sort_by=sort_by, descending=descending,
+        limit=page_size, offset=(page - 1) * page_size)
+    df = pd.DataFrame.from_records(rows, columns=['id', *EDITABLE_COLUMNS, 'version']).set_index('id')
+    # date objects so the table can offer a date picker
+    df['due_date'] = pd.to_datetime(df['due_date'], format='%Y-%m-%d', errors='coerce').dt.date
+    return df, total
+
+
+def _cell(value: Any) -> Any:
+    if value is None or (not isinstance(value, str) and pd.isna(value)):
+        return None
+    if isinstance(value, date):
+        return value.strftime('%Y-%m-%d')
+    return value
+
+
+def diff_task_page(original: pd.DataFrame, edited: pd.DataFrame) -> Dict[str, Dict[str, Any]]:
+    """``{task_id: changed fields}`` between the loaded page and the edited one."""
+    updates = {}
+    for task_id, row in edited[EDITABLE_COLUMNS].iterrows():
+        if task_id not in original.index:
+            continue
+        before = original.loc[task_id]
+        fields = {column: _cell(row[column]) for column in EDITABLE_COLUMNS
+                  if _cell(row[column]) != _cell(before[column])}
+        if fields:
+            updates[task_id] = fields
+    return updates
+
+
+def apply_task_edits(store: ProjectStore, project_id: str, original: pd.DataFrame, edited: pd.DataFrame,
+                     deleted: Sequence[str] = (), versions: Optional[Dict[str, int]] = None
+                     ) -> Tuple[int, int, List[str]]:
+    """Write all edits of a page (and deletions) in one batch; returns (updated, deleted, conflicts).
+
+    ``versions`` are the task versions the edits were made on (default: those
+    of ``original``); tasks changed since are left alone and returned as conflicts.
+    """
+    if versions is None:
+        versions = original['version'].to_dict()
+    updates = {task_id: fields for task_id, fields in diff_task_page(original, edited).items()
+               if task_id not in deleted}
+    with store.transaction():
+        update_conflicts = store.update_tasks(project_id, updates, versions)
+        delete_conflicts = store.delete_tasks(project_id, list(deleted), versions)
+    return (len(updates) - len(update_conflicts), len(deleted) - len(delete_conflicts),
+            update_conflicts + delete_conflicts)
+
+
+def page_count(total: int, page_size: int) -> int:
+    return max(1, -(-total // page_size))
@@ -0,0 +1,195 @@
+"""Per-project KPI time series for the Check phase.
+
+Points are stored column-wise: for every project, metric and UTC day the
+store keeps one chunk holding the timestamps (int64 epoch milliseconds) and
+the values (float64) as raw NumPy buffers. Ingest merges new points into the
+affected daily chunks in one transaction; reads concatenate chunks back into
+two arrays without per-point Python work. Rolling baselines, before/after
+improvement and downsampling for charts are vectorized over those arrays.
+"""
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from cip.projects import improvement_percent
+from cip.store import ProjectStore
+
+CHUNK_MS = 86_400_000  # one chunk per metric and UTC day
+TS_DTYPE = np.dtype('<i8')
+VALUE_DTYPE = np.dtype('<f8')
+DEFAULT_MAX_POINTS = 2000
+
+Series = Tuple[np.ndarray, np.ndarray]
+
+
+def to_millis(timestamps: Any) -> np.ndarray:
+    """Epoch milliseconds from datetimes, ISO strings, datetime64 or epoch-ms numbers."""
+    array = np.asarray(timestamps)
+    if array.dtype.kind in 'iuf':
+        return array.astype(TS_DTYPE)
+    if array.dtype.kind != 'M':
+        # Strings, datetimes and Timestamps; timezone-aware values are converted to UTC
+        array = pd.to_datetime(array.ravel(), utc=True).tz_convert(None).to_numpy()
+    return array.astype('datetime64[ms]').astype(TS_DTYPE)
+
+
+def millis(value: Any) -> Optional[int]:
+    """Epoch milliseconds of a single date, datetime, string or number (None stays None)."""
+    if value is None:
+        return None
+    if isinstance(value, (int, float, np.integer, np.floating)):
+        return int(value)
+    stamp = pd.Timestamp(value)
+    if stamp.tzinfo is not None:
+        stamp = stamp.tz_convert(None)
+    return stamp.value // 1_000_000
+
+
+def window_millis(window: Any) -> int:
+    """Length of a window such as '7D', a timedelta or milliseconds."""
+    if isinstance(window, (int, np.integer)):
+        return int(window)
+    return pd.Timedelta(window).value // 1_000_000
+
+
+def _merge(ts_parts: List[np.ndarray], value_parts: List[np.ndarray]) -> Series:
+    ts = np.concatenate(ts_parts)
+    values = np.concatenate(value_parts)
+    # Stable sort keeps later parts after earlier ones on equal timestamps, so the newest value wins
+    order = np.argsort(ts, kind='stable')
+    ts, values = ts[order], values[order]
+    keep = np.ones(len(ts), dtype=bool)
+    keep[:-1] = ts[1:] != ts[:-1]
+    return ts[keep], values[keep]
+
+
+def ingest(store: ProjectStore, project_id: str, series: Dict[str, Tuple[Any, Any]]) -> int:
+    """Add points of several metrics in one transaction: ``{metric: (timestamps, values)}``.
+
+    A point at the timestamp of a stored one replaces it; NaN values are
+    dropped. Returns the number of points written.
+    """
+    written = 0
+    with store.transaction():
+        chunks = []
+        for metric, (timestamps, values) in series.items():
+            ts = to_millis(timestamps).ravel()
+            values = np.asarray(values, dtype=VALUE_DTYPE).ravel()
+            if len(ts) != len(values):
+                raise ValueError(f"{metric}: {len(ts)} timestamps but {len(values)} values")
+            valid = ~np.isnan(values)
+            ts, values = ts[valid], values[valid]
+            if not len(ts):
+                continue
+            written += len(ts)
+            buckets = ts // CHUNK_MS
+            order = np.argsort(buckets, kind='stable')
+            ts, values, buckets = ts[order], values[order], buckets[order]
+            starts = np.flatnonzero(np.r_[True, buckets[1:] != buckets[:-1]])
+            ends = np.r_[starts[1:], len(ts)]
+            stored = {bucket: (ts_blob, value_blob) for bucket, _, ts_blob, value_blob in store.metric_chunks(
+                project_id, metric, int(buckets[0]) * CHUNK_MS, (int(buckets[-1]) + 1) * CHUNK_MS - 1)}
+            for start, end in zip(starts, ends):
+                bucket = int(buckets[start])
+                ts_parts, value_parts = [ts[start:end]], [values[start:end]]
+                if bucket in stored:
+                    ts_blob, value_blob = stored[bucket]
+                    ts_parts.insert(0, np.frombuffer(ts_blob, dtype=TS_DTYPE))
+                    value_parts.insert(0, np.frombuffer(value_blob, dtype=VALUE_DTYPE))
+                chunk_ts, chunk_values = _merge(ts_parts, value_parts)
+                chunks.append((metric, bucket, len(chunk_ts), int(chunk_ts[0]), int(chunk_ts[-1]),
+                               chunk_ts.tobytes(), chunk_values.tobytes()))
+        store.write_metric_chunks(project_id, chunks)
+    return written
+
+
+def ingest_frame(store: ProjectStore, project_id: str, df: pd.DataFrame) -> int:
+    """Ingest a long-format frame with ``timestamp``, ``metric`` and ``value`` columns."""
+    missing = {'timestamp', 'metric', 'value'} - set(df.columns)
+    if missing:
+        raise ValueError(f"Missing columns: {', '.join(sorted(missing))}")
+    values = pd.to_numeric(df['value'], errors='coerce')
+    return ingest(store, project_id, {
+        str(metric): (df['timestamp'].to_numpy()[index], values.to_numpy()[index])
+        for metric, index in df.groupby('metric', sort=False).indices.items()})
+
+
+def list_series(store: ProjectStore, project_id: str) -> pd.DataFrame:
+    """One row per metric: points, first/last timestamp and last write."""
+    df = pd.DataFrame(store.metric_series(project_id),
+                      columns=['metric', 'points', 'first', 'last', 'updated_at'])
+    for column in ('first', 'last'):
+        df[column] = pd.to_datetime(df[column], unit='ms')
+    return df
+
+
+def load_series(store: ProjectStore, project_id: str, metric: str, start=None, end=None) -> Series:
+    """Timestamps (epoch ms) and values of one metric within [start, end], sorted by time."""
+    start, end = millis(start), millis(end)
+    chunks = store.metric_chunks(project_id, metric, start, end)
+    if not chunks:
+        return np.empty(0, dtype=TS_DTYPE), np.empty(0, dtype=VALUE_DTYPE)
+    ts = np.concatenate([np.frombuffer(chunk[2], dtype=TS_DTYPE) for chunk in chunks])
+    values = np.concatenate([np.frombuffer(chunk[3], dtype=VALUE_DTYPE) for chunk in chunks])
+    # Chunks come in bucket order and are sorted inside, so the whole series is sorted
+    lo = np.searchsorted(ts, start, 'left') if start is not None else 0
+    hi = np.searchsorted(ts, end, 'right') if end is not None else len(ts)
+    return ts[lo:hi], values[lo:hi]
+
+
+def rolling_baseline(ts: np.ndarray, values: np.ndarray, window: Any = '7D') -> np.ndarray:
+    """Trailing mean over the time ``window`` ending at (and including) every point."""
+    if not len(ts):
+        return np.empty(0, dtype=VALUE_DTYPE)
+    sums = np.r_[0.0, np.cumsum(values)]
+    first = np.searchsorted(ts, ts - window_millis(window), 'right')
+    last = np.arange(1, len(ts) + 1)
+    return (sums[last] - sums[first]) / (last - first)
+
+
+def improvement(ts: np.ndarray, values: np.ndarray, change_at: Any, window: Any = None,
+                lower_is_better: bool = True) -> Dict[str, Any]:
+    """Mean before vs. after ``change_at``, optionally only ``window`` on either side.
+
+    ``improvement_percent`` follows the Check tab: positive when the metric
+    moved in the good direction.
+    """
+    change = millis(change_at)
+    split = np.searchsorted(ts, change, 'left')
+    lo, hi = 0, len(ts)
+    if window is not None:
+        width = window_millis(window)
+        lo = np.searchsorted(ts, change - width, 'left')
+        hi = np.searchsorted(ts, change + width, 'left')
+    before, after = values[lo:split], values[split:hi]
+    before_mean = float(before.mean()) if len(before) else None
+    after_mean = float(after.mean()) if len(after) else None
+    percent = None
+    if before_mean is not None and after_mean is not None:
+        percent = improvement_percent(before_mean, after_mean)
+        if percent is not None and not lower_is_better:
+            percent = -percent
+    return {'before_mean': before_mean, 'after_mean': after_mean, 'before_points': len(before),
+            'after_points': len(after), 'improvement_percent': percent}
+
+
+def downsample(ts: np.ndarray, values: np.ndarray, max_points: int = DEFAULT_MAX_POINTS) -> pd.DataFrame:
+    """At most ``max_points`` equal-time buckets with mean, min, max and count.
+
+    Min and max keep spikes visible that a plain mean or every-n-th sample
+    would hide.
+    """
+    if not len(ts):
+        return pd.DataFrame({'time': pd.to_datetime([]), 'mean': [], 'min': [], 'max': [], 'count': []})
+    span = int(ts[-1] - ts[0]) + 1
+    buckets = (ts - ts[0]) * max_points // span
+    starts = np.flatnonzero(np.r_[True, buckets[1:] != buckets[:-1]])
+    counts = np.diff(np.r_[starts, len(ts)])
+    return pd.DataFrame({
+        'time': pd.to_datetime(ts[starts], unit='ms'),
+        'mean': np.add.reduceat(values, starts) / counts,
+        'min': np.minimum.reduceat(values, starts),
+        'max': np.maximum.reduceat(values, starts),
+        'count': counts,
+    })
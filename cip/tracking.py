@@ -0,0 +1,210 @@
+"""Field-level change tracking between the UI and the project store.
+
+Every rerun hands the tracker the full set of widget values and the fields
+the user edited since the last render; only edited fields that differ from
+what was loaded are marked dirty and written, batched into one store
+transaction per flush. The other values follow the store, so a page that
+merely reruns never writes back what it showed.
+
+Writes are optimistic: the tracker remembers the version every field had
+when it was last rendered, and a flush only writes an edit if nobody else
+changed the field since. Fields that lost that race end up in ``conflicts`` instead of
+overwriting the other session's edit. ``apply_changes`` brings a loaded
+project up to date from the store's change feed, re-fetching only the
+records that changed.
+"""
+import copy
+import time
+from typing import Any, Collection, Dict, List, Optional, Sequence, Tuple
+
+from cip.store import PHASES, ProjectStore
+
+# Pseudo-phase for header columns (name, status, ...)
+HEADER = 'project'
+
+
+def _record(phase: str, field: str) -> Tuple[str, Optional[str]]:
+    # The header has one version for all its columns, phase fields have one each
+    return (HEADER, None) if phase == HEADER else (phase, field)
+
+
+class ChangeTracker:
+    def __init__(self, store: ProjectStore, flush_interval: float = 0.0):
+        self.store = store
+        # Seconds to wait between flushes; 0 flushes at every commit boundary
+        self.flush_interval = flush_interval
+        self._snapshot: Dict[Tuple[str, str], Dict[str, Any]] = {}
+        self._dirty: Dict[Tuple[str, str], Dict[str, Any]] = {}
+        # Record versions as loaded, and the version each dirty field was edited on
+        self._versions: Dict[str, Dict[Tuple[str, Optional[str]], int]] = {}
+        self._basis: Dict[Tuple[str, str], Dict[str, int]] = {}
+        # Version every field had when it was last rendered, which the user's next edit is made on
+        self._rendered: Dict[Tuple[str, str], Dict[str, int]] = {}
+        # (project_id, phase, field) edits dropped because someone else changed the field first
+        self.conflicts: List[Tuple[str, str, str]] = []
+        self._last_flush = time.monotonic()
+        self.stats = {'staged': 0, 'written': 0, 'flushes': 0}
+
+    def load_project(self, project: Dict[str, Any]) -> Dict[str, Any]:
+        """Remember the loaded state of a project and overlay pending edits on it."""
+        project_id = project['id']
+        self._versions[project_id] = self.store.record_versions(project_id)
+        header = {key: value for key, value in project.items() if key not in PHASES}
+        project.update(self._load(project_id, HEADER, header))
+        for phase in PHASES:
+            if phase in project:
+                project[phase] = self._load(project_id, phase, project[phase])
+        return project
+
+    def _load(self, project_id, phase, data):
+        key = (project_id, phase)
+        merged = dict(data)
+        merged.update(self._dirty.get(key, {}))
+        self._snapshot[key] = copy.deepcopy(merged)
+        return merged
+
+    def current(self, project_id: str, phase: str) -> Dict[str, Any]:
+        """A copy of a phase as loaded, with the edits staged since applied."""
+        return copy.deepcopy(self._snapshot.get((project_id, phase), {}))
+
+    def stage(self, project_id: str, phase: str, values: Dict[str, Any], edited: Collection[str] = ()) -> int:
+        """Record rendered widget values; returns how many fields became dirty.
+
+        Only the fields in ``edited`` (changed by the user since they were
+        last rendered) are written, on the version they were rendered with.
+        The other values are what the page shows now.
+        """
+        key = (project_id, phase)
+        snapshot = self._snapshot.setdefault(key, {})
+        rendered = self._rendered.setdefault(key, {})
+        basis = self._basis.setdefault(key, {})
+        loaded = self._versions.get(project_id, {})
+        changed = 0
+        for field, value in values.items():
+            self.stats['staged'] += 1
+            if field not in edited or (field in snapshot and snapshot[field] == value):
+                # Shown as loaded (or as staged before): the next edit builds on that version
+                rendered[field] = basis.get(field, loaded.get(_record(phase, field), 0))
+                continue
+            snapshot[field] = copy.deepcopy(value)
+            self._dirty.setdefault(key, {})[field] = snapshot[field]
+            if field not in basis:
+                basis[field] = rendered.get(field, loaded.get(_record(phase, field), 0))
+            rendered[field] = basis[field]
+            changed += 1
+        return changed
+
+    def discard(self, project_id: str) -> None:
+        """Forget pending edits and snapshots of a project (e.g. after deleting it)."""
+        for key in [key for key in self._snapshot if key[0] == project_id]:
+            del self._snapshot[key]
+        for key in [key for key in self._dirty if key[0] == project_id]:
+            self.stats['staged'] -= len(self._dirty.pop(key))
+            self._basis.pop(key, None)
+        for key in [key for key in self._rendered if key[0] == project_id]:
+            del self._rendered[key]
+        self._versions.pop(project_id, None)
+
+    @property
+    def pending(self) -> int:
+        return sum(len(fields) for fields in self._dirty.values())
+
+    def pop_conflicts(self) -> List[Tuple[str, str, str]]:
+        conflicts, self.conflicts = self.conflicts, []
+        return conflicts
+
+    @property
+    def writes_saved(self) -> int:
+        """Field writes avoided compared to writing every staged value."""
+        return self.stats['staged'] - self.stats['written'] - self.pending
+
+    def flush(self, force: bool = False) -> int:
+        """Write dirty fields if the debounce interval has passed (or ``force``)."""
+        if not self._dirty:
+            return 0
+        if not force and time.monotonic() - self._last_flush < self.flush_interval:
+            return 0
+        dirty, self._dirty = self._dirty, {}
+        basis, self._basis = self._basis, {}
+        conflicts = []
+        try:
+            with self.store.transaction():
+                for (project_id, phase), fields in dirty.items():
+                    versions = basis.get((project_id, phase), {})
+                    if phase == HEADER:
+                        # One header version: the oldest one any of the fields was edited on
+                        lost = self.store.update_project(project_id, min(versions.values(), default=None),
+                                                         **fields)
+                    else:
+                        lost = self.store.update_phase(project_id, phase, fields, versions)
+                    conflicts += [(project_id, phase, field) for field in lost]
+        except Exception:
+            # Keep the edits so the next flush retries them
+            for key, fields in dirty.items():
+                self._dirty[key] = {**fields, **self._dirty.get(key, {})}
+                self._basis[key] = {**basis.get(key, {}), **self._basis.get(key, {})}
+            raise
+        lost = set(conflicts)
+        for (project_id, phase), fields in dirty.items():
+            # Our own writes bumped the versions; the next edit builds on them
+            edited_on = basis[(project_id, phase)]
+            versions = self._versions.setdefault(project_id, {})
+            rendered = self._rendered.setdefault((project_id, phase), {})
+            if phase == HEADER:
+                if not lost & {(project_id, phase, field) for field in fields}:
+                    versions[_record(phase, None)] = min(edited_on.values()) + 1
+                    rendered.update(dict.fromkeys(fields, versions[_record(phase, None)]))
+                continue
+            for field in fields:
+                if (project_id, phase, field) not in lost:
+                    versions[_record(phase, field)] = rendered[field] = edited_on[field] + 1
+        self.conflicts += conflicts
+        written = sum(len(fields) for fields in dirty.values()) - len(lost)
+        self.stats['written'] += written
+        self.stats['flushes'] += 1
+        self._last_flush = time.monotonic()
+        return written
+
+
+def apply_changes(store: ProjectStore, project: Dict[str, Any],
+                  changes: Sequence[tuple]) -> Optional[Dict[str, Any]]:
+    """Bring a project loaded from ``store`` up to date with change feed entries.
+
+    Only the header, phases and tasks named in ``changes`` are re-fetched.
+    Returns None when the project was replaced or deleted and has to be
+    loaded anew.
+    """
+    if not changes:
+        return project
+    project = dict(project)
+    tasks = {}
+    for _, _, kind, record, _ in changes:
+        if kind == 'project':
+            continue  # the header is re-fetched below in any case
+        if kind == 'phase':
+            project[record] = store.get_phase(project['id'], record)
+        elif kind == 'task':
+            tasks[record] = None
+        else:
+            return None
+    if tasks:
+        steps = {task['id']: task for task in project.get('do', {}).get('implementation_steps', [])}
+        for task_id in tasks:
+            task = store.get_task(project['id'], task_id)
+            if task is None:
+                steps.pop(task_id, None)
+            else:
+                task.pop('version', None)
+                steps[task_id] = task
+        do = dict(project.get('do', {}))
+        # New tasks are appended, which is where the store puts them too
+        do['implementation_steps'] = list(steps.values())
+        if not steps:
+            del do['implementation_steps']
+        project['do'] = do
+    header = store.get_project(project['id'], ())
+    if header is None:
+        return None
+    # Every write touches updated_at, so the header is always refreshed
+    project.update(header)
+    return project
@@ -0,0 +1,138 @@
+import pytest
+
+pytest.importorskip('fastapi')
+pytest.importorskip('httpx')
+pytest.importorskip('numpy')
+from fastapi.testclient import TestClient  # noqa: E402
+
+from cip.api import create_app  # noqa: E402
+from cip.store import open_store  # noqa: E402
+
+
+@pytest.fixture
+def client():
+    with TestClient(create_app(open_store(':memory:'))) as client:
+        yield client
+
+
+@pytest.fixture
+def project_id(client):
+    return client.post('/projects', json={'name': 'Scrap reduction'}).json()['id']
+
+
+def test_project_crud(client, project_id):
+    project = client.get(f'/projects/{project_id}').json()
+    assert project['name'] == 'Scrap reduction' and project['status'] == 'draft'
+
+    response = client.patch(f'/projects/{project_id}', json={'status': 'in_progress'})
+    assert response.status_code == 200 and response.json()['status'] == 'in_progress'
+    assert client.patch(f'/projects/{project_id}', json={'owner': 'QA'}).status_code == 422
+    assert client.patch(f'/projects/{project_id}', json={'status': 'archived'}).status_code == 422
+
+    phase = client.put(f'/projects/{project_id}/phases/plan', json={'goal': 'Halve scrap'}).json()
+    assert phase == {'goal': 'Halve scrap'}
+    assert client.put(f'/projects/{project_id}/phases/later', json={}).status_code == 404
+    assert client.get(f'/projects/{project_id}/progress').json()['plan_progress'] == 25
+
+    result = client.post(f'/projects/{project_id}/metrics', json={'before': 40, 'after': 30}).json()
+    assert result['metrics']['improvement_percent'] == 25
+    assert client.post(f'/projects/{project_id}/metrics', json={'before': 40}).status_code == 422
+
+    assert [row['id'] for row in client.get('/projects').json()] == [project_id]
+    assert client.post('/projects', json={'id': project_id, 'name': 'Again'}).status_code == 409
+    assert client.delete(f'/projects/{project_id}').status_code == 204
+    assert client.get(f'/projects/{project_id}').status_code == 404
+    assert client.get('/health').json() == {'status': 'ok', 'projects': 0}
+
+
+def test_etag_and_not_modified(client, project_id):
+    response = client.get(f'/projects/{project_id}')
+    etag = response.headers['ETag']
+    response = client.get(f'/projects/{project_id}', headers={'If-None-Match': etag})
+    assert response.status_code == 304 and response.content == b''
+
+    client.patch(f'/projects/{project_id}', json={'name': 'Scrap reduction, line 2'})
+    response = client.get(f'/projects/{project_id}', headers={'If-None-Match': etag})
+    assert response.status_code == 200 and response.headers['ETag'] != etag
+
+    etag = client.get('/projects').headers['ETag']
+    assert client.get('/projects', headers={'If-None-Match': f'W/{etag}'}).status_code == 304
+    client.post('/projects', json={'name': 'Rework'})
+    assert client.get('/projects', headers={'If-None-Match': etag}).status_code == 200
+
+
+def test_if_match_versions(client, project_id):
+    task = client.post(f'/projects/{project_id}/tasks', json={'task': 'Audit', 'due_date': '2024-07-01'}).json()
+    assert task['version'] == 1
+    url = f'/projects/{project_id}/tasks/{task["id"]}'
+
+    response = client.patch(url, json={'status': 'completed'}, headers={'If-Match': '"1"'})
+    assert response.status_code == 200
+    assert response.json()['version'] == 2 and response.json()['completed_at']
+    # Someone else's client still holds version 1
+    assert client.patch(url, json={'status': 'open'}, headers={'If-Match': '1'}).status_code == 412
+    assert client.delete(url, headers={'If-Match': '1'}).status_code == 412
+    assert client.patch(url, json={'status': 'open'}, headers={'If-Match': 'latest'}).status_code == 400
+    assert client.patch(url, json={'status': 'done'}).status_code == 422
+    assert client.delete(url, headers={'If-Match': '2'}).status_code == 204
+    assert client.patch(url, json={'status': 'open'}).status_code == 404
+
+
+def test_batch_upsert(client, project_id):
+    first = client.post(f'/projects/{project_id}/tasks', json={'task': 'Audit'}).json()
+    response = client.post(f'/projects/{project_id}/tasks/batch', json={'tasks': [
+        {'id': first['id'], 'status': 'in_progress'},
+        {'task': 'Train operators', 'responsible': 'Eva Novak'}]})
+    assert response.json()['created'] == 1 and response.json()['updated'] == 1
+    tasks = client.get(f'/projects/{project_id}/tasks').json()
+    assert tasks['total'] == 2
+    assert [task['status'] for task in tasks['tasks']] == ['in_progress', 'open']
+
+    # A new task without its text is rejected, and nothing of the batch is written
+    response = client.post(f'/projects/{project_id}/tasks/batch', json={'tasks': [{'task': 'Ok'}, {'status': 'open'}]})
+    assert response.status_code == 422 and response.json()['detail'] == ['tasks[1].task: required text']
+
+    batch = [{'task': f'Step {index}'} for index in range(1001)]
+    assert client.post(f'/projects/{project_id}/tasks/batch', json={'tasks': batch}).status_code == 413
+    response = client.post(f'/projects/{project_id}/tasks/batch', json={'tasks': batch[:1000]})
+    assert response.json()['created'] == 1000
+    assert client.get(f'/projects/{project_id}/tasks', params={'limit': 1}).json()['total'] == 1002
+
+
+def test_series(client, project_id):
+    timestamps = [f'2024-07-01T{hour:02d}:00:00Z' for hour in range(10)]
+    client.post(f'/projects/{project_id}/series',
+                json={'series': {'wait_time': {'timestamps': timestamps, 'values': list(range(10, 0, -1))}}})
+    assert [row['metric'] for row in client.get(f'/projects/{project_id}/series').json()] == ['wait_time']
+
+    response = client.get(f'/projects/{project_id}/series/wait_time',
+                          params={'change_at': '2024-07-01T05:00:00Z', 'max_points': 10})
+    result = response.json()
+    assert result['points'] == 10 and sum(result['buckets']['count']) == 10
+    assert result['improvement']['before_mean'] == 8 and result['improvement']['after_mean'] == 3
+    etag = response.headers['ETag']
+    assert client.get(f'/projects/{project_id}/series/wait_time', params={'change_at': '2024-07-01T05:00:00Z',
+                      'max_points': 10}, headers={'If-None-Match': etag}).status_code == 304
+    assert client.get(f'/projects/{project_id}/series/scrap').status_code == 404
+    response = client.post(f'/projects/{project_id}/series',
+                           json={'series': {'wait_time': {'timestamps': timestamps, 'values': [1.0]}}})
+    assert response.status_code == 422
+
+
+def test_series_spc(client, project_id):
+    timestamps = [f'2024-07-{day:02d}T08:00:00Z' for day in range(1, 21)]
+    values = [45.0, 47.0, 44.0, 46.0, 48.0, 45.0, 46.0, 47.0, 44.0, 46.0,
+              32.0, 33.0, 31.0, 34.0, 32.0, 30.0, 33.0, 32.0, 31.0, 33.0]
+    response = client.post(f'/projects/{project_id}/series',
+                           json={'series': {'wait_time': {'timestamps': timestamps, 'values': values}}})
+    assert response.json() == {'points': 20}
+
+    response = client.get(f'/projects/{project_id}/series/wait_time/spc', params={'change_at': '2024-07-11'})
+    assert response.status_code == 200
+    result = response.json()
+    assert result['test']['significant'] is True
+    assert result['limits']['center'] == pytest.approx(45.8)
+    assert result['violations']['1'] > 0
+
+    response = client.get(f'/projects/{project_id}/series/wait_time/spc', params={'change_at': '2024-07-02'})
+    assert response.status_code == 422
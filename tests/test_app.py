@@ -0,0 +1,56 @@
+import os
+
+import pytest
+
+pytest.importorskip('streamlit')
+import streamlit as st  # noqa: E402
+from streamlit.testing.v1 import AppTest  # noqa: E402
+
+APP = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'app.py')
+
+
+@pytest.fixture
+def session(tmp_path, monkeypatch):
+    """New browser sessions of the app, all on one store."""
+    monkeypatch.setenv('CIP_STORE_URL', str(tmp_path / 'app.db'))
+    st.cache_resource.clear()
+    yield lambda: AppTest.from_file(APP, default_timeout=30).run()
+    st.cache_resource.clear()
+
+
+def widget(elements, label):
+    return next(element for element in elements if element.label == label)
+
+
+def test_two_sessions_editing_the_name(session):
+    a = session()
+    widget(a.button, "📝 Load Sample Project").click().run()
+    b = session()
+
+    widget(a.text_input, "Project Name:").input('Name by A').run()
+    widget(b.text_input, "Project Name:").input('Name by B').run()
+    assert "Project: name" in b.warning[0].value
+    assert widget(b.text_input, "Project Name:").value == 'Name by A'
+
+    # Plain reruns (e.g. after a change notification) do not write their values back
+    for app in (a, b, a, b):
+        app.run()
+        assert widget(app.text_input, "Project Name:").value == 'Name by A'
+        assert not app.warning and not app.exception
+
+
+def test_two_sessions_editing_a_text_area(session):
+    a = session()
+    widget(a.button, "📝 Load Sample Project").click().run()
+    b = session()
+    for app in (a, b):
+        app.radio(key='pdca_section').set_value('plan').run()
+
+    widget(a.text_area, "What is the goal?").input('Goal by A').run()
+    widget(b.text_area, "What is the goal?").input('Goal by B').run()
+    # B's edit is reported, not silently replaced by A's value
+    assert "Plan: goal" in b.warning[0].value
+    b.run()
+    assert widget(b.text_area, "What is the goal?").value == 'Goal by A'
+    a.run()
+    assert widget(a.text_area, "What is the goal?").value == 'Goal by A'
@@ -0,0 +1,55 @@
+import csv
+import io
+import json
+
+import pytest
+
+from cip import export
+from cip.projects import create_sample_project
+from cip.store import SQLiteProjectStore
+
+
+@pytest.fixture
+def store():
+    store = SQLiteProjectStore(':memory:')
+    for index in range(3):
+        store.save_project({**create_sample_project(), 'name': f'Project {index}'})
+    return store
+
+
+def test_jsonl_projects_keep_the_nested_format(store):
+    buffer = io.StringIO()
+    assert export.write_export(store, buffer, 'jsonl') == 3
+    records = [json.loads(line) for line in buffer.getvalue().splitlines()]
+    assert sorted(record['name'] for record in records) == ['Project 0', 'Project 1', 'Project 2']
+    assert len(records[0]['do']['implementation_steps']) == 3
+
+
+def test_csv_tasks_are_flat_rows(store):
+    buffer = io.StringIO()
+    assert export.write_export(store, buffer, 'csv', kind='tasks') == 9
+    rows = list(csv.DictReader(io.StringIO(buffer.getvalue())))
+    assert list(rows[0]) == export.TASK_EXPORT_COLUMNS
+    assert {row['responsible'] for row in rows} == {'John Smith', 'Anna Johnson', 'Tom Wilson'}
+
+
+def test_since_exports_only_changed_projects(store):
+    checkpoint = max(project['updated_at'] for project in store.list_projects())
+    changed = store.list_projects()[0]['id']
+    store.update_project(changed, name='Renamed')
+    rows = list(export.iter_rows(store, since=checkpoint))
+    assert [row['id'] for row in rows] == [changed]
+    assert json.loads(rows[0]['plan.measures']) == ['Machine analysis', 'Process optimization', 'Training']
+
+
+def test_parquet_row_groups(store, tmp_path):
+    pq = pytest.importorskip('pyarrow.parquet')
+    path = tmp_path / 'tasks.parquet'
+    assert export.write_parquet(store, str(path), kind='tasks', row_group_size=4) == 9
+    parquet = pq.ParquetFile(str(path))
+    assert parquet.metadata.num_row_groups == 3 and parquet.schema_arrow.names == export.TASK_EXPORT_COLUMNS
+
+
+def test_unknown_format_is_rejected(store):
+    with pytest.raises(ValueError, match='Unknown export format'):
+        export.write_export(store, io.StringIO(), 'xlsx')
@@ -0,0 +1,61 @@
+import io
+import json
+
+import pytest
+
+from cip import export, importer
+from cip.projects import create_sample_project
+from cip.store import SQLiteProjectStore
+
+
+def test_validate_project_reports_every_violation():
+    record = create_sample_project()
+    assert importer.validate_project(record) == []
+    record.update(name=' ', status='done', created_date='01.07.2024')
+    record['check']['metrics']['wait_time_after'] = 'fast'
+    record['do']['implementation_steps'][1].update(status='late', id='t1')
+    record['do']['implementation_steps'][2]['id'] = 't1'
+    errors = importer.validate_project(record)
+    assert errors == [
+        "name: required text",
+        "created_date: expected YYYY-MM-DD",
+        "status: must be one of draft, in_progress, completed, on_hold",
+        "check.metrics.wait_time_after: must be a number",
+        "do.implementation_steps[1].status: must be one of open, in_progress, completed",
+        "do.implementation_steps[2].id: duplicate task id",
+    ]
+
+
+def test_import_jsonl_skips_duplicates_and_reports_invalid_lines():
+    store = SQLiteProjectStore(':memory:')
+    project = create_sample_project()
+    lines = [json.dumps(project), '{not json', json.dumps({**project, 'name': 'Again'}), '']
+    report = importer.import_file(store, '\n'.join(lines).encode('utf-8'), 'projects.jsonl', batch_size=1)
+    assert (report['read'], report['imported'], report['skipped'], report['invalid']) == (3, 1, 1, 1)
+    assert report['errors'][0][0] == 'record 2'
+    assert store.get_project(project['id'])['name'] == project['name']
+
+    report = importer.import_file(store, json.dumps([{**project, 'name': 'Replaced'}]).encode(),
+                                  'projects.json', replace=True)
+    assert report['imported'] == 1 and store.get_project(project['id'])['name'] == 'Replaced'
+
+
+def test_csv_export_imports_back():
+    source = SQLiteProjectStore(':memory:')
+    project_id = source.save_project(create_sample_project())
+    buffer = io.StringIO()
+    assert export.write_export(source, buffer, 'csv') == 1
+
+    target = SQLiteProjectStore(':memory:')
+    report = importer.import_file(target, buffer.getvalue().encode('utf-8'), 'projects.csv')
+    assert report['imported'] == 1 and report['tasks'] == 3
+    imported, original = target.get_project(project_id), source.get_project(project_id)
+    assert imported['plan'] == original['plan'] and imported['check'] == original['check']
+    assert [task['task'] for task in target.get_tasks(project_id)] == \
+        [task['task'] for task in source.get_tasks(project_id)]
+
+
+def test_detect_format():
+    assert importer.detect_format('backlog.NDJSON') == 'jsonl'
+    with pytest.raises(ValueError, match='projects.xlsx'):
+        importer.detect_format('projects.xlsx')
@@ -0,0 +1,62 @@
+from datetime import date
+
+import pytest
+
+from cip.models import MISSING, Priority, Project, Task, TaskStatus, measure_task_memory
+from cip.projects import create_sample_project
+from cip.store import SQLiteProjectStore
+
+
+def test_stored_project_round_trip():
+    store = SQLiteProjectStore(':memory:')
+    stored = store.get_project(store.save_project(create_sample_project()))
+    project = Project.from_dict(stored)
+    assert project.to_dict() == stored
+    assert project.created_date == date.fromisoformat(stored['created_date'])
+    assert [task.status for task in project.tasks] == [TaskStatus.COMPLETED, TaskStatus.IN_PROGRESS,
+                                                       TaskStatus.OPEN]
+    # Nothing beyond the typed fields had to be kept
+    assert project.extra is None and project.plan.extra is None
+    assert all(task.extra == {'version': MISSING} for task in project.tasks)
+
+
+@pytest.mark.parametrize('data', [
+    {'task': 'Audit'},
+    {'task': 'Audit', 'responsible': None, 'due_date': None, 'status': None, 'priority': None},
+    {'task': 'Audit', 'due_date': '', 'owner_team': 'Line 2', 'version': 3},
+    {'task': 'Audit', 'due_date': date(2024, 7, 1), 'status': 'completed', 'priority': 'high'},
+])
+def test_task_round_trip(data):
+    assert Task.from_dict(data).to_dict() == data
+
+
+def test_project_round_trip_keeps_absent_and_unknown_keys():
+    data = {'id': 'p1', 'name': 'Scrap', 'status': 'on_hold', 'site': 'Plant 4',
+            'plan': {'goal': 'Halve scrap', 'problem': None, 'owner': 'QA'}, 'check': None}
+    assert Project.from_dict(data).to_dict() == data
+
+
+def test_invalid_values_raise():
+    with pytest.raises(ValueError):
+        Task.from_dict({'task': 'Audit', 'status': 'done'})
+    with pytest.raises(ValueError):
+        Task.from_dict({'task': 'Audit', 'due_date': '07/01/2024'})
+    with pytest.raises(ValueError):
+        Project.from_dict({'name': 'Scrap', 'status': 'archived'})
+
+
+def test_is_overdue_agrees_with_the_store():
+    store = SQLiteProjectStore(':memory:')
+    project_id = store.save_project(create_sample_project())
+    today = date(2024, 7, 20)
+    overdue = {row[2] for row in store.overdue_tasks(today.isoformat())}
+    tasks = Project.from_dict(store.get_project(project_id)).tasks
+    assert {task.id for task in tasks if task.is_overdue(today)} == overdue
+    assert Task.from_dict({'task': 'Due today', 'due_date': '2024-07-20'}).is_overdue(today) is False
+    assert Task.from_dict({'task': 'x', 'priority': 'low'}).priority is Priority.LOW
+
+
+def test_tasks_take_less_memory_than_dicts():
+    result = measure_task_memory(2000)
+    assert not hasattr(Task.from_dict({'task': 'Audit'}), '__dict__')
+    assert result['saved_bytes'] > 0.2 * result['dict_bytes']
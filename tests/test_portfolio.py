@@ -0,0 +1,44 @@
+from datetime import date
+
+import pytest
+
+from cip.portfolio import load_portfolio, portfolio_kpis
+from cip.projects import create_sample_project
+from cip.store import SQLiteProjectStore
+
+TODAY = date(2024, 7, 25)
+
+
+def make_store():
+    store = SQLiteProjectStore(':memory:')
+    store.save_project(create_sample_project())
+    store.save_project({**create_sample_project(), 'name': 'Draft', 'status': 'draft', 'created_date': '2024-01-10',
+                        'do': {}, 'check': {}})
+    return store
+
+
+def test_load_portfolio_rows_and_filters():
+    store = make_store()
+    df = load_portfolio(store, today=TODAY)
+    assert len(df) == 2 and df['status'].dtype == 'category'
+    sample = df.set_index('name').loc['Example: Reducing Wait Times']
+    # Due 2024-07-20 and still in progress; the completed and the later task do not count
+    assert sample['overdue'] == 1 and sample['task_total'] == 3
+    assert df.set_index('name').loc['Draft', 'overdue'] == 0
+
+    drafts = load_portfolio(store, statuses=['draft'], today=TODAY)
+    assert drafts['name'].tolist() == ['Draft']
+    older = load_portfolio(store, created_to=date(2024, 6, 30), today=TODAY)
+    assert older['name'].tolist() == ['Draft']
+
+
+def test_portfolio_kpis():
+    df = load_portfolio(make_store(), today=date(2024, 8, 1))
+    kpis = portfolio_kpis(df)
+    assert kpis['projects'] == 2 and kpis['task_total'] == 3 and kpis['task_completed'] == 1
+    assert kpis['completion_rate'] == pytest.approx(100 / 3)
+    assert kpis['overdue'] == 2
+    assert kpis['avg_improvement'] == df['improvement_percent'].mean()
+
+    empty = portfolio_kpis(load_portfolio(SQLiteProjectStore(':memory:')))
+    assert empty['projects'] == 0 and empty['avg_progress'] == 0.0 and empty['avg_improvement'] is None
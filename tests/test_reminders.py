@@ -0,0 +1,73 @@
+from datetime import date
+
+from cip.projects import create_sample_project
+from cip.reminders import MemorySink, SMTPSink, check_overdue
+from cip.store import SQLiteProjectStore
+
+TODAY = date(2024, 8, 1)
+
+
+class FailingSink(MemorySink):
+    """Refuses every digest for one responsible person."""
+
+    def __init__(self, refused):
+        super().__init__()
+        self.refused = refused
+
+    def send(self, digest):
+        if digest['responsible'] == self.refused:
+            raise OSError("recipient refused")
+        return super().send(digest)
+
+
+def test_only_failed_digests_are_retried():
+    store = SQLiteProjectStore(':memory:')
+    store.save_project(create_sample_project())
+    sink = FailingSink('Tom Wilson')
+    report = check_overdue(store, sink, TODAY)
+    assert [digest['responsible'] for digest in sink.sent] == ['Anna Johnson']
+    assert len(report['errors']) == 1
+
+    sink.sent.clear()
+    sink.refused = None
+    check_overdue(store, sink, TODAY)
+    assert [digest['responsible'] for digest in sink.sent] == ['Tom Wilson']
+    sink.sent.clear()
+    assert check_overdue(store, sink, TODAY)['tasks'] == 0
+
+
+def test_late_and_reopened_tasks_are_reminded():
+    store = SQLiteProjectStore(':memory:')
+    project_id = store.save_project(create_sample_project())
+    sink = MemorySink()
+    check_overdue(store, sink, TODAY)
+    sink.sent.clear()
+
+    # Added after the check with a due date long past
+    store.add_task(project_id, {'task': 'Late entry', 'responsible': 'Eva Novak', 'due_date': '2024-06-01'})
+    completed = store.get_tasks(project_id)[0]
+    store.update_task(project_id, completed['id'], status='open')
+    check_overdue(store, sink, TODAY)
+    assert sorted(digest['responsible'] for digest in sink.sent) == ['Eva Novak', 'John Smith']
+
+
+def test_digests_without_address_are_recorded_as_handled():
+    store = SQLiteProjectStore(':memory:')
+    store.save_project(create_sample_project())
+    # No names resolve to an address, so nothing is sent (and no server is contacted)
+    sink = SMTPSink('mail.invalid', 'cip@example.com', {})
+    report = check_overdue(store, sink, TODAY)
+    assert report['skipped'] == 2 and report['digests'] == 0 and not report['errors']
+
+    assert check_overdue(store, sink, TODAY)['tasks'] == 0
+    assert store.overdue_tasks('2024-08-02', unreminded=True) == []
+
+
+def test_digests_not_sent_are_retried():
+    store = SQLiteProjectStore(':memory:')
+    store.save_project(create_sample_project())
+    sink = MemorySink()
+    sink.send = lambda digest: False
+    report = check_overdue(store, sink, TODAY)
+    assert report['tasks'] == 2 and len(report['errors']) == 2
+    assert check_overdue(store, MemorySink(), TODAY)['digests'] == 2
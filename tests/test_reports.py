@@ -0,0 +1,63 @@
+import os
+import zipfile
+from concurrent.futures import Future
+
+import pytest
+
+from cip import reports
+from cip.projects import create_sample_project
+from cip.store import open_store
+
+
+@pytest.fixture
+def store(tmp_path):
+    return open_store(str(tmp_path / 'cip.db'))
+
+
+def test_write_report_caches_html_and_removes_older_versions(store, tmp_path):
+    directory = str(tmp_path / 'reports')
+    project_id = store.save_project(create_sample_project())
+
+    first = reports.write_report(store, project_id, 'html', directory)
+    assert reports.write_report(store, project_id, 'html', directory) == first
+    with open(first, encoding='utf-8') as fh:
+        assert 'Example: Reducing Wait Times' in fh.read()
+
+    store.update_project(project_id, name='Shorter changeovers')
+    second = reports.write_report(store, project_id, 'html', directory)
+    assert second != first
+    assert not os.path.exists(first)
+    assert reports.write_report(store, 'missing', 'html', directory) is None
+
+
+def test_write_batch_rerenders_a_report_replaced_meanwhile(store, tmp_path):
+    directory = str(tmp_path / 'reports')
+    project_id = store.save_project(create_sample_project())
+    stale = reports.write_report(store, project_id, 'html', directory)
+    store.update_project(project_id, name='Shorter changeovers')
+
+    queue = reports.ReportQueue(store, str(tmp_path / 'cip.db'), directory, workers=1)
+    submit = queue.submit
+    calls = []
+
+    def submit_stale_first(pid, fmt='html'):
+        calls.append(pid)
+        if len(calls) > 1:
+            return submit(pid, fmt)
+        # Picked up before the project changed; the newer report removes it before it is archived
+        os.remove(stale)
+        future = Future()
+        future.set_result(stale)
+        return future
+
+    queue.submit = submit_stale_first
+    target = str(tmp_path / 'batch.zip')
+    try:
+        assert queue.write_batch([project_id], target) == 1
+    finally:
+        queue.shutdown()
+
+    assert calls == [project_id, project_id]
+    with zipfile.ZipFile(target) as archive:
+        [name] = archive.namelist()
+        assert 'Shorter changeovers' in archive.read(name).decode('utf-8')
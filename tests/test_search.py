@@ -0,0 +1,55 @@
+import sqlite3
+
+import pytest
+
+from cip.projects import create_sample_project
+from cip.search import build_match, search_projects
+from cip.store import SQLiteProjectStore
+
+
+@pytest.mark.parametrize('query, match', [
+    ('changeover setup', '"changeover" "setup"'),
+    ('chang*', '"chang"*'),
+    ('"wait time"', '"wait time"'),
+    ('wait-time machine', '"wait time" "machine"'),
+    ('e-mail setup', '"e mail" "setup"'),
+    ('cause:machine-capacity analysis', 'root_cause : "machine capacity" "analysis"'),
+    ('NEAR(a b)', '"NEAR a" "b"'),
+    ('changeover OR setup', '"changeover" OR "setup"'),
+    ('OR setup OR', '"setup"'),
+    ('unknown:word', '"unknown word"'),
+    ('"" *', ''),
+])
+def test_build_match(query, match):
+    assert build_match(query) == match
+
+
+@pytest.fixture
+def store():
+    store = SQLiteProjectStore(':memory:')
+    if not store.has_search:
+        pytest.skip("SQLite without FTS5")
+    project = create_sample_project()
+    project['plan']['root_cause'] = 'Machine-capacity analysis missing; wait-time not measured'
+    store.save_project(project)
+    store.save_project({**create_sample_project(), 'name': 'E-mail setup'})
+    return store
+
+
+@pytest.mark.parametrize('query, hits', [
+    ('wait-time machine', 1),
+    ('e-mail setup', 1),
+    ('cause:machine-capacity analysis', 1),
+    ('cause:capacity-machine', 0),
+    ('NEAR(a b)', 0),
+    ('title:e-mail OR cause:wait-time', 2),
+])
+def test_search_queries(store, query, hits):
+    assert len(search_projects(store, query)) == hits
+
+
+def test_rejected_query_finds_nothing(store, monkeypatch):
+    def reject(match, limit):
+        raise sqlite3.OperationalError('fts5: syntax error')
+    monkeypatch.setattr(store, 'search', reject)
+    assert search_projects(store, 'anything') == []
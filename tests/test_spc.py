@@ -0,0 +1,60 @@
+import json
+
+import pytest
+
+np = pytest.importorskip('numpy')
+from cip import spc  # noqa: E402
+
+
+def test_welch_test_returns_plain_types():
+    before = np.array([45.0, 47.0, 44.0, 46.0, 48.0, 45.0])
+    after = np.array([32.0, 33.0, 31.0, 34.0, 32.0, 30.0])
+    result = spc.welch_test(before, after)
+    assert result['significant'] is True
+    assert all(type(result[key]) is float for key in ('t', 'df', 'p_value', 'before_mean', 'after_mean'))
+    assert result['p_value'] < 0.001
+    json.dumps(result)
+
+
+def test_welch_test_no_shift():
+    result = spc.welch_test(np.array([1.0, 2.0, 3.0]), np.array([1.0, 2.0, 3.0]))
+    assert result['significant'] is False
+    assert result['p_value'] == pytest.approx(1.0)
+
+
+def test_control_limits_individuals():
+    limits = spc.control_limits(np.array([10.0, 12.0, 11.0, 13.0, 12.0]))
+    assert limits.center == pytest.approx(11.6)
+    # Mean moving range 1.5, so the limits are 2.66 of it away from the center
+    assert limits.ucl - limits.center == pytest.approx(3 / 1.128 * 1.5)
+    json.dumps(limits.to_dict())
+
+
+def test_western_electric_rule_1():
+    limits = spc.control_limits(np.array([10.0, 11.0, 10.0, 11.0, 10.0, 11.0]))
+    masks = spc.western_electric(np.array([10.5, 30.0, 10.5]), limits)
+    assert spc.violation_counts(masks)[1] == 1
+
+
+def test_running_limits_follow_appends_and_rewrites():
+    from cip import timeseries
+    from cip.projects import create_sample_project
+    from cip.store import SQLiteProjectStore
+
+    store = SQLiteProjectStore(':memory:')
+    project_id = store.save_project(create_sample_project())
+    running = spc.RunningLimits()
+
+    def sync_and_compare(timestamps, values):
+        timeseries.ingest(store, project_id, {'wait_time': (timestamps, values)})
+        _, points, _, _, updated_at = next(row for row in store.metric_series(project_id) if row[0] == 'wait_time')
+        running.sync(store, project_id, 'wait_time', updated_at, points)
+        _, stored = timeseries.load_series(store, project_id, 'wait_time')
+        assert running.points == len(stored)
+        assert running.limits().to_dict() == pytest.approx(spc.control_limits(stored).to_dict())
+
+    sync_and_compare([f'2024-07-01T{hour:02d}:00:00Z' for hour in range(8)], [40.0 + hour % 3 for hour in range(8)])
+    # New points later that day and on the next one
+    sync_and_compare(['2024-07-01T20:00:00Z', '2024-07-02T08:00:00Z'], [50.0, 38.0])
+    # A corrected earlier value rebuilds the limits
+    sync_and_compare(['2024-07-01T03:00:00Z'], [60.0])
@@ -0,0 +1,106 @@
+import pytest
+
+from cip.projects import create_sample_project, summarize_project
+from cip.store import SUMMARY_COLUMNS, SQLiteProjectStore
+
+
+def summary_row(store, project_id):
+    rows = [dict(zip(SUMMARY_COLUMNS, row)) for row in store.project_summaries()]
+    return next(row for row in rows if row['id'] == project_id)
+
+
+def test_upsert_tasks_mixed_batch_refreshes_summary():
+    store = SQLiteProjectStore(':memory:')
+    project_id = store.save_project(create_sample_project())
+    first = store.get_tasks(project_id)[0]
+    store.upsert_tasks(project_id, [{'id': first['id'], 'status': 'open'},
+                                    {'task': 'Audit the new layout', 'responsible': 'Eva Novak'}])
+
+    stored = summary_row(store, project_id)
+    expected = summarize_project(store.get_project(project_id))
+    assert stored['task_total'] == expected['task_total'] == 4
+    for field in ('progress', 'do_progress', 'task_open', 'next_due_date'):
+        assert stored[field] == expected[field]
+    assert [row[0] for row in store.search('audit')] == [project_id]
+
+
+def test_full_replace_bumps_versions():
+    store = SQLiteProjectStore(':memory:')
+    project_id = store.save_project(create_sample_project())
+    store.update_phase(project_id, 'plan', {'problem': 'Changeover takes too long'})
+    before = store.record_versions(project_id)
+    task_id = store.get_tasks(project_id)[0]['id']
+    task_version = store.get_task(project_id, task_id)['version']
+
+    store.save_project(store.get_project(project_id))
+
+    after = store.record_versions(project_id)
+    assert after[('plan', 'problem')] == before[('plan', 'problem')] + 1 == 3
+    assert after[('project', None)] == before[('project', None)] + 1
+    assert store.get_task(project_id, task_id)['version'] == task_version + 1
+    # A session still holding the old version is told about the conflict
+    assert store.update_phase(project_id, 'plan', {'problem': 'stale'}, {'problem': 2}) == ['problem']
+
+
+def test_completed_projects_by_completion_time():
+    store = SQLiteProjectStore(':memory:')
+    project_id = store.save_project(create_sample_project())
+    assert store.completed_projects('2000-01-01', '9999-01-01') == []
+    store.update_project(project_id, status='completed')
+    completed_at = store.conn.execute('SELECT completed_at FROM projects').fetchone()[0]
+    # Later edits and a full replace keep the completion time
+    store.update_project(project_id, name='Renamed')
+    store.save_project(store.get_project(project_id))
+    assert store.conn.execute('SELECT completed_at FROM projects').fetchone()[0] == completed_at
+    month = completed_at[:7]
+    assert store.completed_projects(f'{month}-01', '9999-01-01') == [project_id]
+    store.update_project(project_id, status='in_progress')
+    assert store.completed_projects('2000-01-01', '9999-01-01') == []
+
+
+def overdue_by_query(store, cutoff):
+    return dict(store.conn.execute(
+        "SELECT project_id, COUNT(*) FROM implementation_steps WHERE status != 'completed' "
+        "AND due_date != '' AND due_date < ? GROUP BY project_id", (cutoff,)).fetchall())
+
+
+def test_overdue_counts_kept_in_summaries(monkeypatch):
+    store = SQLiteProjectStore(':memory:')
+    project_id = store.save_project(create_sample_project())
+    other_id = store.save_project(create_sample_project())
+    # Sample due dates: 07-15 (completed), 07-20 and 07-30
+    assert store.overdue_counts('2024-07-21') == overdue_by_query(store, '2024-07-21') == {project_id: 1,
+                                                                                          other_id: 1}
+    recounts = []
+    original = store._count_overdue
+    monkeypatch.setattr(store, '_count_overdue', lambda *args: recounts.append(args[1:]) or original(*args))
+
+    # Later days recount only when a task came due in between
+    assert store.overdue_counts('2024-07-25') == {project_id: 1, other_id: 1}
+    assert recounts == []
+    assert store.overdue_counts('2024-07-31') == overdue_by_query(store, '2024-07-31')
+    assert sorted(recounts) == sorted([(project_id, '2024-07-31'), (other_id, '2024-07-31')])
+
+    # Task writes update the count of their project
+    recounts.clear()
+    task = next(task for task in store.get_tasks(project_id) if task['status'] == 'in_progress')
+    store.update_tasks(project_id, {task['id']: {'status': 'completed'}})
+    store.add_task(project_id, {'task': 'Late', 'due_date': '2024-01-02', 'status': 'open'})
+    assert store.overdue_counts('2024-07-31') == overdue_by_query(store, '2024-07-31') == {project_id: 2,
+                                                                                          other_id: 2}
+    # The writes counted for today's cutoff, which is later; the project is recounted for the old day once
+    assert recounts.count((project_id, '2024-07-31')) == 1
+    assert store.overdue_counts('2024-07-31') == {project_id: 2, other_id: 2}
+    assert recounts.count((project_id, '2024-07-31')) == 1
+
+
+def test_do_progress_ignores_due_dates():
+    store = SQLiteProjectStore(':memory:')
+    project = create_sample_project()
+    project_id = store.save_project(project)
+    # One completed, one in progress and one open task: (1 + 0.5) / 3
+    assert summary_row(store, project_id)['do_progress'] == pytest.approx(50.0)
+    for task in project['do']['implementation_steps']:
+        task['due_date'] = '2099-01-01'
+    store.save_project(project)
+    assert summary_row(store, project_id)['do_progress'] == pytest.approx(50.0)
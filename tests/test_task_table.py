@@ -0,0 +1,47 @@
+from datetime import date
+
+from cip import task_table
+from cip.projects import create_sample_project
+from cip.store import SQLiteProjectStore
+
+
+def make_store(tasks=30):
+    store = SQLiteProjectStore(':memory:')
+    project = create_sample_project()
+    project['do']['implementation_steps'] = [
+        {'task': f'Task {i:02d}', 'responsible': f'Person {i % 3}', 'due_date': f'2024-07-{i % 28 + 1:02d}',
+         'status': 'completed' if i % 5 == 0 else 'open'} for i in range(tasks)]
+    return store, store.save_project(project)
+
+
+def test_pages_are_filtered_and_sorted_in_the_store():
+    store, project_id = make_store()
+    df, total = task_table.load_task_page(store, project_id, statuses=['open'], responsible='Person 1',
+                                          sort_by='due_date', descending=True, page=1, page_size=5)
+    assert total == 8 and len(df) == 5
+    assert (df['responsible'] == 'Person 1').all() and (df['status'] == 'open').all()
+    assert list(df['due_date']) == sorted(df['due_date'], reverse=True)
+    assert isinstance(df['due_date'].iloc[0], date)
+    assert task_table.page_count(total, 5) == 2 and task_table.page_count(0, 5) == 1
+
+    _, total = task_table.load_task_page(store, project_id, due_from=date(2024, 7, 1), due_to=date(2024, 7, 2))
+    assert total == 4
+
+
+def test_edits_are_written_in_one_batch_and_stale_rows_conflict():
+    store, project_id = make_store(tasks=4)
+    original, _ = task_table.load_task_page(store, project_id)
+    edited = original.copy()
+    first, second, third = original.index[:3]
+    edited.loc[first, 'status'] = 'in_progress'
+    edited.loc[second, 'due_date'] = date(2024, 9, 1)
+    assert task_table.diff_task_page(original, edited) == {first: {'status': 'in_progress'},
+                                                          second: {'due_date': '2024-09-01'}}
+
+    # Someone else changes the second task after the page was loaded
+    store.update_task(project_id, second, responsible='Eva Novak')
+    updated, deleted, conflicts = task_table.apply_task_edits(store, project_id, original, edited, deleted=[third])
+    assert (updated, deleted, conflicts) == (1, 1, [second])
+    assert store.get_task(project_id, first)['status'] == 'in_progress'
+    assert store.get_task(project_id, second)['due_date'] == original.loc[second, 'due_date'].isoformat()
+    assert store.get_task(project_id, third) is None
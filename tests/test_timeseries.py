@@ -0,0 +1,75 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from cip import timeseries
+from cip.projects import create_sample_project
+from cip.store import SQLiteProjectStore
+
+DAY = timeseries.CHUNK_MS
+HOUR = DAY // 24
+
+
+@pytest.fixture
+def store():
+    return SQLiteProjectStore(':memory:')
+
+
+def test_ingest_merges_daily_chunks_and_newest_value_wins(store):
+    project_id = store.save_project(create_sample_project())
+    ts = np.arange(0, 3 * DAY, HOUR)
+    assert timeseries.ingest(store, project_id, {'wait': (ts, np.arange(len(ts), dtype=float))}) == 72
+    # Overlaps the last day, adds a fourth one, drops the NaN
+    assert timeseries.ingest(store, project_id, {'wait': ([2 * DAY, 3 * DAY, 3 * DAY + HOUR],
+                                                          [-1.0, -2.0, np.nan])}) == 2
+
+    loaded_ts, values = timeseries.load_series(store, project_id, 'wait')
+    assert len(loaded_ts) == 73 and np.all(np.diff(loaded_ts) > 0)
+    assert values[loaded_ts == 2 * DAY][0] == -1.0
+    assert len(store.metric_chunks(project_id, 'wait')) == 4
+
+    window_ts, _ = timeseries.load_series(store, project_id, 'wait', DAY, 2 * DAY)
+    assert window_ts[0] == DAY and window_ts[-1] == 2 * DAY
+    series = timeseries.list_series(store, project_id)
+    assert series['metric'].tolist() == ['wait'] and series['points'].tolist() == [73]
+
+
+def test_ingest_rejects_mismatched_lengths(store):
+    project_id = store.save_project(create_sample_project())
+    with pytest.raises(ValueError, match='3 timestamps but 2 values'):
+        timeseries.ingest(store, project_id, {'wait': ([0, 1, 2], [1.0, 2.0])})
+
+
+def test_ingest_frame_and_timestamp_parsing(store):
+    project_id = store.save_project(create_sample_project())
+    df = pd.DataFrame({'timestamp': ['2024-07-01T00:00:00Z', '2024-07-01T01:00:00+01:00', '2024-07-02'],
+                       'metric': ['wait', 'wait', 'scrap'], 'value': ['45', 'n/a', 3]})
+    assert timeseries.ingest_frame(store, project_id, df) == 2
+    ts, values = timeseries.load_series(store, project_id, 'wait')
+    assert ts.tolist() == [timeseries.millis('2024-07-01')] and values.tolist() == [45.0]
+    with pytest.raises(ValueError, match='Missing columns: value'):
+        timeseries.ingest_frame(store, project_id, df.drop(columns='value'))
+
+
+def test_rolling_baseline_and_improvement():
+    ts = np.arange(10) * DAY
+    values = np.r_[np.full(5, 40.0), np.full(5, 30.0)]
+    baseline = timeseries.rolling_baseline(ts, values, '2D')
+    assert baseline[4] == 40.0 and baseline[5] == pytest.approx(35.0)
+
+    result = timeseries.improvement(ts, values, 5 * DAY)
+    assert result['before_mean'] == 40.0 and result['after_mean'] == 30.0
+    assert result['improvement_percent'] == pytest.approx(25.0)
+    assert timeseries.improvement(ts, values, 5 * DAY, lower_is_better=False)['improvement_percent'] == \
+        pytest.approx(-25.0)
+    assert timeseries.improvement(ts, values, 5 * DAY, window='2D')['before_points'] == 2
+
+
+def test_downsample_keeps_spikes():
+    ts = np.arange(10_000, dtype=np.int64)
+    values = np.zeros(10_000)
+    values[1234] = 99.0
+    df = timeseries.downsample(ts, values, max_points=100)
+    assert len(df) == 100 and df['count'].sum() == 10_000
+    assert df['max'].max() == 99.0 and df['mean'].max() < 99.0
+    assert timeseries.downsample(ts[:0], values[:0]).empty
@@ -0,0 +1,50 @@
+from cip.projects import create_sample_project
+from cip.store import SQLiteProjectStore
+from cip.tracking import HEADER, ChangeTracker
+
+
+def rerun(tracker, project_id, phase, field, edit=None):
+    """One page run: load, render ``field`` (edited to ``edit`` if given) and flush."""
+    project = tracker.load_project(tracker.store.get_project(project_id))
+    shown = project[field] if phase == HEADER else project[phase].get(field)
+    tracker.stage(project_id, phase, {field: shown if edit is None else edit}, [field] if edit is not None else [])
+    tracker.flush()
+    return tracker.pop_conflicts()
+
+
+def test_concurrent_header_edit_conflicts_instead_of_overwriting():
+    store = SQLiteProjectStore(':memory:')
+    project_id = store.save_project(create_sample_project())
+    a, b = ChangeTracker(store), ChangeTracker(store)
+    rerun(a, project_id, HEADER, 'name')
+    rerun(b, project_id, HEADER, 'name')
+
+    assert rerun(a, project_id, HEADER, 'name', 'Name by A') == []
+    # B edited the name it was shown before A saved
+    assert rerun(b, project_id, HEADER, 'name', 'Name by B') == [(project_id, HEADER, 'name')]
+    assert store.get_project(project_id, ())['name'] == 'Name by A'
+
+    # Plain reruns of either session write nothing back
+    for tracker in (a, b, a, b):
+        assert rerun(tracker, project_id, HEADER, 'name') == []
+    assert store.get_project(project_id, ())['name'] == 'Name by A'
+    assert a.stats['written'] == 1
+
+    # An edit of the value B now sees goes through
+    assert rerun(b, project_id, HEADER, 'name', 'Name by B') == []
+    assert store.get_project(project_id, ())['name'] == 'Name by B'
+
+
+def test_edit_uses_the_version_it_was_rendered_with():
+    store = SQLiteProjectStore(':memory:')
+    project_id = store.save_project(create_sample_project())
+    a, b = ChangeTracker(store), ChangeTracker(store)
+    rerun(a, project_id, 'plan', 'goal')
+    rerun(b, project_id, 'plan', 'goal', 'Goal by B')
+
+    # A's page was rendered before B saved; reloading the project does not move the basis
+    a.load_project(store.get_project(project_id))
+    a.stage(project_id, 'plan', {'goal': 'Goal by A'}, ['goal'])
+    a.flush()
+    assert a.pop_conflicts() == [(project_id, 'plan', 'goal')]
+    assert store.get_phase(project_id, 'plan')['goal'] == 'Goal by B'